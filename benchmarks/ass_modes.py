@@ -0,0 +1,105 @@
+import argparse
+import json
+import os
+import shutil
+import subprocess
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from scripts import adjust_subtitles, encoders
+
+# Compara os modos de legenda com destaque: número de eventos no .ass e velocidade do burn (libass)
+MODES = ("highlight", "highlight_compacto", "karaoke")
+
+# Mesmo estilo padrão do main.py
+STYLE = {
+    "base_color": "&H00FFFFFF&", "base_size": 12, "h_size": 14, "highlight_color": "&H000FF00&",
+    "palavras_por_bloco": 3, "limite_gap": 0.5, "posicao_vertical": 60, "alinhamento": 2, "fonte": "Arial",
+    "contorno": "&HFF808080&", "cor_da_sombra": "&H00000000&", "negrito": 0, "italico": 0, "sublinhado": 0,
+    "tachado": 0, "estilo_da_borda": 3, "espessura_do_contorno": 1.5, "tamanho_da_sombra": 10,
+}
+
+def synthetic_transcript(duration=90.0, words_per_second=2.5, words_per_segment=10):
+    # Transcrição no formato do WhisperX (palavras com start/end), com pausas entre os segmentos
+    segments = []
+    word_length = 1.0 / words_per_second
+    t = 0.0
+    n = 0
+    while t < duration:
+        words = []
+        for _ in range(words_per_segment):
+            if t >= duration:
+                break
+            words.append({"word": f"palavra{n}", "start": round(t, 3), "end": round(t + word_length * 0.8, 3), "score": 0.9})
+            t += word_length
+            n += 1
+        segments.append({"start": words[0]["start"], "end": words[-1]["end"], "text": " ".join(w["word"] for w in words), "words": words})
+        t += 0.6
+    return {"segments": segments, "language": "pt"}
+
+def generate(transcript, mode, work_dir):
+    # adjust() trabalha sobre subs/ -> subs_ass/ do diretório atual
+    cwd = os.getcwd()
+    os.chdir(work_dir)
+    try:
+        os.makedirs("subs", exist_ok=True)
+        with open(os.path.join("subs", f"{mode}.json"), "w", encoding="utf-8") as f:
+            json.dump(transcript, f)
+        start = time.perf_counter()
+        adjust_subtitles.adjust(modo=mode, files=[f"{mode}.json"], **STYLE)
+        elapsed = time.perf_counter() - start
+    finally:
+        os.chdir(cwd)
+    return os.path.join(work_dir, "subs_ass", f"{mode}.ass"), elapsed
+
+def burn_throughput(ass_file, duration, fps=30, encode=False):
+    # Queima a legenda sobre um vídeo sintético 1080x1920; sem --encode mede só o libass (saída nula)
+    path = ass_file.replace('\\', '/')
+    command = ["ffmpeg", "-hide_banner", "-loglevel", "error", "-y",
+               "-f", "lavfi", "-i", f"color=c=black:s=1080x1920:r={fps}:d={duration}",
+               "-vf", f"subtitles='{path}'"]
+    if encode:
+        command.extend(encoders.video_args(encoders.select_encoder(), "draft"))
+    command.extend(["-f", "null", "-"])
+    start = time.perf_counter()
+    subprocess.run(command, check=True, capture_output=True)
+    elapsed = time.perf_counter() - start
+    return {"burn_seconds": round(elapsed, 3), "burn_fps": round(duration * fps / elapsed, 1)}
+
+def run(transcript_file=None, duration=90.0, encode=False, burn=True):
+    if transcript_file:
+        with open(transcript_file, "r", encoding="utf-8") as f:
+            transcript = json.load(f)
+        duration = max((w.get("end", 0) for s in transcript.get("segments", []) for w in s.get("words", [])), default=duration)
+    else:
+        transcript = synthetic_transcript(duration)
+
+    burn = burn and shutil.which("ffmpeg") is not None
+    results = {}
+    with tempfile.TemporaryDirectory() as work_dir:
+        for mode in MODES:
+            ass_file, generate_seconds = generate(transcript, mode, work_dir)
+            with open(ass_file, "r", encoding="utf-8") as f:
+                events = sum(1 for line in f if line.lstrip().startswith("Dialogue:"))
+            results[mode] = {"events": events, "bytes": os.path.getsize(ass_file), "generate_seconds": round(generate_seconds, 4)}
+            if burn:
+                results[mode].update(burn_throughput(ass_file, duration, encode=encode))
+
+    baseline = results["highlight"]
+    for mode, result in results.items():
+        result["events_vs_highlight"] = round(result["events"] / baseline["events"], 3) if baseline["events"] else None
+        if burn:
+            result["speedup_vs_highlight"] = round(baseline["burn_seconds"] / result["burn_seconds"], 2)
+    return {"duration": duration, "encode": encode, "results": results}
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Eventos ASS e velocidade do burn por modo de destaque.")
+    parser.add_argument("--json", help="Transcrição do WhisperX (padrão: transcrição sintética)")
+    parser.add_argument("--duration", type=float, default=90.0, help="Duração da transcrição sintética (segundos)")
+    parser.add_argument("--encode", action="store_true", help="Inclui o encode do vídeo na medição do burn")
+    parser.add_argument("--no-burn", action="store_true", help="Só conta eventos, sem rodar o ffmpeg")
+    args = parser.parse_args()
+    print(json.dumps(run(args.json, args.duration, args.encode, not args.no_burn), indent=2))
@@ -0,0 +1,223 @@
+import argparse
+import json
+import os
+import platform
+import shutil
+import subprocess
+import sys
+import tempfile
+import time
+
+try:
+    import resource  # Só existe em Unix; no Windows o pico de memória fica como None
+except ImportError:
+    resource = None
+
+ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+sys.path.insert(0, ROOT)
+
+from benchmarks.ass_modes import STYLE, synthetic_transcript
+
+# Benchmark por estágio (cut, reframe, ass, burn) sobre mídia sintética gerada localmente.
+# Cada estágio roda num processo próprio, para que tempo de CPU e pico de memória sejam só dele.
+STAGES = ("cut", "reframe", "ass", "burn")
+FPS = 30
+
+def run_ffmpeg(args):
+    subprocess.run(["ffmpeg", "-hide_banner", "-loglevel", "error", "-y"] + args, check=True)
+
+def draw_face(path, size=360):
+    # Rosto desenhado (pele, olhos, sobrancelhas, nariz e boca) para exercitar o caminho do MediaPipe
+    import cv2
+    import numpy as np
+    image = np.full((size, size, 3), 255, dtype=np.uint8)
+    c = size // 2
+    cv2.ellipse(image, (c, c), (int(size * 0.32), int(size * 0.42)), 0, 0, 360, (150, 185, 225), -1)
+    for dx in (-1, 1):
+        eye = (c + dx * int(size * 0.13), c - int(size * 0.08))
+        cv2.ellipse(image, eye, (int(size * 0.06), int(size * 0.035)), 0, 0, 360, (255, 255, 255), -1)
+        cv2.circle(image, eye, int(size * 0.025), (40, 30, 20), -1)
+        cv2.line(image, (eye[0] - int(size * 0.06), eye[1] - int(size * 0.07)), (eye[0] + int(size * 0.06), eye[1] - int(size * 0.08)), (40, 40, 60), 4)
+    cv2.line(image, (c, c - int(size * 0.02)), (c - int(size * 0.03), c + int(size * 0.1)), (110, 140, 190), 3)
+    cv2.ellipse(image, (c, c + int(size * 0.2)), (int(size * 0.1), int(size * 0.04)), 0, 0, 180, (60, 60, 170), -1)
+    cv2.imwrite(path, image)
+
+def generate_media(work_dir, duration, num_segments, segment_seconds, face_image=None):
+    """
+    Gera tmp/input_video.mp4 (testsrc2 + tom senoidal + rosto em movimento), tmp/viral_segments.txt
+    e as transcrições no formato do WhisperX (tmp/input_video.json e subs/*.json).
+    """
+    for folder in ("tmp", "final", "subs", "subs_ass", "burned_sub"):
+        os.makedirs(os.path.join(work_dir, folder), exist_ok=True)
+
+    face = face_image
+    if face is None:
+        face = os.path.join(work_dir, "tmp", "face.png")
+        draw_face(face)
+
+    run_ffmpeg([
+        "-f", "lavfi", "-i", f"testsrc2=size=1920x1080:rate={FPS}:duration={duration}",
+        "-f", "lavfi", "-i", f"sine=frequency=440:sample_rate=44100:duration={duration}",
+        "-loop", "1", "-i", face,
+        "-filter_complex", "[2:v]scale=360:-1[face];[0:v][face]overlay=x='(W-w)*(0.5+0.35*sin(t/3))':y='(H-h)/3':shortest=1[v]",
+        "-map", "[v]", "-map", "1:a", "-t", str(duration),
+        "-c:v", "libx264", "-preset", "ultrafast", "-g", str(FPS * 2), "-pix_fmt", "yuv420p",
+        "-c:a", "aac", os.path.join(work_dir, "tmp", "input_video.mp4"),
+    ])
+
+    step = max(segment_seconds, (duration - segment_seconds) / max(1, num_segments - 1)) if num_segments > 1 else 0
+    segments = []
+    for i in range(num_segments):
+        start = min(i * step, max(0, duration - segment_seconds))
+        segments.append({"title": f"Segmento {i}", "start_time": time.strftime("%H:%M:%S", time.gmtime(start)), "duration": segment_seconds})
+    with open(os.path.join(work_dir, "tmp", "viral_segments.txt"), "w", encoding="utf-8") as f:
+        json.dump({"segments": segments}, f)
+
+    with open(os.path.join(work_dir, "tmp", "input_video.json"), "w", encoding="utf-8") as f:
+        json.dump(synthetic_transcript(duration), f)
+    for i in range(num_segments):
+        with open(os.path.join(work_dir, "subs", f"final-output{str(i).zfill(3)}_processed.json"), "w", encoding="utf-8") as f:
+            json.dump(synthetic_transcript(segment_seconds), f)
+    return segments
+
+def prepare_final(work_dir, num_segments):
+    # Sem o reenquadramento (ex: MediaPipe ausente), gera final/ com scale+pad para o burn ter entrada
+    for i in range(num_segments):
+        name = str(i).zfill(3)
+        source = os.path.join(work_dir, "tmp", f"output{name}_original_scale.mp4")
+        target = os.path.join(work_dir, "final", f"final-output{name}_processed.mp4")
+        if os.path.exists(source) and not os.path.exists(target):
+            run_ffmpeg(["-i", source, "-vf", "scale=1080:1920:force_original_aspect_ratio=decrease,pad=1080:1920:(ow-iw)/2:(oh-ih)/2",
+                        "-c:v", "libx264", "-preset", "ultrafast", "-c:a", "copy", target])
+
+def run_stage(stage, options):
+    # Executado dentro do processo filho, com o diretório de trabalho já no work_dir
+    if stage == "cut":
+        from scripts import cut_segments
+        cut_segments.cut(None, batch=options["cut_batch"], stream_copy=options["cut_stream_copy"])
+    elif stage == "reframe":
+        from scripts import edit_video
+        results = edit_video.edit(workers=options["workers"], num_faces=options["num_faces"], backend=options["backend"], profile="draft")
+        if not results or any(result is None for result in results):
+            raise RuntimeError("reenquadramento sem saída para algum segmento")
+    elif stage == "ass":
+        from scripts import adjust_subtitles
+        adjust_subtitles.adjust(modo=options["modo"], **STYLE)
+    elif stage == "burn":
+        from scripts import burn_subtitles
+        failed = [status for status in burn_subtitles.burn(workers=options["workers"], profile="draft") if not status["ok"]]
+        if failed:
+            raise RuntimeError(failed[0]["error"])
+
+def peak_rss_mb():
+    # ru_maxrss: KB no Linux, bytes no macOS
+    if resource is None:
+        return None
+    unit = 1 if sys.platform == "darwin" else 1024
+    self_rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss * unit
+    children_rss = resource.getrusage(resource.RUSAGE_CHILDREN).ru_maxrss * unit
+    return {"python": round(self_rss / 1024 ** 2, 1), "children": round(children_rss / 1024 ** 2, 1)}
+
+def stage_child(stage, options):
+    start_cpu = time.process_time()
+    start = time.perf_counter()
+    error = None
+    try:
+        run_stage(stage, options)
+    except Exception as e:
+        error = f"{type(e).__name__}: {e}"
+    wall = time.perf_counter() - start
+    cpu = time.process_time() - start_cpu
+    if resource is not None:
+        children = resource.getrusage(resource.RUSAGE_CHILDREN)
+        cpu += children.ru_utime + children.ru_stime
+    result = {"wall_seconds": round(wall, 3), "cpu_seconds": round(cpu, 3), "peak_rss_mb": peak_rss_mb(), "error": error}
+    print("BENCHMARK_RESULT " + json.dumps(result))
+
+def time_stage(stage, work_dir, options, media_seconds):
+    command = [sys.executable, os.path.abspath(__file__), "--child", stage, "--options", json.dumps(options)]
+    process = subprocess.run(command, cwd=work_dir, capture_output=True, text=True)
+    lines = [line for line in process.stdout.splitlines() if line.startswith("BENCHMARK_RESULT ")]
+    if not lines:
+        return {"ok": False, "error": (process.stderr.strip().splitlines() or ["sem resultado"])[-1]}
+    result = json.loads(lines[-1][len("BENCHMARK_RESULT "):])
+    frames = media_seconds * FPS
+    result["ok"] = result["error"] is None
+    result["media_seconds"] = media_seconds
+    result["fps"] = round(frames / result["wall_seconds"], 1) if result["wall_seconds"] else None
+    result["real_time_factor"] = round(result["wall_seconds"] / media_seconds, 3) if media_seconds else None
+    return result
+
+def git_commit():
+    try:
+        return subprocess.run(["git", "rev-parse", "--short", "HEAD"], cwd=ROOT, capture_output=True, text=True).stdout.strip() or None
+    except OSError:
+        return None
+
+def run(duration=60.0, num_segments=3, segment_seconds=15, stages=STAGES, workers=1, num_faces=1, backend="opencv",
+        modo="highlight", cut_batch=False, cut_stream_copy=False, face_image=None, keep=False):
+    from scripts import encoders
+    options = {"workers": workers, "num_faces": num_faces, "backend": backend, "modo": modo,
+               "cut_batch": cut_batch, "cut_stream_copy": cut_stream_copy}
+
+    work_dir = tempfile.mkdtemp(prefix="viralcutter-bench-")
+    try:
+        generate_start = time.perf_counter()
+        generate_media(work_dir, duration, num_segments, segment_seconds, face_image)
+        generate_seconds = time.perf_counter() - generate_start
+
+        clips_seconds = num_segments * segment_seconds
+        media = {"cut": clips_seconds, "reframe": clips_seconds, "ass": clips_seconds, "burn": clips_seconds}
+        results = {}
+        for stage in stages:
+            if stage == "burn":
+                prepare_final(work_dir, num_segments)
+            results[stage] = time_stage(stage, work_dir, options, media[stage])
+            status = "ok" if results[stage]["ok"] else f"falhou ({results[stage]['error']})"
+            print(f"{stage}: {results[stage].get('wall_seconds', '-')}s, {results[stage].get('fps', '-')} fps - {status}", file=sys.stderr)
+    finally:
+        if keep:
+            print(f"Arquivos mantidos em: {work_dir}", file=sys.stderr)
+        else:
+            shutil.rmtree(work_dir, ignore_errors=True)
+
+    return {
+        "timestamp": time.strftime("%Y-%m-%dT%H:%M:%S"),
+        "commit": git_commit(),
+        "host": {"platform": platform.platform(), "python": platform.python_version(), "cpu_count": os.cpu_count(),
+                 "ffmpeg": encoders.probe()["version"], "encoder": encoders.select_encoder()},
+        "config": {"duration": duration, "segments": num_segments, "segment_seconds": segment_seconds, "fps": FPS, **options},
+        "generate_seconds": round(generate_seconds, 3),
+        "stages": results,
+    }
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Benchmark dos estágios do ViralCutter com mídia sintética.")
+    parser.add_argument("--duration", type=float, default=60.0, help="Duração do vídeo fonte sintético (segundos)")
+    parser.add_argument("--segments", type=int, default=3, help="Número de cortes")
+    parser.add_argument("--segment-seconds", type=int, default=15, help="Duração de cada corte (segundos)")
+    parser.add_argument("--stages", default=",".join(STAGES), help="Estágios a medir, separados por vírgula")
+    parser.add_argument("--workers", type=int, default=1, help="Workers do reenquadramento e do burn")
+    parser.add_argument("--num-faces", type=int, default=1, choices=(1, 2))
+    parser.add_argument("--backend", default="opencv", choices=("opencv", "ffmpeg"))
+    parser.add_argument("--modo", default="highlight", help="Modo das legendas ASS")
+    parser.add_argument("--cut-batch", action="store_true")
+    parser.add_argument("--cut-stream-copy", action="store_true")
+    parser.add_argument("--face-image", help="Imagem de rosto para o vídeo sintético (padrão: rosto desenhado)")
+    parser.add_argument("--keep", action="store_true", help="Mantém o diretório de trabalho")
+    parser.add_argument("--output", help="Grava o resultado JSON neste arquivo (ex: para comparar execuções)")
+    parser.add_argument("--child", help=argparse.SUPPRESS)
+    parser.add_argument("--options", help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.child:
+        stage_child(args.child, json.loads(args.options))
+        sys.exit(0)
+
+    report = run(args.duration, args.segments, args.segment_seconds, [s.strip() for s in args.stages.split(",") if s.strip()],
+                 args.workers, args.num_faces, args.backend, args.modo, args.cut_batch, args.cut_stream_copy, args.face_image, args.keep)
+    output = json.dumps(report, indent=2)
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            f.write(output)
+    print(output)
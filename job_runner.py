@@ -0,0 +1,287 @@
+import argparse
+import json
+import multiprocessing
+import os
+import sys
+import time
+import traceback
+import types
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlparse
+
+from scripts.job_queue import JobQueue, QUEUE_FILE, RUNNING, WAITING_SEGMENTS, DONE, FAILED, QUEUED, load_batch, validate
+
+# Executor de jobs sem interação: uma fila SQLite (jobs/queue.db) alimentada por um arquivo de lote,
+# pelo CLI ou pela API HTTP local, e N processos worker que mantêm os modelos carregados entre os jobs.
+# Cada job roda no seu próprio workspace (jobs/<id>/) com as variáveis do main.py, sobrescritas por "settings".
+JOBS_DIR = "jobs"
+POLL_SECONDS = 2.0
+
+def config_names(pipeline):
+    # Variáveis de configuração do main.py que um job pode sobrescrever
+    return {name for name, value in vars(pipeline).items()
+            if not name.startswith("_") and name != "i18n"
+            and not isinstance(value, (types.ModuleType, types.FunctionType, type))}
+
+def job_outputs(workspace, aspects):
+    outputs = {}
+    for aspect in aspects:
+        for folder in (workspace.final_dir(aspect), workspace.burned_dir(aspect)):
+            if os.path.isdir(folder):
+                files = sorted(os.path.join(folder, f) for f in os.listdir(folder) if f.endswith(".mp4"))
+                if files:
+                    outputs[folder] = files
+    return outputs
+
+def run_job(pipeline, job, jobs_dir=JOBS_DIR):
+    # Roda um job no processo atual; retorna (estado, resultado)
+    from scripts import telemetry
+    from scripts.workspace import Workspace
+
+    params = job["params"]
+    settings = params.get("settings") or {}
+    unknown = sorted(set(settings) - config_names(pipeline))
+    if unknown:
+        raise ValueError(f"Configurações desconhecidas em settings: {', '.join(unknown)}")
+    if settings.get("burn_only"):
+        raise ValueError("burn_only não é suportado em jobs (use o main.py).")
+
+    # O processo roda um job por vez: aplica as configurações do job e restaura ao final
+    previous = {name: getattr(pipeline, name) for name in settings}
+    for name, value in settings.items():
+        setattr(pipeline, name, value)
+    try:
+        workspace = Workspace.for_job(job["id"], base_dir=jobs_dir).create()
+        trace = telemetry.Trace(job_id=job["id"], enabled=pipeline.telemetry_enabled, output_dir=workspace.traces,
+                                profile_stage=pipeline.profile_stage, profiler=pipeline.profiler)
+        status = pipeline.run_pipeline(params["source"], params["num_segments"], params["viral_mode"], params["themes"],
+                                       workspace, trace, segments_data=params.get("segments"), interactive=False)
+        result = {"workspace": workspace.root, "trace": trace.path() if pipeline.telemetry_enabled else None}
+        if status == WAITING_SEGMENTS:
+            result["prompt_file"] = workspace.prompt_file
+        else:
+            result["outputs"] = job_outputs(workspace, pipeline.output_aspects)
+        return status, result
+    finally:
+        for name, value in previous.items():
+            setattr(pipeline, name, value)
+
+def worker_loop(index, queue_path, jobs_dir, poll_seconds, warm, stop_event):
+    """
+    Processo worker: carrega o main.py (e, com warm, o WhisperX e o MediaPipe) uma vez e
+    processa os jobs da fila até o daemon pedir para parar.
+    """
+    import main as pipeline
+
+    queue = JobQueue(queue_path)
+    worker = f"worker-{index}:{os.getpid()}"
+    pipeline.keep_models_loaded = True
+    try:
+        if warm:
+            from scripts import edit_video, transcribe_video
+            print(f"[{worker}] Carregando modelos ({pipeline.model})...")
+            transcribe_video.warm_up(pipeline.model)
+            edit_video.load_models()
+        print(f"[{worker}] Pronto.")
+
+        while not stop_event.is_set():
+            job = queue.claim(worker)
+            if job is None:
+                stop_event.wait(poll_seconds)
+                continue
+
+            print(f"[{worker}] Iniciando job {job['id']} ({job['params']['source']})")
+            start = time.time()
+            try:
+                status, result = run_job(pipeline, job, jobs_dir)
+                queue.finish(job["id"], status, result=result)
+                print(f"[{worker}] Job {job['id']}: {status} em {time.time() - start:.1f}s")
+            except KeyboardInterrupt:
+                # Daemon interrompido no meio do job: volta para a fila e é retomado na próxima execução
+                queue.finish(job["id"], QUEUED, error="Interrompido")
+                raise
+            except BaseException as e:
+                queue.finish(job["id"], FAILED, error=f"{type(e).__name__}: {e}\n{traceback.format_exc()}")
+                print(f"[{worker}] Job {job['id']} falhou: {type(e).__name__}: {e}")
+    except KeyboardInterrupt:
+        pass
+
+class ApiHandler(BaseHTTPRequestHandler):
+    """
+    API HTTP local:
+      GET  /status                  contagem de jobs por estado e workers ativos
+      GET  /jobs[?status=...]       lista os jobs
+      GET  /jobs/<id>               estado de um job (com o prompt para a IA se estiver aguardando segmentos)
+      POST /jobs                    envia um job ou uma lista de jobs (JSON)
+      POST /jobs/<id>/segments      envia o JSON dos segmentos de um job que está aguardando
+      POST /jobs/<id>/retry         recoloca na fila um job que falhou
+    """
+
+    queue = None
+    workers = []
+
+    def _send(self, code, payload):
+        body = json.dumps(payload, ensure_ascii=False, indent=2).encode("utf-8")
+        self.send_response(code)
+        self.send_header("Content-Type", "application/json; charset=utf-8")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def _read_json(self):
+        length = int(self.headers.get("Content-Length") or 0)
+        return json.loads(self.rfile.read(length).decode("utf-8") or "null")
+
+    def _job_view(self, job):
+        if job["status"] == WAITING_SEGMENTS and job["result"] and os.path.exists(job["result"].get("prompt_file", "")):
+            with open(job["result"]["prompt_file"], "r", encoding="utf-8") as f:
+                job = {**job, "prompt": f.read()}
+        return job
+
+    def do_GET(self):
+        url = urlparse(self.path)
+        parts = [part for part in url.path.split("/") if part]
+        if parts == ["status"]:
+            return self._send(200, {"jobs": self.queue.counts(), "workers": sum(1 for w in self.workers if w.is_alive())})
+        if parts == ["jobs"]:
+            status = parse_qs(url.query).get("status", [None])[0]
+            return self._send(200, self.queue.list(status=status))
+        if len(parts) == 2 and parts[0] == "jobs":
+            job = self.queue.get(parts[1])
+            if job is None:
+                return self._send(404, {"error": f"Job {parts[1]} não encontrado."})
+            return self._send(200, self._job_view(job))
+        return self._send(404, {"error": "Rota não encontrada."})
+
+    def do_POST(self):
+        parts = [part for part in urlparse(self.path).path.split("/") if part]
+        try:
+            body = self._read_json()
+            if parts == ["jobs"]:
+                jobs = body if isinstance(body, list) else [body]
+                for params in jobs:
+                    validate(params)  # Valida o lote inteiro antes de colocar qualquer job na fila
+                return self._send(201, {"ids": [self.queue.submit(params) for params in jobs]})
+            if len(parts) == 3 and parts[0] == "jobs" and parts[2] == "segments":
+                self.queue.provide_segments(parts[1], body)
+                return self._send(200, {"id": parts[1], "status": QUEUED})
+            if len(parts) == 3 and parts[0] == "jobs" and parts[2] == "retry":
+                if not self.queue.retry(parts[1]):
+                    return self._send(409, {"error": f"O job {parts[1]} não existe ou não falhou."})
+                return self._send(200, {"id": parts[1], "status": QUEUED})
+        except KeyError as e:
+            return self._send(404, {"error": f"Job {e.args[0]} não encontrado."})
+        except ValueError as e:  # Inclui JSON inválido (json.JSONDecodeError)
+            return self._send(400, {"error": str(e)})
+        return self._send(404, {"error": "Rota não encontrada."})
+
+def serve(queue_path=QUEUE_FILE, jobs_dir=JOBS_DIR, workers=1, host="127.0.0.1", port=8765, poll_seconds=POLL_SECONDS, warm=True):
+    queue = JobQueue(queue_path)
+    stale = queue.requeue_stale()
+    if stale:
+        print(f"{stale} job(s) interrompidos voltaram para a fila.")
+
+    # spawn: cada worker começa limpo (CUDA e MediaPipe não sobrevivem bem a um fork)
+    context = multiprocessing.get_context("spawn")
+    stop_event = context.Event()
+    # Workers não são daemon: o reenquadramento pode abrir o próprio ProcessPoolExecutor
+    processes = [context.Process(target=worker_loop, args=(index, queue_path, jobs_dir, poll_seconds, warm, stop_event), name=f"worker-{index}")
+                 for index in range(workers)]
+    for process in processes:
+        process.start()
+
+    ApiHandler.queue = queue
+    ApiHandler.workers = processes
+    server = ThreadingHTTPServer((host, port), ApiHandler) if port else None
+    print(f"{workers} worker(s) ativos. Fila: {queue_path}" + (f". API em http://{host}:{port}" if server else ""))
+    try:
+        if server:
+            server.serve_forever()
+        else:
+            while any(process.is_alive() for process in processes):
+                time.sleep(poll_seconds)
+    except KeyboardInterrupt:
+        print("Parando os workers (jobs em andamento voltam para a fila)...")
+    finally:
+        stop_event.set()
+        if server:
+            server.server_close()
+        for process in processes:
+            process.join()
+
+def print_job(job):
+    line = f"{job['id']}  {job['status']:<21} {job['params']['source']}"
+    if job["error"]:
+        line += f"\n    {job['error'].splitlines()[0]}"
+    if job["result"] and job["result"].get("prompt_file") and job["status"] == WAITING_SEGMENTS:
+        line += f"\n    prompt: {job['result']['prompt_file']}"
+    print(line)
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Fila de jobs do ViralCutter: workers sem interação e API HTTP local.")
+    parser.add_argument("--queue", default=QUEUE_FILE, help="Arquivo SQLite da fila")
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    serve_parser = commands.add_parser("serve", help="Inicia os workers e a API HTTP")
+    serve_parser.add_argument("--workers", type=int, default=1, help="Processos worker (cada um mantém seus modelos carregados)")
+    serve_parser.add_argument("--jobs-dir", default=JOBS_DIR, help="Pasta dos workspaces dos jobs")
+    serve_parser.add_argument("--host", default="127.0.0.1")
+    serve_parser.add_argument("--port", type=int, default=8765, help="Porta da API (0 = sem API, só os workers)")
+    serve_parser.add_argument("--poll", type=float, default=POLL_SECONDS, help="Intervalo de consulta da fila (segundos)")
+    serve_parser.add_argument("--no-warm", action="store_true", help="Não carrega os modelos antes do primeiro job")
+
+    submit_parser = commands.add_parser("submit", help="Coloca um vídeo na fila")
+    submit_parser.add_argument("source", help="URL ou caminho de um arquivo local")
+    submit_parser.add_argument("--segments", type=int, default=3, help="Número de segmentos virais")
+    submit_parser.add_argument("--themes", default="", help="Temas (separados por vírgula); desliga o modo viral")
+    submit_parser.add_argument("--segments-file", help="JSON dos segmentos já escolhidos ({\"segments\": [...]})")
+    submit_parser.add_argument("--settings", help="JSON com variáveis do main.py a sobrescrever (ex: '{\"num_faces\": 1}')")
+
+    batch_parser = commands.add_parser("batch", help="Coloca na fila os jobs de um arquivo (lista JSON ou um JSON por linha)")
+    batch_parser.add_argument("file")
+
+    status_parser = commands.add_parser("status", help="Mostra os jobs")
+    status_parser.add_argument("job_id", nargs="?")
+    status_parser.add_argument("--filter", choices=(QUEUED, RUNNING, WAITING_SEGMENTS, DONE, FAILED), help="Só jobs neste estado")
+
+    segments_parser = commands.add_parser("segments", help="Envia o JSON dos segmentos de um job que está aguardando")
+    segments_parser.add_argument("job_id")
+    segments_parser.add_argument("file", help="Arquivo com o JSON retornado pela IA")
+
+    args = parser.parse_args()
+
+    if args.command == "serve":
+        serve(args.queue, args.jobs_dir, args.workers, args.host, args.port, args.poll, warm=not args.no_warm)
+        sys.exit(0)
+
+    queue = JobQueue(args.queue)
+    try:
+        if args.command == "submit":
+            params = {"source": args.source, "num_segments": args.segments, "viral_mode": not args.themes, "themes": args.themes}
+            if args.segments_file:
+                with open(args.segments_file, "r", encoding="utf-8") as f:
+                    params["segments"] = json.load(f)
+            if args.settings:
+                params["settings"] = json.loads(args.settings)
+            print(queue.submit(params))
+        elif args.command == "batch":
+            jobs = load_batch(args.file)
+            for params in jobs:
+                validate(params)
+            for params in jobs:
+                print(queue.submit(params))
+        elif args.command == "segments":
+            with open(args.file, "r", encoding="utf-8") as f:
+                queue.provide_segments(args.job_id, json.load(f))
+            print(f"Job {args.job_id} de volta na fila.")
+        elif args.job_id:
+            job = queue.get(args.job_id)
+            if job is None:
+                sys.exit(f"Job {args.job_id} não encontrado.")
+            print(json.dumps(job, ensure_ascii=False, indent=2))
+        else:
+            for job in reversed(queue.list(status=args.filter)):
+                print_job(job)
+            print(", ".join(f"{status}: {count}" for status, count in queue.counts().items()))
+    except (KeyError, ValueError) as e:
+        sys.exit(f"Erro: {e}")
@@ -1,14 +1,13 @@
 import os
-from scripts import download_video, transcribe_video, create_viral_segments, cut_segments, edit_video, transcribe_cuts, adjust_subtitles, burn_subtitles, save_json
+import json
+import glob
+from scripts import download_video, transcribe_video, create_viral_segments, cut_segments, edit_video, transcribe_cuts, adjust_subtitles, burn_subtitles, save_json, pipeline_scheduler, telemetry
+from scripts.workspace import Workspace
 from i18n.i18n import I18nAuto
 i18n = I18nAuto()
 
-# Create necessary directories
-os.makedirs('tmp', exist_ok=True)
-os.makedirs('final', exist_ok=True)
-os.makedirs('subs', exist_ok=True)
-os.makedirs('subs_ass', exist_ok=True)
-os.makedirs('burned_sub', exist_ok=True)
+# Workspace variables
+workspace_root = "." # "." = pastas de sempre (tmp/, final/, subs/...); ex: "jobs/meu_video" para rodar vários jobs lado a lado
 
 # Cores originais invertidas
 vermelho = "0A08E4"
@@ -37,7 +36,7 @@ contorno = f"&H{contorno_t}" + "808080" + "&" #808080
 h_size = 14 #14 (Default)
 palavras_por_bloco = 3 #5 (Default)
 limite_gap = 0.5 #0.5 (Default)
-modo = 'highlight' #sem_higlight, palavra_por_palavra, highlight
+modo = 'highlight' #sem_higlight, palavra_por_palavra, highlight, highlight_compacto (highlight com um evento por bloco), karaoke (tags \kf)
 highlight_color_t = "00" # 00= totalmente opaco, 80=  50% transparente, FF= Totalmente transparente
 highlight_color = f"&H{highlight_color_t}" + "0FF00" + "&" #0FF00
 posicao_vertical = 60 # Divide de 1 à 5 contando um no topo. 1=170, 2=130, 3=99, 4=60 (default), 5=20
@@ -52,52 +51,166 @@ estilo_da_borda = 3 #(1 para contorno, 3 para caixa).
 espessura_do_contorno = 1.5 #1.5 (Default)
 tamanho_da_sombra = 10 #10 (Default)
 
+# Pipeline mode
+pipeline_mode = "sequencial" # "sequencial" = um estágio por vez; "por_segmento" = cada corte segue cut/reframe/legenda/burn de forma independente
+stage_concurrency = {"cut": 2, "reframe": 4, "subtitle": 2, "burn": 2} # Limite de tarefas simultâneas por estágio (modo por_segmento)
+
 # Burn subtitles option
 burn_only = False
 burn_subtitles_option = True
+fused_burn = False # True = a legenda é queimada no mesmo encode do reenquadramento (requer subtitles_from_source)
+burn_workers = 1 # Vídeos queimados em paralelo (> 1 divide os núcleos entre os ffmpeg com -threads/-filter_threads)
+burn_cpu_budget = None # Núcleos reservados para o burn (None = todos)
 
 # Transcript variables
 model = 'large-v3'
+transcribe_workers = 0 # > 0 = em CPU, divide o áudio nos silêncios e transcreve os pedaços em paralelo (int8)
+transcribe_compare = False # True = com transcribe_workers, transcreve também em um processo só e mostra o ganho do modo paralelo
+use_cache = True # True = reaproveita downloads e transcrições já feitas (pasta cache/, limite em VIRALCUTTER_CACHE_MAX_GB)
+download_mode = "completo" # "completo" = baixa o vídeo inteiro; "audio_primeiro" = baixa só o áudio e depois apenas os trechos escolhidos
+max_video_height = 1080 # Resolução máxima dos trechos baixados no modo audio_primeiro
+subtitles_from_source = True # True = legendas dos cortes recortadas da transcrição original (sem rodar o WhisperX de novo)
+
+# Cut variables
+cut_batch_mode = False # True = decodifica o vídeo uma única vez e gera todos os cortes no mesmo ffmpeg
+cut_stream_copy = False # True = cortes que começam perto de um keyframe são copiados sem reencode
+
+# Edit variables
+edit_workers = 1 # Número de processos para reenquadrar os segmentos em paralelo (1 = sequencial)
+num_faces = 2 # 1 ou 2 rostos no enquadramento
+edit_video_codec = None # None = melhor encoder que funciona neste host (NVENC/QSV/VAAPI, senão libx264). Ex: "libx264", "h264_nvenc"
+encode_profile = "standard" # "draft" (rápido), "standard" ou "archive" (máxima qualidade) para o reenquadramento e o burn
+detection_seconds = 5 # Intervalo entre detecções de rosto (em segundos). Valores menores seguem melhor o movimento
+smoothing_seconds = 1.0 # Suavidade da câmera virtual (em segundos). 0 = sem suavização
+edit_backend = "opencv" # "opencv" (frames em Python) ou "ffmpeg" (crop/scale/vstack direto nos filtros do ffmpeg)
+source_analysis = False # True = detecta os rostos uma vez no vídeo original (união dos trechos) em vez de em cada corte
+output_aspects = ["9x16"] # Formatos gerados na mesma passada: "9x16" (final/), "1x1" (final_1x1/), "4x5" (final_4x5/)
+
+# Telemetry variables
+telemetry_enabled = True # True = grava um trace JSON por job em tmp/traces/ do workspace (tempo, CPU, frames, bytes e subprocessos por estágio)
+profile_stage = None # Nome de um estágio para perfilar (ex: "reframe", "transcribe"). None = sem profiler
+profiler = "cprofile" # "cprofile" (.prof) ou "py-spy" (flamegraph .svg, requer py-spy instalado)
+
+# Job runner variables
+keep_models_loaded = False # True = mantém os modelos do MediaPipe carregados entre os jobs (ligado pelos workers do job_runner.py)
 
-if burn_only:
-    print(i18n("Burn only mode activated. Skipping to subtitle burning..."))
-    burn_subtitles.burn()
-    print(i18n("Subtitle burning completed."))
-else:
-    # Input variables
-    url = input(i18n("Enter the YouTube video URL: "))
-    
-    while True:
-        try:
-            num_segments = int(input(i18n("Enter the number of viral segments to create: ")))
-            if num_segments < 1:
-                print(i18n("\nError: Number of segments must be numeric and greater than 0."))
-            else:
-                break
-        except ValueError:
-            print(i18n("\nError: The value you entered is not an integer. Please try again."))
-        
-    viral_mode = input(i18n("Do you want viral mode? (yes/no): ")).lower() == 'yes' or 'y'
-    themes = input(i18n("Enter themes (comma-separated, leave blank if viral mode is True): ")) if not viral_mode else ''
-    
+def burned_frames(results):
+    return telemetry.video_frames(status["output"] for status in results if status["ok"])
+
+def burn_all(workspace, trace):
+    with trace.stage("burn") as stage:
+        for aspect in output_aspects:
+            stage.add_frames(burned_frames(burn_subtitles.burn(profile=encode_profile, workers=burn_workers, cpu_budget=burn_cpu_budget, aspect=aspect, workspace=workspace)))
+
+def run_pipeline(url, num_segments, viral_mode, themes, workspace, trace, segments_data=None, interactive=True):
+    """
+    Executa o pipeline de um vídeo (URL ou arquivo local) com as variáveis deste arquivo.
+    segments_data: JSON de segmentos ({"segments": [...]}) já escolhidos. Sem ele, no modo interativo
+    o JSON é pedido no terminal; fora dele o prompt para a IA é gravado em workspace.prompt_file e a
+    função retorna "aguardando_segmentos" (o job continua quando os segmentos forem enviados).
+    Retorna "concluido" ao final.
+    """
     tempo_minimo = 15 #int(input("Enter the minimum duration for segments (in seconds): "))
     tempo_maximo = 90 #int(input("Enter the maximum duration for segments (in seconds): "))
 
     # Execute the pipeline
-    input_video = download_video.download(url)
-    srt_file, tsv_file = transcribe_video.transcribe(input_video, model)
+    audio_first = download_mode == "audio_primeiro"
+    with trace.stage("download"):
+        if audio_first:
+            input_video = download_video.download_audio(url, use_cache=use_cache, workspace=workspace)
+        else:
+            input_video = download_video.download(url, use_cache=use_cache, workspace=workspace, interactive=interactive)
+    with trace.stage("transcribe"):
+        srt_file, tsv_file = transcribe_video.transcribe(input_video, model, use_cache=use_cache, parallel_workers=transcribe_workers, workspace=workspace, compare=transcribe_compare)
 
-    viral_segments = create_viral_segments.create(num_segments, viral_mode, themes, tempo_minimo, tempo_maximo)
-    save_json.save_viral_segments(viral_segments)
+    with trace.stage("segments"):
+        if segments_data is None and not interactive and not os.path.exists(workspace.segments_file):
+            prompts = create_viral_segments.build_prompts(num_segments, viral_mode, themes, tempo_minimo, tempo_maximo, workspace=workspace)
+            with open(workspace.prompt_file, 'w', encoding='utf-8') as file:
+                file.write("\n\n----------\n\n".join(prompts))
+            print(f"Prompt para a IA gravado em {workspace.prompt_file}. Aguardando o JSON dos segmentos.")
+            return "aguardando_segmentos"
+        if segments_data is None:
+            create_viral_segments.create(num_segments, viral_mode, themes, tempo_minimo, tempo_maximo, workspace=workspace)
+        save_json.save_viral_segments(segments_data, workspace=workspace)
+        viral_segments = segments_data
 
-    cut_segments.cut(viral_segments)
-    edit_video.edit()
+    subtitle_style = (base_color, base_size, h_size, highlight_color, palavras_por_bloco, limite_gap, modo, posicao_vertical, alinhamento, fonte, contorno, cor_da_sombra, negrito, italico, sublinhado, tachado, estilo_da_borda, espessura_do_contorno, tamanho_da_sombra)
 
-    if burn_subtitles_option:
-        transcribe_cuts.transcribe()
-        adjust_subtitles.adjust(base_color, base_size, h_size, highlight_color, palavras_por_bloco, limite_gap, modo, posicao_vertical, alinhamento, fonte, contorno, cor_da_sombra, negrito, italico, sublinhado, tachado, estilo_da_borda, espessura_do_contorno, tamanho_da_sombra)
-        burn_subtitles.burn()
+    if pipeline_mode == "por_segmento":
+        # Corte em lote e análise da fonte precisam de todos os segmentos de uma vez, e o stream copy só existe no
+        # cut() do modo sequencial; o agendador corta e reenquadra um segmento por vez, então essas opções não têm efeito aqui
+        ignored = [name for name, value in (("cut_batch_mode", cut_batch_mode), ("cut_stream_copy", cut_stream_copy), ("source_analysis", source_analysis)) if value]
+        if ignored:
+            print(f"Aviso: {', '.join(ignored)} não tem efeito com pipeline_mode = \"por_segmento\" (use \"sequencial\").")
+        with open(workspace.segments_file, 'r', encoding='utf-8') as file:
+            segments = json.load(file).get("segments", [])
+        edit_options = {"num_faces": num_faces, "video_codec": edit_video_codec, "detection_seconds": detection_seconds, "smoothing_seconds": smoothing_seconds, "backend": edit_backend, "profile": encode_profile, "aspects": tuple(output_aspects)}
+        with trace.stage("pipeline") as stage:
+            # Estágios intercalados por segmento: o tempo de cada um fica no status devolvido pelo agendador
+            status = pipeline_scheduler.run(segments, edit_options, subtitle_style if burn_subtitles_option else None, stage_concurrency, fused_burn=fused_burn, source_url=url if audio_first else None, max_height=max_video_height, workspace=workspace)
+            stage.note(segments={str(index): segment_status for index, segment_status in status.items()})
+        if not burn_subtitles_option:
+            print(i18n("Subtitle burning skipped."))
     else:
-        print(i18n("Subtitle burning skipped."))
+        fuse = burn_subtitles_option and fused_burn and subtitles_from_source
+        if fuse:
+            # Legendas geradas antes do reenquadramento para serem queimadas no mesmo encode
+            with trace.stage("subtitles"):
+                transcribe_cuts.transcribe(from_source=True, workspace=workspace)
+                adjust_subtitles.adjust(*subtitle_style, workspace=workspace)
+
+        with trace.stage("cut") as stage:
+            range_files = None
+            if audio_first:
+                # Fase 2: só os trechos escolhidos, já na resolução máxima configurada
+                with open(workspace.segments_file, 'r', encoding='utf-8') as file:
+                    range_files = download_video.download_ranges(url, json.load(file).get("segments", []), max_height=max_video_height, workspace=workspace)
+            cut_segments.cut(viral_segments, batch=cut_batch_mode, stream_copy=cut_stream_copy, range_files=range_files, workspace=workspace)
+            stage.add_frames(telemetry.video_frames(sorted(glob.glob(os.path.join(workspace.tmp, "output*_original_scale.mp4")))))
+        with trace.stage("reframe") as stage:
+            results = edit_video.edit(workers=edit_workers, num_faces=num_faces, video_codec=edit_video_codec, source_analysis=source_analysis and not audio_first, detection_seconds=detection_seconds, smoothing_seconds=smoothing_seconds, backend=edit_backend, subtitles_dir=workspace.subs_ass if fuse else None, profile=encode_profile, aspects=output_aspects, workspace=workspace, keep_models=keep_models_loaded)
+            stage.add_frames(telemetry.video_frames(results))
+
+        if burn_subtitles_option and not fuse:
+            with trace.stage("subtitles"):
+                transcribe_cuts.transcribe(from_source=subtitles_from_source, workspace=workspace)
+                adjust_subtitles.adjust(*subtitle_style, workspace=workspace)
+            burn_all(workspace, trace)
+        elif not burn_subtitles_option:
+            print(i18n("Subtitle burning skipped."))
+
+    return "concluido"
+
+if __name__ == "__main__":
+    # Create necessary directories
+    workspace = Workspace(workspace_root).create()
+    trace = telemetry.Trace(enabled=telemetry_enabled, output_dir=workspace.traces, profile_stage=profile_stage, profiler=profiler)
+
+    if burn_only:
+        print(i18n("Burn only mode activated. Skipping to subtitle burning..."))
+        burn_all(workspace, trace)
+        print(i18n("Subtitle burning completed."))
+    else:
+        # Input variables
+        url = input(i18n("Enter the YouTube video URL: "))
+
+        while True:
+            try:
+                num_segments = int(input(i18n("Enter the number of viral segments to create: ")))
+                if num_segments < 1:
+                    print(i18n("\nError: Number of segments must be numeric and greater than 0."))
+                else:
+                    break
+            except ValueError:
+                print(i18n("\nError: The value you entered is not an integer. Please try again."))
+
+        viral_mode = input(i18n("Do you want viral mode? (yes/no): ")).lower() == 'yes' or 'y'
+        themes = input(i18n("Enter themes (comma-separated, leave blank if viral mode is True): ")) if not viral_mode else ''
+
+        run_pipeline(url, num_segments, viral_mode, themes, workspace, trace)
+
+        print(i18n("Process completed successfully!"))
 
-    print(i18n("Process completed successfully!"))
\ No newline at end of file
+    if telemetry_enabled:
+        print(trace.summary())
\ No newline at end of file
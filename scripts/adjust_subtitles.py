@@ -1,8 +1,9 @@
 import json
 import re
 import os
+from scripts.workspace import resolve
 
-def adjust(base_color, base_size, h_size, highlight_color, palavras_por_bloco, limite_gap, modo, posicao_vertical, alinhamento, fonte, contorno, cor_da_sombra,negrito,italico, sublinhado, tachado, estilo_da_borda,espessura_do_contorno, tamanho_da_sombra):
+def adjust(base_color, base_size, h_size, highlight_color, palavras_por_bloco, limite_gap, modo, posicao_vertical, alinhamento, fonte, contorno, cor_da_sombra,negrito,italico, sublinhado, tachado, estilo_da_borda,espessura_do_contorno, tamanho_da_sombra, files=None, workspace=None):
     def gerar_ass(json_data, arquivo_saida, base_color=base_color, base_size=base_size, h_size=h_size, highlight_color=highlight_color, palavras_por_bloco=palavras_por_bloco, limite_gap=limite_gap, modo=modo, posicao_vertical=posicao_vertical, alinhamento=alinhamento, fonte=fonte, contorno=contorno, cor_da_sombra=cor_da_sombra, negrito=negrito, italico=italico, sublinhado=sublinhado, tachado=tachado, estilo_da_borda=estilo_da_borda, espessura_do_contorno=espessura_do_contorno, tamanho_da_sombra=tamanho_da_sombra):
         header_ass = f"""[Script Info]
     Title: Legendas Dinâmicas
@@ -69,6 +70,9 @@ def adjust(base_color, base_size, h_size, highlight_color, palavras_por_bloco, l
                                     i += 1
                         i += 1
 
+                    if not block:
+                        continue
+
                     start_times = [word.get('start', 0) for word in block]
                     end_times = [word.get('end', 0) for word in block]
 
@@ -90,6 +94,38 @@ def adjust(base_color, base_size, h_size, highlight_color, palavras_por_bloco, l
 
                             f.write(f"Dialogue: 0,{start_time_ass},{end_time_ass},Default,,0,0,0,,{line.strip()}\n")
 
+                    elif modo == "highlight_compacto":
+                        # Mesmo visual do highlight, mas um único evento por bloco: cada palavra troca de
+                        # tamanho/cor com \t no seu intervalo, em vez de um Dialogue por palavra
+                        block_start = start_times[0]
+                        line = ""
+                        for j, word_data in enumerate(block):
+                            highlight_start = start_times[j]
+                            if j > 0 and (start_times[j] - end_times[j - 1] < limite_gap):
+                                highlight_start = end_times[j - 1]
+                            on = int((highlight_start - block_start) * 1000)
+                            off = int((end_times[j] - block_start) * 1000)
+                            line += (f"{{\\fs{base_size}\\c{base_color}"
+                                     f"\\t({on},{on + 1},\\fs{h_size}\\c{highlight_color})"
+                                     f"\\t({off},{off + 1},\\fs{base_size}\\c{base_color})}}{word_data['word']} ")
+
+                        f.write(f"Dialogue: 0,{format_time_ass(block_start)},{format_time_ass(end_times[-1])},Default,,0,0,0,,{line.strip()}\n")
+
+                    elif modo == "karaoke":
+                        # Um evento por bloco com tags \kf: a cor de destaque "preenche" cada palavra no seu tempo
+                        block_start = start_times[0]
+                        line = f"{{\\1c{highlight_color}\\2c{base_color}}}"
+                        cursor = block_start
+                        for j, word_data in enumerate(block):
+                            gap = int(round((start_times[j] - cursor) * 100))
+                            if gap > 0:
+                                line += f"{{\\k{gap}}}"
+                            duration = max(1, int(round((end_times[j] - max(start_times[j], cursor)) * 100)))
+                            line += f"{{\\kf{duration}}}{word_data['word']} "
+                            cursor = max(cursor, end_times[j])
+
+                        f.write(f"Dialogue: 0,{format_time_ass(block_start)},{format_time_ass(end_times[-1])},Default,,0,0,0,,{line.strip()}\n")
+
                     elif modo == "sem_higlight":
                         for j in range(len(block)):
                             line = " ".join(word_data['word'] for word_data in block)
@@ -117,14 +153,16 @@ def adjust(base_color, base_size, h_size, highlight_color, palavras_por_bloco, l
         return f"{hours:01}:{minutes:02}:{seconds:02}.{centiseconds:02}"
 
     # Diretórios de entrada e saída
-    input_dir = "subs"
-    output_dir = "subs_ass"
+    workspace = resolve(workspace)
+    input_dir = workspace.subs
+    output_dir = workspace.subs_ass
 
     # Criar o diretório de saída se não existir
     os.makedirs(output_dir, exist_ok=True)
 
     # Processar todos os arquivos JSON na pasta de entrada
-    for filename in os.listdir(input_dir):
+    # files: processa apenas esses JSON (usado pelo agendador por segmento)
+    for filename in (files if files is not None else os.listdir(input_dir)):
         if filename.endswith(".json"):
             input_path = os.path.join(input_dir, filename)
             output_filename = os.path.splitext(filename)[0] + ".ass"
@@ -0,0 +1,152 @@
+import hashlib
+import json
+import os
+import shutil
+import threading
+import time
+from contextlib import contextmanager
+
+try:
+    import fcntl  # Só existe em Unix; no Windows a trava vale apenas entre as threads do processo
+except ImportError:
+    fcntl = None
+
+# Cache compartilhado entre jobs: vídeos baixados e transcrições, endereçados por conteúdo/ID
+CACHE_DIR = os.environ.get("VIRALCUTTER_CACHE_DIR", "cache")
+CACHE_MAX_BYTES = int(float(os.environ.get("VIRALCUTTER_CACHE_MAX_GB", "50")) * 1024 ** 3)
+
+def make_key(*parts):
+    return hashlib.sha1(json.dumps(parts, sort_keys=True, default=str).encode("utf-8")).hexdigest()
+
+# flock vale por arquivo aberto; esta trava ordena também as threads do mesmo processo (e é a única no Windows)
+_thread_lock = threading.Lock()
+
+# Hashes já calculados neste processo, por (caminho, tamanho, mtime)
+_hash_memo = {}
+
+def content_hash(path, chunk_size=1 << 20):
+    stat = os.stat(path)
+    memo_key = (os.path.abspath(path), stat.st_size, stat.st_mtime)
+    if memo_key not in _hash_memo:
+        sha1 = hashlib.sha1()
+        with open(path, "rb") as f:
+            for chunk in iter(lambda: f.read(chunk_size), b""):
+                sha1.update(chunk)
+        _hash_memo[memo_key] = sha1.hexdigest()
+    return _hash_memo[memo_key]
+
+class ArtifactCache:
+    """
+    Cache em disco com despejo LRU limitado por tamanho. Cada entrada é uma pasta com os
+    arquivos de um artefato (ex: o vídeo baixado, ou os srt/tsv/json de uma transcrição).
+    """
+
+    def __init__(self, root=CACHE_DIR, max_bytes=CACHE_MAX_BYTES):
+        self.root = root
+        self.max_bytes = max_bytes
+        self.index_file = os.path.join(root, "index.json")
+        self.lock_file = os.path.join(root, "index.lock")
+        os.makedirs(root, exist_ok=True)
+
+    @contextmanager
+    def _locked(self):
+        # Vários processos (workers do job_runner) usam o mesmo cache: a trava cobre o ciclo inteiro
+        # ler índice -> alterar -> gravar, senão um put/despejo apaga as entradas gravadas pelo outro
+        with _thread_lock, open(self.lock_file, "a") as lock:
+            if fcntl is not None:
+                fcntl.flock(lock, fcntl.LOCK_EX)
+            try:
+                yield
+            finally:
+                if fcntl is not None:
+                    fcntl.flock(lock, fcntl.LOCK_UN)
+
+    def _load_index(self):
+        if not os.path.exists(self.index_file):
+            return {}
+        try:
+            with open(self.index_file, "r", encoding="utf-8") as f:
+                return json.load(f)
+        except (json.JSONDecodeError, OSError):
+            return {}
+
+    def _save_index(self, index):
+        tmp_file = self.index_file + f".{os.getpid()}.tmp"
+        with open(tmp_file, "w", encoding="utf-8") as f:
+            json.dump(index, f, indent=2)
+        os.replace(tmp_file, self.index_file)
+
+    def get(self, key, destinations):
+        """
+        Restaura os arquivos da entrada `key` para os caminhos de destino ({nome: caminho}).
+        Nomes que a entrada não guardou são ignorados. Retorna False (sem tocar nos destinos)
+        se a entrada não existir ou estiver incompleta.
+        """
+        # A cópia acontece com a trava: outro processo não despeja a entrada no meio da restauração
+        with self._locked():
+            index = self._load_index()
+            entry = index.get(key)
+            entry_dir = os.path.join(self.root, key)
+            if entry is None:
+                return False
+            stored = {name: destination for name, destination in destinations.items() if name in entry.get("files", [])}
+            if not stored or not all(os.path.exists(os.path.join(entry_dir, name)) for name in stored):
+                return False
+
+            for name, destination in stored.items():
+                os.makedirs(os.path.dirname(destination) or ".", exist_ok=True)
+                if os.path.exists(destination):
+                    os.remove(destination)
+                # Cópia, nunca hardlink: os estágios seguintes reescrevem esses caminhos (whisperx, ffmpeg -y)
+                # e, com o mesmo inode, o arquivo dentro do cache seria truncado junto
+                shutil.copy2(os.path.join(entry_dir, name), destination)
+
+            entry["last_used"] = time.time()
+            self._save_index(index)
+            return True
+
+    def metadata(self, key):
+        # Metadados guardados com a entrada (None se ela não existir)
+        entry = self._load_index().get(key)
+        return entry.get("metadata", {}) if entry is not None else None
+
+    def put(self, key, sources, metadata=None):
+        # Guarda os arquivos ({nome: caminho}) sob `key` e aplica o limite de tamanho.
+        # Tudo com a trava: um despejo de outro processo não remove a pasta no meio da cópia
+        with self._locked():
+            entry_dir = os.path.join(self.root, key)
+            os.makedirs(entry_dir, exist_ok=True)
+            size = 0
+            files = []
+            for name, source in sources.items():
+                if not os.path.exists(source):
+                    continue
+                destination = os.path.join(entry_dir, name)
+                shutil.copy2(source, destination)
+                size += os.path.getsize(destination)
+                files.append(name)
+
+            index = self._load_index()
+            index[key] = {"files": sorted(files), "size": size, "last_used": time.time(), "metadata": metadata or {}}
+            self._evict(index, keep=key)
+            self._save_index(index)
+
+    def evict(self, keep=None):
+        # Remove as entradas usadas há mais tempo até o cache caber em max_bytes
+        with self._locked():
+            index = self._load_index()
+            self._evict(index, keep=keep)
+            self._save_index(index)
+
+    def _evict(self, index, keep=None):
+        # Chamado com a trava: despeja do índice já carregado, quem chamou grava o resultado
+        total = sum(entry.get("size", 0) for entry in index.values())
+        for key, entry in sorted(index.items(), key=lambda item: item[1].get("last_used", 0)):
+            if total <= self.max_bytes:
+                break
+            if key == keep:
+                continue
+            shutil.rmtree(os.path.join(self.root, key), ignore_errors=True)
+            total -= entry.get("size", 0)
+            del index[key]
+            print(f"Cache: entrada removida ({entry.get('size', 0)} bytes): {key}")
@@ -0,0 +1,8 @@
+# Formatos de saída (largura x altura). 9x16 é o formato principal e usa as pastas originais;
+# os demais são gravados em pastas com sufixo (ex: final_1x1/). Sem dependências, para que os
+# estágios que só precisam dos caminhos (download, transcrição, legendas, burn) não importem cv2/numpy.
+ASPECT_TARGETS = {"9x16": (1080, 1920), "1x1": (1080, 1080), "4x5": (1080, 1350)}
+PRIMARY_ASPECT = "9x16"
+
+def aspect_dir(base_dir, aspect=PRIMARY_ASPECT):
+    return base_dir if aspect == PRIMARY_ASPECT else f"{base_dir}_{aspect}"
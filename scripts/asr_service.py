@@ -0,0 +1,104 @@
+import os
+import threading
+import torch
+import whisperx
+from whisperx.utils import get_writer
+
+ALIGN_MODEL = "WAV2VEC2_ASR_LARGE_LV60K_960H"
+
+# Opções do caminho de processo único (vídeo inteiro, cortes e a comparação do modo paralelo).
+# Também fazem parte da chave do cache de transcrições
+TRANSCRIBE_OPTIONS = {"compute_type": "float32", "batch_size": 10, "chunk_size": 10, "vad_onset": 0.4, "vad_offset": 0.3}
+
+# Mesmas opções de escrita que o CLI do whisperx usa por padrão
+WRITER_OPTIONS = {"highlight_words": False, "max_line_count": None, "max_line_width": None}
+
+def write_outputs(result, audio_path, output_dir, output_formats=("all",)):
+    # Gera os mesmos arquivos (srt/tsv/json/...) que o CLI do whisperx gravaria
+    os.makedirs(output_dir, exist_ok=True)
+    for output_format in output_formats:
+        writer = get_writer(output_format, output_dir)
+        writer(result, audio_path, dict(WRITER_OPTIONS))
+
+class ASRService:
+    """
+    Mantém o modelo do WhisperX (e os modelos de alinhamento) carregados no processo,
+    para transcrever vários arquivos ou arrays de áudio sem recarregar os pesos a cada vez.
+    """
+
+    def __init__(self, model='large-v3', device=None, compute_type=None, batch_size=10, chunk_size=10,
+                 vad_onset=0.4, vad_offset=0.3, align_model=ALIGN_MODEL, language=None, threads=0):
+        self.device = device or ("cuda" if torch.cuda.is_available() else "cpu")
+        self.compute_type = compute_type or ("float16" if self.device == "cuda" else "float32")
+        self.batch_size = batch_size
+        self.chunk_size = chunk_size
+        self.align_model_name = align_model
+        self._align_models = {}
+        self._align_lock = threading.Lock()
+        # O pipeline do WhisperX troca self.tokenizer e o idioma a cada chamada: uma transcrição por vez
+        self._model_lock = threading.Lock()
+
+        print(f"Carregando o modelo {model} ({self.device}, {self.compute_type})...")
+        load_options = {"compute_type": self.compute_type, "language": language, "vad_options": {"vad_onset": vad_onset, "vad_offset": vad_offset}}
+        if threads:
+            load_options["threads"] = threads
+        self.model = whisperx.load_model(model, self.device, **load_options)
+
+    def _align_model(self, language):
+        # Um modelo de alinhamento por idioma, carregado na primeira vez que é usado
+        with self._align_lock:
+            if language not in self._align_models:
+                self._align_models[language] = whisperx.load_align_model(language_code=language, device=self.device, model_name=self.align_model_name)
+            return self._align_models[language]
+
+    def detect_language(self, audio):
+        # Idioma dos primeiros 30s do áudio (uma passada do encoder, sem transcrever)
+        if isinstance(audio, str):
+            audio = whisperx.load_audio(audio)
+        with self._model_lock:
+            return self.model.detect_language(audio)
+
+    def transcribe(self, audio, align=True, language=None):
+        # audio pode ser o caminho de um arquivo ou um array float32 a 16 kHz; language=None detecta o idioma
+        if isinstance(audio, str):
+            audio = whisperx.load_audio(audio)
+
+        with self._model_lock:
+            result = self.model.transcribe(audio, batch_size=self.batch_size, chunk_size=self.chunk_size, language=language)
+        language = result["language"]
+
+        if align and result["segments"]:
+            align_model, metadata = self._align_model(language)
+            result = whisperx.align(result["segments"], align_model, metadata, audio, self.device,
+                                    interpolate_method="linear", return_char_alignments=False)
+        result["language"] = language
+        return result
+
+    def write(self, result, audio_path, output_dir, output_formats=("all",)):
+        write_outputs(result, audio_path, output_dir, output_formats)
+
+    def transcribe_files(self, input_files, output_dir, output_formats=("all",), align=True):
+        results = {}
+        for input_file in input_files:
+            print(f"Transcrevendo: {input_file}...")
+            result = self.transcribe(input_file, align=align)
+            self.write(result, input_file, output_dir, output_formats)
+            results[input_file] = result
+        return results
+
+# Serviços já carregados neste processo, por configuração
+_services = {}
+# O estágio de legendas roda em threads: sem a trava, duas threads carregariam o mesmo modelo ao mesmo tempo
+_services_lock = threading.Lock()
+
+def get_service(**options):
+    key = tuple(sorted(options.items()))
+    with _services_lock:
+        if key not in _services:
+            _services[key] = ASRService(**options)
+        return _services[key]
+
+def get_default_service(model='large-v3'):
+    # Sempre os mesmos argumentos (inclusive device), então todos os estágios compartilham um único modelo carregado
+    device = "cuda" if torch.cuda.is_available() else "cpu"
+    return get_service(model=model, device=device, **TRANSCRIBE_OPTIONS)
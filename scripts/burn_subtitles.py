@@ -1,60 +1,92 @@
 import os
 import subprocess
 import sys
+import time
+from concurrent.futures import ThreadPoolExecutor
 
 sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
 
-def burn():
-    # Caminhos das pastas
-    subs_folder = 'subs_ass'
-    videos_folder = 'final'
-    output_folder = 'burned_sub'  # Pasta para salvar os vídeos com legendas
+from scripts import encoders
+from scripts.aspects import PRIMARY_ASPECT
+from scripts.workspace import resolve
 
+def burn_one(video_file, video_codec, profile="standard", threads=0, aspect=PRIMARY_ASPECT, workspace=None):
+    workspace = resolve(workspace)
+    # Queima a legenda de um vídeo e retorna o status ({file, output, ok, seconds, error})
+    # Extrai o nome base do vídeo (sem extensão)
+    video_name = os.path.splitext(video_file)[0]
+
+    # Define o caminho para a legenda correspondente
+    subtitle_file = os.path.join(workspace.subs_ass, f"{video_name}.ass")
+    # Define o caminho de saída para o vídeo com legendas
+    output_file = os.path.join(workspace.burned_dir(aspect), f"{video_name}_subtitled.mp4")
+    status = {"file": video_file, "output": output_file, "ok": False, "seconds": 0.0, "threads": threads, "error": None}
+
+    # Verifica se a legenda existe
+    if not os.path.exists(subtitle_file):
+        status["error"] = f"Legenda não encontrada: {subtitle_file}"
+        return status
+
+    # Ajuste no caminho da legenda para FFmpeg
+    subtitle_file_ffmpeg = subtitle_file.replace('\\', '/')
+
+    # Comando FFmpeg para adicionar as legendas
+    command = ['ffmpeg', '-y', '-loglevel', 'error']
+    if threads:
+        command.extend(['-filter_threads', str(threads)])  # Threads dos filtros (libass/scale) deste processo
+    command.extend([
+        *encoders.input_args(video_codec),
+        '-i', os.path.join(workspace.final_dir(aspect), video_file),  # Vídeo de entrada
+        '-vf', encoders.filters(video_codec, f"subtitles='{subtitle_file_ffmpeg}'"),  # Filtro de legendas com caminho corrigido
+        *encoders.video_args(video_codec, profile),  # Codificador e flags do perfil
+    ])
+    if threads:
+        command.extend(['-threads', str(threads)])  # Threads do encoder deste processo
+    command.extend([
+        '-c:a', 'copy',  # Copia o áudio
+        output_file
+    ])
+
+    # Executa o comando
+    start = time.time()
+    result = subprocess.run(command, stdin=subprocess.DEVNULL, capture_output=True, text=True)
+    status["seconds"] = round(time.time() - start, 2)
+    status["ok"] = result.returncode == 0
+    if not status["ok"]:
+        status["error"] = result.stderr.strip() or f"ffmpeg retornou {result.returncode}"
+    return status
+
+def burn(files=None, video_codec=None, profile="standard", workers=1, cpu_budget=None, aspect=PRIMARY_ASPECT, workspace=None):
+    """
+    Queima as legendas de final/ em burned_sub/. Com workers > 1 roda vários ffmpeg ao mesmo tempo
+    e divide cpu_budget (padrão: todos os núcleos) entre eles via -threads/-filter_threads.
+    aspect seleciona as pastas de outro formato (ex: final_1x1/ -> burned_sub_1x1/).
+    Retorna a lista de status por arquivo, na ordem dos vídeos.
+    """
     # Cria a pasta de saída se não existir
-    os.makedirs(output_folder, exist_ok=True)
-
-    # Itera sobre os arquivos de vídeo na pasta final
-    for video_file in os.listdir(videos_folder):
-        if video_file.endswith(('.mp4', '.mkv', '.avi')):  # Formatos suportados
-            # Extrai o nome base do vídeo (sem extensão)
-            video_name = os.path.splitext(video_file)[0]
-
-            # Define o caminho para a legenda correspondente
-            subtitle_file = os.path.join(subs_folder, f"{video_name}.ass")
-            print(f"Caminho da legenda: {subtitle_file}")
-
-            # Verifica se a legenda existe
-            if os.path.exists(subtitle_file):
-                # Define o caminho de saída para o vídeo com legendas
-                output_file = os.path.join(output_folder, f"{video_name}_subtitled.mp4")
-
-                # Ajuste no caminho da legenda para FFmpeg
-                subtitle_file_ffmpeg = subtitle_file.replace('\\', '/')
-
-                # Comando FFmpeg para adicionar as legendas
-                command = [
-                    'ffmpeg',
-                    '-i', os.path.join(videos_folder, video_file),  # Vídeo de entrada
-                    '-vf', f"subtitles='{subtitle_file_ffmpeg}'",  # Filtro de legendas com caminho corrigido
-                    '-c:v', 'h264_nvenc',  # Codificador NVIDIA
-                    '-preset', 'p1',  # Preset para velocidade
-                    '-b:v', '5M',  # Bitrate
-                    '-c:a', 'copy',  # Copia o áudio
-                    output_file
-                ]
-
-                # Log dos caminhos e do comando
-                print(f"Processando vídeo: {video_file}")
-                print(f"Caminho da legenda: {subtitle_file}")
-                print(f"Caminho de saída: {output_file}")
-                print(f"Comando: {' '.join(command)}")
-
-                # Executa o comando
-                try:
-                    subprocess.run(command, check=True)
-                    print(f"Processado: {output_file}")
-                except subprocess.CalledProcessError as e:
-                    print(f"Erro ao processar {video_name}: {e}")
-            else:
-                print(f"Legenda não encontrada para: {video_name}")
+    workspace = resolve(workspace)
+    os.makedirs(workspace.burned_dir(aspect), exist_ok=True)
+
+    # Encoder escolhido pelo registro (NVENC/QSV/VAAPI quando funcionam neste host, senão libx264)
+    video_codec = video_codec or encoders.select_encoder()
+
+    # Vídeos da pasta final (files: queima apenas esses vídeos, usado pelo agendador por segmento)
+    videos = [f for f in (files if files is not None else sorted(os.listdir(workspace.final_dir(aspect))))
+              if f.endswith(('.mp4', '.mkv', '.avi'))]  # Formatos suportados
+    if not videos:
+        return []
+
+    workers = max(1, min(workers, len(videos)))
+    # Com um único processo o ffmpeg escolhe sozinho; em paralelo cada um recebe sua fatia do orçamento
+    threads = max(1, (cpu_budget or os.cpu_count() or 1) // workers) if workers > 1 or cpu_budget else 0
+
+    start = time.time()
+    if workers > 1:
+        with ThreadPoolExecutor(max_workers=workers, thread_name_prefix="burn") as executor:
+            results = list(executor.map(lambda video_file: burn_one(video_file, video_codec, profile, threads, aspect, workspace), videos))
+    else:
+        results = [burn_one(video_file, video_codec, profile, threads, aspect, workspace) for video_file in videos]
 
+    ok = sum(1 for status in results if status["ok"])
+    print(f"Legendas queimadas: {ok}/{len(results)} vídeos em {time.time() - start:.1f}s ({workers} workers, {threads or 'auto'} threads cada, {video_codec}).")
+    return results
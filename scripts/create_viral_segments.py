@@ -1,9 +1,11 @@
 import json
+from scripts.workspace import resolve
 
-def create(num_segments, viral_mode, themes, tempo_minimo, tempo_maximo):
+def build_prompts(num_segments, viral_mode, themes, tempo_minimo, tempo_maximo, workspace=None):
+    # Textos a enviar para a IA, na ordem (um por parte da transcrição)
     quantidade_de_virals = num_segments  # @param {type:"number"}
 
-    with open('tmp/input_video.tsv', 'r', encoding='utf-8') as f:
+    with open(resolve(workspace).input_path('tsv'), 'r', encoding='utf-8') as f:
         content = f.read()
 
     system = f"You are a Viral Segment Identifier, an AI system that analyzes a video's transcript and predicts which segments might go viral on social media platforms. You use factors such as emotional impact, humor, unexpected content, and relevance to current trends to make your predictions. You return a structured text document detailing the start and end times, the description, the duration, and a viral score for the potential viral segments."
@@ -87,6 +89,11 @@ def create(num_segments, viral_mode, themes, tempo_minimo, tempo_maximo):
 
         output_texts.append(output_text)
 
+    return output_texts
+
+def create(num_segments, viral_mode, themes, tempo_minimo, tempo_maximo, workspace=None):
+    output_texts = build_prompts(num_segments, viral_mode, themes, tempo_minimo, tempo_maximo, workspace)
+
     # Print the output texts
     for text in output_texts:
         print(text)
\ No newline at end of file
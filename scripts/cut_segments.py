@@ -1,87 +1,264 @@
 import subprocess
-import subprocess
 import json
+import math
 import os
-    
-def cut(segments):
+from scripts import encoders
+from scripts.workspace import resolve
+
+def time_to_seconds(time_str):
+    # Converte "HH:MM:SS(.ms)" (ou um número) em segundos
+    if isinstance(time_str, (int, float)):
+        return float(time_str)
+    seconds = 0.0
+    for part in str(time_str).split(":"):
+        seconds = seconds * 60 + float(part)
+    return seconds
+
+def get_keyframes(input_file):
+    # Lista os timestamps dos keyframes do vídeo (sem decodificar os frames intermediários)
+    command = [
+        "ffprobe",
+        "-v", "error",
+        "-select_streams", "v:0",
+        "-skip_frame", "nokey",
+        "-show_entries", "frame=pts_time",
+        "-of", "csv=p=0",
+        input_file
+    ]
+    try:
+        result = subprocess.run(command, check=True, capture_output=True, text=True)
+    except (subprocess.CalledProcessError, FileNotFoundError) as e:
+        print(f"Could not read keyframes: {e}")
+        return []
+
+    keyframes = []
+    for line in result.stdout.splitlines():
+        line = line.strip().strip(",")
+        if line:
+            try:
+                keyframes.append(float(line))
+            except ValueError:
+                continue
+    return sorted(keyframes)
+
+def has_audio(input_file):
+    # Verifica se o vídeo tem trilha de áudio (sem ela, os cortes não podem mapear [0:a])
+    command = [
+        "ffprobe",
+        "-v", "error",
+        "-select_streams", "a",
+        "-show_entries", "stream=index",
+        "-of", "csv=p=0",
+        input_file
+    ]
+    try:
+        result = subprocess.run(command, check=True, capture_output=True, text=True)
+    except (subprocess.CalledProcessError, FileNotFoundError) as e:
+        print(f"Could not probe audio streams: {e}")
+        return True
+    return bool(result.stdout.strip())
+
+def nearest_keyframe(keyframes, start, tolerance):
+    # Retorna o keyframe mais próximo de start, se estiver dentro da tolerância
+    best = None
+    for kf in keyframes:
+        if abs(kf - start) <= tolerance and (best is None or abs(kf - start) < abs(best - start)):
+            best = kf
+        if kf > start + tolerance:
+            break
+    return best
+
+def keyframe_seek(keyframe):
+    # -ss arredondado para cima (ms): arredondar para baixo cairia antes do keyframe e o
+    # stream copy começaria no keyframe anterior (um GOP inteiro a mais no corte)
+    return f"{math.ceil(round(keyframe * 1000, 6)) / 1000:.3f}"
+
+def codec_args(video_codec, profile="draft"):
+    # Segmentos intermediários: perfil rápido, a qualidade final vem do encode do reenquadramento
+    command = encoders.video_args(video_codec, profile)
+    command.extend([
+        "-c:a", "aac",
+        "-b:a", "128k",
+    ])
+    return command
+
+def report(output_file, output_dir="tmp"):
+    if os.path.exists(os.path.join(output_dir, output_file)):
+        file_size = os.path.getsize(os.path.join(output_dir, output_file))
+        print(f"Generated segment: {output_file}, Size: {file_size} bytes")
+    else:
+        print(f"Failed to generate segment: {output_file}")
+
+def cut_one(index, segment, video_codec, input_file=None, total=None, workspace=None):
+    # Corta um único segmento (usado pelo loop do cut() e pelo agendador por segmento)
+    workspace = resolve(workspace)
+    input_file = input_file or workspace.input_video
+    start_time = segment.get("start_time", "00:00:00")
+    duration = segment.get("duration", 0)  # Utiliza a duração para calcular o corte
+
+    output_file = f"output{str(index).zfill(3)}_original_scale.mp4"
+
+    # Comando ffmpeg ajustado para usar -ss antes de -i e -t para a duração
+    command = [
+        "ffmpeg",
+        "-y",
+        *encoders.input_args(video_codec),
+        "-ss", start_time,          # Corte antes de decodificar
+        "-i", input_file,
+        "-t", str(duration),        # Define a duração do segmento
+    ]
+    upload = encoders.filters(video_codec)
+    if upload:
+        command.extend(["-vf", upload])
+    command.extend(codec_args(video_codec))
+    command.append(os.path.join(workspace.tmp, output_file))
+
+    print(f"Processing segment {index+1}/{total or index+1}")
+    print(f"Start time: {start_time}, Duration: {duration} seconds")
+    print(f"Executing command: {' '.join(command)}")
+
+    # Executando o comando
+    try:
+        result = subprocess.run(command, check=True, capture_output=True, text=True)
+        #print(f"Command output: {result.stdout}")
+        #print(f"Command error output: {result.stderr}")
+    except subprocess.CalledProcessError as e:
+        print(f"Error executing ffmpeg: {e}")
+        #print(f"Error output: {e.stderr}")
+        return None
+
+    report(output_file, workspace.tmp)
 
-    def check_nvenc_support():
+    print("\n" + "="*50 + "\n")
+    return os.path.join(workspace.tmp, output_file)
+
+def detect_video_codec():
+    # Resultado do probe do ffmpeg fica em cache (encoders.probe), não roda a cada cut()
+    video_codec = encoders.select_encoder()
+    print(f"Using video encoder: {video_codec}")
+    return video_codec
+
+def cut(segments, batch=False, stream_copy=False, keyframe_tolerance=0.5, range_files=None, workspace=None):
+    workspace = resolve(workspace)
+    # range_files: trechos já baixados por segmento (modo áudio primeiro), cada um começando no início do corte
+
+    def copy_segment(input_file, output_file, start, duration):
+        # Corte sem reencode: começa exatamente no keyframe, então o stream copy é seguro
+        command = [
+            "ffmpeg",
+            "-y",
+            "-ss", keyframe_seek(start),
+            "-i", input_file,
+            "-t", str(duration),
+            "-c", "copy",
+            "-avoid_negative_ts", "make_zero",
+            os.path.join(workspace.tmp, output_file)
+        ]
+        print(f"Executing command: {' '.join(command)}")
         try:
-            result = subprocess.run(["ffmpeg", "-encoders"], capture_output=True, text=True)
-            return "h264_nvenc" in result.stdout
-        except subprocess.CalledProcessError:
+            subprocess.run(command, check=True, capture_output=True, text=True)
+            return True
+        except subprocess.CalledProcessError as e:
+            print(f"Error executing ffmpeg: {e}")
             return False
 
+    def generate_batch(input_file, jobs, video_codec):
+        # Um único processo ffmpeg: decodifica a fonte uma vez e usa split/trim para todos os cortes.
+        # A entrada fica limitada ao intervalo dos cortes (do menor início ao maior fim), então só esse
+        # trecho é decodificado; os trims são relativos ao início desse intervalo
+        n = len(jobs)
+        window_start = f"{min(start for _, _, start, _ in jobs):.3f}"
+        window_end = max(start + duration for _, _, start, duration in jobs)
+        offset = float(window_start)
+        audio = has_audio(input_file)
+        filters = [f"[0:v]split={n}" + "".join(f"[v{k}]" for k in range(n))]
+        if audio:
+            filters.append(f"[0:a]asplit={n}" + "".join(f"[a{k}]" for k in range(n)))
+        for k, (_, _, start, duration) in enumerate(jobs):
+            start, end = start - offset, start + duration - offset
+            upload = encoders.filters(video_codec)
+            filters.append(f"[v{k}]trim=start={start:.3f}:end={end:.3f},setpts=PTS-STARTPTS" + (f",{upload}" if upload else "") + f"[vout{k}]")
+            if audio:
+                filters.append(f"[a{k}]atrim=start={start:.3f}:end={end:.3f},asetpts=PTS-STARTPTS[aout{k}]")
+
+        command = ["ffmpeg", "-y", *encoders.input_args(video_codec), "-ss", window_start, "-t", f"{window_end - offset:.3f}",
+                   "-i", input_file, "-filter_complex", ";".join(filters)]
+        for k, (_, output_file, _, _) in enumerate(jobs):
+            command.extend(["-map", f"[vout{k}]"])
+            if audio:
+                command.extend(["-map", f"[aout{k}]"])
+            command.extend(codec_args(video_codec))
+            command.append(os.path.join(workspace.tmp, output_file))
+
+        print(f"Processing {n} segments in a single pass")
+        print(f"Executing command: {' '.join(command)}")
+        try:
+            subprocess.run(command, check=True, capture_output=True, text=True)
+        except subprocess.CalledProcessError as e:
+            print(f"Error executing ffmpeg: {e}")
+
+        for _, output_file, _, _ in jobs:
+            report(output_file, workspace.tmp)
+        print("\n" + "="*50 + "\n")
+
     def generate_segments(response):
-        if not check_nvenc_support():
-            print("NVENC is not supported on this system. Falling back to libx264.")
-            video_codec = "libx264"
-        else:
-            video_codec = "h264_nvenc"
+        video_codec = detect_video_codec()
 
-        input_file = "tmp/input_video.mp4"
+        segments = response.get("segments", [])
+
+        if range_files is not None:
+            # O corte local (mesmo encode do modo completo) deixa a linha do tempo de cada trecho remuxado no zero
+            for i, (segment, range_file) in enumerate(zip(segments, range_files)):
+                cut_one(i, {**segment, "start_time": "0"}, video_codec, range_file, total=len(segments), workspace=workspace)
+            return
+
+        input_file = workspace.input_video
         if not os.path.exists(input_file):
             print(f"Input file not found: {input_file}")
             return
 
-        segments = response.get("segments", [])
+        keyframes = get_keyframes(input_file) if stream_copy else []
+        encode_jobs = []
+        moved = False
+
         for i, segment in enumerate(segments):
             start_time = segment.get("start_time", "00:00:00")
             duration = segment.get("duration", 0)  # Utiliza a duração para calcular o corte
 
             output_file = f"output{str(i).zfill(3)}_original_scale.mp4"
 
-            # Comando ffmpeg ajustado para usar -ss antes de -i e -t para a duração
-            command = [
-                "ffmpeg",
-                "-y",
-                "-ss", start_time,          # Corte antes de decodificar
-                "-i", input_file,
-                "-t", str(duration),        # Define a duração do segmento
-                "-c:v", video_codec
-            ]
-
-            if video_codec == "h264_nvenc":
-                command.extend([
-                    "-preset", "p1",  # Fast encoding preset for NVENC
-                    "-b:v", "5M",     # Set bitrate instead of CRF for NVENC
-                ])
-            else:
-                command.extend([
-                    "-preset", "ultrafast",
-                    "-crf", "23"
-                ])
-
-            command.extend([
-                "-c:a", "aac",
-                "-b:a", "128k",
-                f"tmp/{output_file}"
-            ])
-
-            print(f"Processing segment {i+1}/{len(segments)}")
-            print(f"Start time: {start_time}, Duration: {duration} seconds")
-            print(f"Executing command: {' '.join(command)}")
-
-            # Executando o comando
-            try:
-                result = subprocess.run(command, check=True, capture_output=True, text=True)
-                #print(f"Command output: {result.stdout}")
-                #print(f"Command error output: {result.stderr}")
-            except subprocess.CalledProcessError as e:
-                print(f"Error executing ffmpeg: {e}")
-                #print(f"Error output: {e.stderr}")
+            if stream_copy:
+                start = time_to_seconds(start_time)
+                keyframe = nearest_keyframe(keyframes, start, keyframe_tolerance)
+                if keyframe is not None:
+                    print(f"Segment {i+1}/{len(segments)} starts at keyframe {keyframe:.3f}s, using stream copy")
+                    # O corte começa no keyframe, não em start: mantém o fim pedido e grava o início real no
+                    # segmento, para as legendas recortadas da fonte e a trilha de rostos usarem o mesmo tempo
+                    end = start + float(duration)
+                    if copy_segment(input_file, output_file, keyframe, end - keyframe):
+                        segment.setdefault("requested_start_time", start_time)
+                        segment["start_time"] = f"{keyframe:.6f}"
+                        segment["duration"] = round(end - keyframe, 6)
+                        moved = True
+                        report(output_file, workspace.tmp)
+                        print("\n" + "="*50 + "\n")
+                        continue
+
+            if batch:
+                encode_jobs.append((i, output_file, time_to_seconds(start_time), float(duration)))
                 continue
 
-            if os.path.exists(f"tmp/{output_file}"):
-                file_size = os.path.getsize(f"tmp/{output_file}")
-                print(f"Generated segment: {output_file}, Size: {file_size} bytes")
-            else:
-                print(f"Failed to generate segment: {output_file}")
+            cut_one(i, segment, video_codec, input_file, total=len(segments), workspace=workspace)
+
+        if encode_jobs:
+            generate_batch(input_file, encode_jobs, video_codec)
 
-            print("\n" + "="*50 + "\n")
+        if moved:
+            with open(workspace.segments_file, 'w', encoding='utf-8') as file:
+                json.dump(response, file, ensure_ascii=False, indent=4)
 
     # Reading the JSON file
-    with open('tmp/viral_segments.txt', 'r') as file:
+    with open(workspace.segments_file, 'r') as file:
         response = json.load(file)
 
     generate_segments(response)
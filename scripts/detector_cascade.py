@@ -0,0 +1,127 @@
+import time
+from itertools import chain
+import cv2
+import numpy as np
+
+# Largura máxima do frame entregue ao MediaPipe. As saídas são relativas (0-1),
+# então as caixas voltam para a resolução original apenas multiplicando pelo tamanho do frame.
+DETECTION_MAX_WIDTH = 640
+# Ordem dos estágios, do mais barato para o mais caro
+CASCADE_ORDER = ("face_detection", "face_mesh", "pose")
+# Tudo que muda as detecções além da configuração dos modelos (entra na chave das trilhas em cache)
+CASCADE_SETTINGS = {"order": CASCADE_ORDER, "max_width": DETECTION_MAX_WIDTH}
+
+class CascadeStats:
+    """
+    Contadores por estágio da cascata: quantas vezes rodou, quantas vezes encontrou caixas
+    suficientes (hit) ou não (miss) e o tempo gasto.
+    """
+
+    def __init__(self):
+        self.stages = {}
+
+    def record(self, stage, hit, elapsed):
+        counters = self.stages.setdefault(stage, {"calls": 0, "hits": 0, "misses": 0, "time": 0.0})
+        counters["calls"] += 1
+        counters["hits" if hit else "misses"] += 1
+        counters["time"] += elapsed
+
+    def merge(self, other):
+        for stage, counters in other.items():
+            total = self.stages.setdefault(stage, {"calls": 0, "hits": 0, "misses": 0, "time": 0.0})
+            for key, value in counters.items():
+                total[key] += value
+
+    def snapshot(self, reset=False):
+        data = {stage: dict(counters) for stage, counters in self.stages.items()}
+        if reset:
+            self.stages = {}
+        return data
+
+    def report(self):
+        lines = ["Estatísticas da cascata de detecção:"]
+        for stage, c in self.stages.items():
+            avg_ms = c["time"] / c["calls"] * 1000 if c["calls"] else 0.0
+            lines.append(f"  {stage}: {c['calls']} chamadas, {c['hits']} hits, {c['misses']} misses, {c['time']:.2f}s total ({avg_ms:.1f} ms/chamada)")
+        return "\n".join(lines)
+
+# Contadores do processo atual
+stats = CascadeStats()
+
+def prepare_frame(frame, max_width=DETECTION_MAX_WIDTH):
+    # Reduz o frame antes da conversão para RGB, assim a conversão também fica mais barata
+    height, width = frame.shape[:2]
+    if max_width and width > max_width:
+        scale = max_width / width
+        frame = cv2.resize(frame, (max_width, int(height * scale)), interpolation=cv2.INTER_AREA)
+    return cv2.cvtColor(frame, cv2.COLOR_BGR2RGB)
+
+def landmarks_to_boxes(landmark_sets, frame_width, frame_height):
+    """
+    Converte conjuntos de landmarks (face mesh ou pose) em um array (N, 4) de caixas (x, y, w, h)
+    em pixels, calculando mínimo/máximo de todos os pontos de uma vez com NumPy.
+    """
+    if not landmark_sets:
+        return np.empty((0, 4), dtype=np.int32)
+    # Todos os conjuntos de um modelo têm o mesmo número de landmarks (468/478 no face mesh, 33 na pose):
+    # um único array (n_sets, n_landmarks, 2) preenchido de uma vez e reduzido sem loop por conjunto
+    n_sets, n_landmarks = len(landmark_sets), len(landmark_sets[0])
+    points = np.fromiter(
+        chain.from_iterable((lmk.x, lmk.y) for landmarks in landmark_sets for lmk in landmarks),
+        dtype=np.float32, count=2 * n_sets * n_landmarks,
+    ).reshape(n_sets, n_landmarks, 2)
+    mins = points.min(axis=1)
+    maxs = points.max(axis=1)
+    scale = np.array([frame_width, frame_height], dtype=np.float32)
+    top_left = (mins * scale).astype(np.int32)
+    bottom_right = (maxs * scale).astype(np.int32)
+    return np.hstack([top_left, bottom_right - top_left])
+
+def relative_boxes_to_array(relative_boxes, frame_width, frame_height):
+    # Caixas relativas (xmin, ymin, width, height) do FaceDetection -> array (N, 4) em pixels
+    if not relative_boxes:
+        return np.empty((0, 4), dtype=np.int32)
+    boxes = np.array([(b.xmin, b.ymin, b.width, b.height) for b in relative_boxes], dtype=np.float32)
+    return (boxes * np.array([frame_width, frame_height, frame_width, frame_height], dtype=np.float32)).astype(np.int32)
+
+def face_detection_boxes(results, frame_width, frame_height, limit):
+    detections = (results.detections or [])[:limit]
+    return relative_boxes_to_array([d.location_data.relative_bounding_box for d in detections], frame_width, frame_height)
+
+def face_mesh_boxes(results, frame_width, frame_height, limit):
+    faces = (results.multi_face_landmarks or [])[:limit]
+    return landmarks_to_boxes([face.landmark for face in faces], frame_width, frame_height)
+
+def pose_boxes(results, frame_width, frame_height, limit):
+    if not results.pose_landmarks:
+        return np.empty((0, 4), dtype=np.int32)
+    return landmarks_to_boxes([results.pose_landmarks.landmark], frame_width, frame_height)[:limit]
+
+def run_cascade(frame, face_detection, face_mesh, pose, needed, max_width=DETECTION_MAX_WIDTH):
+    """
+    Roda os detectores do mais barato para o mais caro e para no primeiro que encontrar
+    `needed` caixas. Retorna um array (N, 4) de caixas (x, y, w, h); se nenhum estágio encontrar
+    o suficiente, retorna o primeiro resultado parcial (ou None quando nada foi detectado).
+    """
+    frame_height, frame_width = frame.shape[:2]
+    frame_rgb = prepare_frame(frame, max_width)
+
+    stages = {
+        "face_detection": (face_detection, face_detection_boxes),
+        "face_mesh": (face_mesh, face_mesh_boxes),
+        "pose": (pose, pose_boxes),
+    }
+
+    partial = None
+    for name in CASCADE_ORDER:
+        model, extract = stages[name]
+        start = time.perf_counter()
+        boxes = extract(model.process(frame_rgb), frame_width, frame_height, needed)
+        hit = len(boxes) >= needed
+        stats.record(name, hit, time.perf_counter() - start)
+        if hit:
+            return boxes
+        if len(boxes) and partial is None:
+            partial = boxes
+
+    return partial
@@ -1,8 +1,26 @@
 import os
+import subprocess
 import yt_dlp
+from scripts.artifact_cache import ArtifactCache, make_key
+from scripts.cut_segments import time_to_seconds
+from scripts.workspace import resolve
 
-def download(url):
-    output_path = 'tmp/input_video.mp4'
+def is_local_file(source):
+    return os.path.exists(source)
+
+def download(url, use_cache=True, workspace=None, interactive=True):
+    # interactive=False (jobs do job_runner): um link inválido vira erro em vez de pedir outro no terminal
+    workspace = resolve(workspace)
+    output_path = workspace.input_video
+    os.makedirs(workspace.tmp, exist_ok=True)
+
+    if is_local_file(url):
+        # Arquivo local: remux para mp4 sem reencode (o yt-dlp não aceita caminhos)
+        if os.path.abspath(url) == os.path.abspath(output_path):
+            return output_path
+        subprocess.run(['ffmpeg', '-y', '-loglevel', 'error', '-i', url, '-map', '0:v:0', '-map', '0:a:0?', '-c', 'copy',
+                        '-movflags', 'faststart', output_path], check=True)
+        return output_path
     
     ydl_opts = {
         'format': 'bestvideo+bestaudio/best',
@@ -19,14 +37,118 @@ def download(url):
 
     while True:
         try:
+            # Com outtmpl fixo o yt-dlp pularia o download ("already downloaded") e reaproveitaria o vídeo do job anterior
+            if os.path.exists(output_path):
+                os.remove(output_path)
+
+            if not use_cache:
+                with yt_dlp.YoutubeDL(ydl_opts) as ydl:
+                    ydl.download([url])
+                break
+
+            # Chave pelo ID do vídeo (não pela URL), assim links diferentes do mesmo vídeo reaproveitam o download
+            with yt_dlp.YoutubeDL({'quiet': True}) as ydl:
+                info = ydl.extract_info(url, download=False)
+            cache = ArtifactCache()
+            key = make_key("download", info.get('extractor_key'), info.get('id'), ydl_opts['format'])
+            if cache.get(key, {'video.mp4': output_path}):
+                print(f"Vídeo {info.get('id')} encontrado no cache.")
+                break
+
             with yt_dlp.YoutubeDL(ydl_opts) as ydl:
                 ydl.download([url])
+            if os.path.exists(output_path):
+                cache.put(key, {'video.mp4': output_path}, metadata={'url': url, 'title': info.get('title')})
             break
         except yt_dlp.utils.DownloadError as e:
             if "is not a valid URL" in str(e):
                 print("Erro: o link inserido não é válido.")
+                if not interactive:
+                    raise ValueError(f"Link inválido e arquivo local não encontrado: {url}") from e
                 url = input("\nPor favor, insira um link válido: ")
             else:
                 raise
 
-    return output_path
\ No newline at end of file
+    return output_path
+
+def download_audio(url, use_cache=True, workspace=None):
+    """
+    Fase 1 do modo áudio primeiro: baixa só o áudio (para a transcrição e a escolha dos segmentos).
+    Aceita uma URL (yt-dlp, inclusive um servidor HTTP local) ou o caminho de um arquivo local.
+    """
+    workspace = resolve(workspace)
+    os.makedirs(workspace.tmp, exist_ok=True)
+    if is_local_file(url):
+        # Arquivo local: extrai a trilha de áudio sem reencode (.mka aceita qualquer codec de áudio)
+        output_path = workspace.input_path('mka')
+        subprocess.run(['ffmpeg', '-y', '-loglevel', 'error', '-i', url, '-vn', '-c:a', 'copy', output_path], check=True)
+        return output_path
+
+    ydl_opts = {
+        'format': 'bestaudio/best',
+        'outtmpl': workspace.input_path('%(ext)s'),
+        'postprocessors': [{'key': 'FFmpegExtractAudio', 'preferredcodec': 'best'}],  # Sem reencode
+        'overwrites': True,  # Nunca reaproveita o input_video.<ext> de um job anterior
+        'quiet': True,
+    }
+    with yt_dlp.YoutubeDL({'quiet': True}) as ydl:
+        info = ydl.extract_info(url, download=False)
+
+    cache = ArtifactCache() if use_cache else None
+    key = make_key("download-audio", info.get('extractor_key'), info.get('id'), ydl_opts['format'])
+    metadata = cache.metadata(key) if cache else None
+    if metadata and metadata.get("ext"):
+        output_path = workspace.input_path(metadata['ext'])
+        if cache.get(key, {'audio': output_path}):
+            print(f"Áudio de {info.get('id')} encontrado no cache.")
+            return output_path
+
+    with yt_dlp.YoutubeDL(ydl_opts) as ydl:
+        info = ydl.extract_info(url, download=True)
+    output_path = info['requested_downloads'][0]['filepath']
+    if cache:
+        cache.put(key, {'audio': output_path}, metadata={'url': url, 'title': info.get('title'), 'ext': os.path.splitext(output_path)[1][1:]})
+    print(f"Áudio baixado: {output_path}")
+    return output_path
+
+def download_range(url, index, start, duration, max_height=1080, workspace=None):
+    """
+    Fase 2: baixa só o trecho [start, start + duration] do vídeo, limitado a max_height e
+    remuxado para mp4 (sem reencode). Retorna tmp/ranges/rangeNNN.mp4, cuja linha do tempo começa em start:
+    o stream copy leva o trecho desde o keyframe anterior, e a edit list do mp4 marca esse pré-roll para ser descartado.
+    """
+    ranges_dir = resolve(workspace).ranges
+    os.makedirs(ranges_dir, exist_ok=True)
+    output_path = os.path.join(ranges_dir, f"range{str(index).zfill(3)}.mp4")
+    if os.path.exists(output_path):
+        os.remove(output_path)
+
+    if is_local_file(url):
+        # Arquivo local: stream copy do trecho (a resolução fica a original, limitar exigiria reencode).
+        # Sem -avoid_negative_ts make_zero, como no trecho do yt-dlp: o make_zero traria o pré-roll até o keyframe
+        # para dentro do vídeo e o corte começaria antes do start (fora de sincronia com a legenda da transcrição)
+        subprocess.run(['ffmpeg', '-y', '-loglevel', 'error', '-ss', f"{start:.3f}", '-i', url, '-t', str(duration),
+                        '-c', 'copy', output_path], check=True)
+        return output_path
+
+    ydl_opts = {
+        'format': f'bestvideo[height<={max_height}]+bestaudio/best[height<={max_height}]/best',
+        'download_ranges': yt_dlp.utils.download_range_func(None, [(start, start + duration)]),
+        'outtmpl': os.path.join(ranges_dir, f"range{str(index).zfill(3)}.%(ext)s"),
+        'merge_output_format': 'mp4',
+        'postprocessors': [{'key': 'FFmpegVideoRemuxer', 'preferedformat': 'mp4'}],
+        'quiet': True,
+    }
+    with yt_dlp.YoutubeDL(ydl_opts) as ydl:
+        ydl.download([url])
+    return output_path
+
+def download_ranges(url, segments, max_height=1080, workspace=None):
+    # Um arquivo por segmento, na ordem de tmp/viral_segments.txt
+    range_files = []
+    for index, segment in enumerate(segments):
+        start = time_to_seconds(segment.get("start_time", "00:00:00"))
+        duration = float(segment.get("duration", 0))
+        print(f"Baixando trecho {index + 1}/{len(segments)}: {start:.1f}s + {duration:.1f}s (até {max_height}p)")
+        range_files.append(download_range(url, index, start, duration, max_height, workspace))
+    return range_files
\ No newline at end of file
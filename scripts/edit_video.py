@@ -1,144 +1,328 @@
 import cv2
 import numpy as np
 import os
-import subprocess
+import json
+import time
+import multiprocessing
 import mediapipe as mp
-from scripts.one_face import crop_and_resize_single_face, resize_with_padding, detect_face_or_body
-from scripts.two_face import crop_and_resize_two_faces, detect_face_or_body_two_faces
+from concurrent.futures import ProcessPoolExecutor
+from scripts.one_face import detect_face_or_body
+from scripts.two_face import detect_face_or_body_two_faces
+from scripts.aspects import ASPECT_TARGETS, PRIMARY_ASPECT
+from scripts.render_plan import RenderPlan
+from scripts.ffmpeg_writer import FFmpegWriter
+from scripts import encoders
+from scripts.face_tracks import FaceTrack, load_track, analyze_source, quick_file_hash
+from scripts.cut_segments import time_to_seconds
+from scripts import detector_cascade
+from scripts.virtual_camera import VirtualCamera
+from scripts.ffmpeg_reframe import render_short
+from scripts.workspace import resolve
 
-def edit():
-    # Inicialização das soluções do MediaPipe
-    mp_face_detection = mp.solutions.face_detection
-    mp_face_mesh = mp.solutions.face_mesh
-    mp_pose = mp.solutions.pose
+# Inicialização das soluções do MediaPipe
+mp_face_detection = mp.solutions.face_detection
+mp_face_mesh = mp.solutions.face_mesh
+mp_pose = mp.solutions.pose
 
-    def generate_short(input_file, output_file, original_file, index, num_faces):
+# Configuração dos detectores (também faz parte da chave das trilhas em cache)
+DETECTOR_SETTINGS = {
+    "face_detection": {"model_selection": 1, "min_detection_confidence": 0.5},
+    "face_mesh": {"static_image_mode": False, "max_num_faces": 2, "refine_landmarks": True, "min_detection_confidence": 0.5, "min_tracking_confidence": 0.5},
+    "pose": {"static_image_mode": False, "min_detection_confidence": 0.5, "min_tracking_confidence": 0.5},
+}
+
+def track_key_settings():
+    # Tudo que muda as detecções entra na chave das trilhas: modelos, ordem da cascata e redução do frame
+    return {"detectors": DETECTOR_SETTINGS, "cascade": detector_cascade.CASCADE_SETTINGS}
+
+# Modelos carregados uma vez por processo (reaproveitados entre os segmentos)
+_models = None
+
+def load_models():
+    global _models
+    if _models is None:
+        _models = (
+            mp_face_detection.FaceDetection(**DETECTOR_SETTINGS["face_detection"]),
+            mp_face_mesh.FaceMesh(**DETECTOR_SETTINGS["face_mesh"]),
+            mp_pose.Pose(**DETECTOR_SETTINGS["pose"]),
+        )
+    return _models
+
+def release_models():
+    global _models
+    if _models is not None:
+        for model in _models:
+            model.close()
+        _models = None
+
+def detect(frame, num_faces):
+    face_detection, face_mesh, pose = load_models()
+    if num_faces == 2:
+        return detect_face_or_body_two_faces(frame, face_detection, face_mesh, pose)
+    # num_faces == 1
+    detections = detect_face_or_body(frame, face_detection, face_mesh, pose)
+    if detections is not None:
+        detections = detections[:1]  # Garantir que temos apenas uma detecção
+    return detections
+
+def final_output_path(index, subtitle_file=None, aspect=PRIMARY_ASPECT, workspace=None):
+    # Com legenda queimada no mesmo encode, o vídeo já sai pronto em burned_sub/ (ou burned_sub_1x1/, ...)
+    workspace = resolve(workspace)
+    name = workspace.final_name(index)
+    output_dir = workspace.burned_dir(aspect) if subtitle_file else workspace.final_dir(aspect)
+    os.makedirs(output_dir, exist_ok=True)
+    return os.path.join(output_dir, f"{name}_subtitled.mp4" if subtitle_file else f"{name}.mp4")
+
+def generate_short(input_file, index, num_faces, video_codec=None, use_track_cache=True, source_track=None, source_start=0.0, detection_seconds=5, smoothing_seconds=1.0, zoom_out_factor=2.5, subtitle_file=None, profile="standard", aspects=(PRIMARY_ASPECT,), workspace=None):
+    try:
+        cap = cv2.VideoCapture(input_file)
+
+        if not cap.isOpened():
+            print(f"Erro ao abrir o vídeo: {input_file}")
+            return
+
+        fps = cap.get(cv2.CAP_PROP_FPS)
+        frame_width = int(cap.get(cv2.CAP_PROP_FRAME_WIDTH))
+        frame_height = int(cap.get(cv2.CAP_PROP_FRAME_HEIGHT))
+        total_frames = int(cap.get(cv2.CAP_PROP_FRAME_COUNT))
+        print(f"Dimensões do vídeo - Altura: {frame_height}, Largura: {frame_width}, FPS: {fps}, Total de Frames: {total_frames}")
+
+        # Os frames vão direto para o ffmpeg, que já faz o mux com o áudio do segmento original.
+        # Um writer por formato: o frame é decodificado e analisado uma vez e recortado para cada saída
+        final_outputs = [final_output_path(index, subtitle_file, aspect, workspace) for aspect in aspects]
+        writers = []
         try:
-            cap = cv2.VideoCapture(input_file)
-
-            if not cap.isOpened():
-                print(f"Erro ao abrir o vídeo: {input_file}")
-                return
-
-            fps = cap.get(cv2.CAP_PROP_FPS)
-            frame_width = int(cap.get(cv2.CAP_PROP_FRAME_WIDTH))
-            frame_height = int(cap.get(cv2.CAP_PROP_FRAME_HEIGHT))
-            total_frames = int(cap.get(cv2.CAP_PROP_FRAME_COUNT))
-            print(f"Dimensões do vídeo - Altura: {frame_height}, Largura: {frame_width}, FPS: {fps}, Total de Frames: {total_frames}")
-
-            fourcc = cv2.VideoWriter_fourcc(*'mp4v')
-            out = cv2.VideoWriter(output_file, fourcc, fps, (1080, 1920))
-
-            detection_interval = int(5 * fps)  # Verificar a cada 1 segundo
-            last_detected_faces = None
-            last_frame_face_positions = None
-            frames_since_last_detection = 0
-            max_frames_without_detection = detection_interval
-
-            transition_duration = int(fps)  # Duração da transição suave (1 segundo)
-            transition_frames = []
-
-            # Inicializar as soluções do MediaPipe dentro de um contexto 'with' para garantir a liberação de recursos
-            with mp_face_detection.FaceDetection(model_selection=1, min_detection_confidence=0.5) as face_detection, \
-                 mp_face_mesh.FaceMesh(static_image_mode=False, max_num_faces=2, refine_landmarks=True, min_detection_confidence=0.5, min_tracking_confidence=0.5) as face_mesh, \
-                 mp_pose.Pose(static_image_mode=False, min_detection_confidence=0.5, min_tracking_confidence=0.5) as pose:
-
-                for frame_index in range(total_frames):
-                    ret, frame = cap.read()
-                    if not ret or frame is None:
-                        break
-
-                    # Detectar rostos ou corpos a cada 1 segundo
-                    if frame_index % detection_interval == 0:
-                        if num_faces == 2:
-                            detections = detect_face_or_body_two_faces(frame, face_detection, face_mesh, pose)
-                        else:  # num_faces == 1
-                            detections = detect_face_or_body(frame, face_detection, face_mesh, pose)
-                            if detections:
-                                detections = [detections[0]]  # Garantir que temos apenas uma detecção
-
-                        if detections and len(detections) == num_faces:
-                            if last_frame_face_positions is not None:
-                                # Iniciar transição suave
-                                start_faces = np.array(last_frame_face_positions)
-                                end_faces = np.array(detections)
-                                transition_frames = np.linspace(start_faces, end_faces, transition_duration, dtype=int)
-                            else:
-                                transition_frames = []
-                            last_detected_faces = detections
-                            frames_since_last_detection = 0
-                        else:
-                            frames_since_last_detection += 1
-
-                    # Aplicar transições suaves
-                    if len(transition_frames) > 0:
-                        current_faces = transition_frames[0]
-                        transition_frames = transition_frames[1:]
-                    elif last_detected_faces is not None and frames_since_last_detection <= max_frames_without_detection:
-                        current_faces = last_detected_faces
-                    else:
-                        # Redimensionar o frame com padding se nenhum rosto for detectado
-                        result = resize_with_padding(frame)
-                        out.write(result)
-                        continue
+            for output, aspect in zip(final_outputs, aspects):
+                writers.append(FFmpegWriter(output, fps, ASPECT_TARGETS[aspect], audio_source=input_file, video_codec=video_codec, subtitle_file=subtitle_file, profile=profile))
 
-                    # Atualizar a última posição conhecida dos rostos
-                    last_frame_face_positions = current_faces
+            detection_interval = max(1, int(detection_seconds * fps))  # Verificar a cada detection_seconds segundos
 
-                    # Aplicar o crop para dois rostos ou um rosto/corpo
-                    if num_faces == 2:
-                        result = crop_and_resize_two_faces(frame, current_faces)
+            # Trilha de detecções em cache: se já existir para este segmento + configuração, o MediaPipe não roda
+            track = None
+            track_file = None
+            if source_track is not None:
+                # A análise já foi feita no vídeo fonte; basta recortar a janela deste segmento
+                use_track_cache = False
+            elif use_track_cache:
+                track_settings = {"num_faces": num_faces, "detection_interval": detection_interval, **track_key_settings()}
+                track, track_file = load_track(input_file, track_settings, tracks_dir=resolve(workspace).tracks)
+                if track is not None:
+                    print(f"Usando trilha de rostos em cache: {track_file}")
+            recorded_track = FaceTrack(max_faces=num_faces) if track is None and source_track is None else None
+
+            # Plano de renderização por formato: cortes e layout calculados uma vez, tela de saída reaproveitada
+            plans = [RenderPlan(frame_width, frame_height, num_faces, out_size=ASPECT_TARGETS[aspect], zoom_out_factor=zoom_out_factor) for aspect in aspects]
+
+            # Câmera virtual: suaviza o movimento entre as detecções sem buffers de transição
+            camera = VirtualCamera(num_faces, fps, smoothing_seconds=smoothing_seconds)
+
+            frame = None
+            for frame_index in range(total_frames):
+                # Reaproveita o buffer do frame anterior na decodificação
+                ret, frame = cap.read(frame)
+                if not ret or frame is None:
+                    break
+
+                # Detectar rostos ou corpos a cada detection_interval frames
+                if frame_index % detection_interval == 0:
+                    frame_time = frame_index / fps
+                    if source_track is not None:
+                        detections = source_track.at(source_start + frame_time, tolerance=detection_interval / fps / 2)
+                    elif track is not None:
+                        detections = track.at(frame_time, tolerance=0.5 / fps)
+                    else:
+                        detections = detect(frame, num_faces)
+                        recorded_track.add(frame_time, detections)
+
+                    if detections is not None and len(detections) == num_faces:
+                        camera.update(detections)
                     else:
-                        result = crop_and_resize_single_face(frame, current_faces[0])
-                    out.write(result)
+                        camera.miss()
+
+                # Sem rosto detectado: o plano usa o frame inteiro com padding
+                faces = camera.step()
+                for plan, writer in zip(plans, writers):
+                    writer.write(plan.render(frame, faces))
 
+            while writers:
+                writers.pop(0).release()
+        finally:
+            # Exceção na detecção, no render ou no pipe: os ffmpeg que ainda estão abertos são encerrados
+            for writer in writers:
+                writer.abort()
             cap.release()
-            out.release()
-            cv2.destroyAllWindows()
-
-            # Extrair o áudio do vídeo original
-            audio_file = f"tmp/output-audio-{index}.aac"
-            command = f"ffmpeg -y -i {input_file} -vn -acodec copy {audio_file}"
-
-            result = subprocess.run(command, shell=True, capture_output=True, text=True)
-            if result.returncode != 0:
-                print(f"Erro ao extrair o áudio: {result.stderr}")
-                return
-
-            if os.path.exists(audio_file) and os.path.getsize(audio_file) > 0:
-                final_dir = "final/"
-                os.makedirs(final_dir, exist_ok=True)
-                final_output = os.path.join(final_dir, f"final-output{str(index).zfill(3)}_processed.mp4")
-                command = f"ffmpeg -y -i {output_file} -i {audio_file} -c:v h264_nvenc -preset fast -b:v 2M -c:a aac -b:a 192k -r {fps} {final_output}"
-                subprocess.call(command, shell=True)
-                print(f"Arquivo final gerado em: {final_output}")
-            else:
-                print(f"Erro ao extrair o áudio do vídeo: {input_file}")
+        cv2.destroyAllWindows()
 
-        except Exception as e:
-            print(f"Erro durante o processamento do vídeo: {str(e)}")
+        if use_track_cache and recorded_track is not None:
+            recorded_track.save(track_file)
 
+        for final_output in final_outputs:
+            print(f"Arquivo final gerado em: {final_output}")
+        return final_outputs[0]
 
-    # Processar múltiplos vídeos
-    index = 0
-    while True:
-        input_file = f'tmp/output{str(index).zfill(3)}_original_scale.mp4'
-        output_file = f"tmp/output{str(index).zfill(3)}_processed.mp4"
-        original_file = f'tmp/output{str(index).zfill(3)}.mp4'
-
-        if os.path.exists(input_file):
-            # Definir o número de rostos esperados diretamente
-            num_faces = 2  # ou 2, conforme sua necessidade
-            # Verificar se o número de rostos é válido
-            if num_faces in [1, 2]:
-                generate_short(input_file, output_file, original_file, index, num_faces)
+    except Exception as e:
+        print(f"Erro durante o processamento do vídeo: {str(e)}")
+
+def build_source_track(indices, num_faces, detection_seconds, use_track_cache=True, workspace=None):
+    # Uma única análise sobre tmp/input_video.mp4 cobrindo a união dos trechos pedidos
+    workspace = resolve(workspace)
+    input_file = workspace.input_video
+    with open(workspace.segments_file, 'r') as file:
+        segments = json.load(file).get("segments", [])
+
+    segment_starts = {}
+    ranges = []
+    for index in indices:
+        if index >= len(segments):
+            continue
+        start = time_to_seconds(segments[index].get("start_time", "00:00:00"))
+        duration = float(segments[index].get("duration", 0))
+        segment_starts[index] = start
+        ranges.append((start, start + duration))
+
+    if not ranges or not os.path.exists(input_file):
+        return None, {}
+
+    settings = {"num_faces": num_faces, "step": detection_seconds, "ranges": sorted(ranges), **track_key_settings()}
+    track, track_file = load_track(input_file, settings, tracks_dir=workspace.tracks, hasher=quick_file_hash)
+    if track is not None:
+        print(f"Usando análise da fonte em cache: {track_file}")
+        return track, segment_starts
+
+    track = analyze_source(input_file, ranges, lambda frame: detect(frame, num_faces), detection_seconds, max_faces=num_faces)
+    if use_track_cache:
+        track.save(track_file)
+    return track, segment_starts
+
+def generate_short_ffmpeg(input_file, index, num_faces, video_codec=None, use_track_cache=True, source_track=None, source_start=0.0, detection_seconds=5, smoothing_seconds=1.0, zoom_out_factor=2.5, subtitle_file=None, profile="standard", aspects=(PRIMARY_ASPECT,), workspace=None):
+    # Backend de filtros do ffmpeg: só a detecção roda em Python, o render é uma chamada do ffmpeg
+    try:
+        tolerance = detection_seconds / 2
+        if source_track is not None:
+            lookup = lambda t: source_track.at(source_start + t, tolerance=tolerance)
+        else:
+            track_settings = {"num_faces": num_faces, "step": detection_seconds, **track_key_settings()}
+            track, track_file = load_track(input_file, track_settings, tracks_dir=resolve(workspace).tracks) if use_track_cache else (None, None)
+            if track is not None:
+                print(f"Usando trilha de rostos em cache: {track_file}")
             else:
-                print("Por favor, defina num_faces como 1 ou 2.")
+                track = analyze_source(input_file, [(0.0, float("inf"))], lambda frame: detect(frame, num_faces), detection_seconds, max_faces=num_faces)
+                if use_track_cache:
+                    track.save(track_file)
+            lookup = lambda t: track.at(t, tolerance=tolerance)
+
+        # Detecção e decodificação compartilhadas: uma chamada do ffmpeg com um ramo do grafo por formato
+        outputs = [(final_output_path(index, subtitle_file, aspect, workspace), ASPECT_TARGETS[aspect]) for aspect in aspects]
+        results = render_short(input_file, outputs, num_faces, lookup, detection_seconds=detection_seconds, smoothing_seconds=smoothing_seconds, zoom_out_factor=zoom_out_factor, video_codec=video_codec, subtitle_file=subtitle_file, profile=profile, work_dir=resolve(workspace).tmp)
+        if not results:
+            return None
+        for final_output in results:
+            print(f"Arquivo final gerado em: {final_output}")
+        return results[0]
+
+    except Exception as e:
+        print(f"Erro durante o processamento do vídeo: {str(e)}")
+
+def _init_worker():
+    # Evita que cada worker dispare vários threads do OpenCV competindo pelos mesmos núcleos
+    cv2.setNumThreads(1)
+    load_models()
+
+def worker_pool(max_workers):
+    # spawn: com fork os workers herdariam os grafos do MediaPipe já carregados no pai (job_runner com
+    # warm=True, source_analysis), que têm threads internas e travam ou corrompem estado no filho
+    return ProcessPoolExecutor(max_workers=max_workers, mp_context=multiprocessing.get_context("spawn"), initializer=_init_worker)
+
+def edit_one(index, backend="opencv", subtitles_dir=None, workspace=None, **options):
+    # Reenquadra um único segmento (usado pelo edit() e pelo agendador por segmento)
+    workspace = resolve(workspace)
+    if subtitles_dir:
+        # Modo fundido: a legenda ASS deste corte é queimada no mesmo encode do reenquadramento
+        subtitle_file = os.path.join(subtitles_dir, f"{workspace.final_name(index)}.ass")
+        if os.path.exists(subtitle_file):
+            options["subtitle_file"] = subtitle_file
         else:
-            print(f"Processamento completo até {index - 1} arquivos.")
-            break
+            print(f"Legenda não encontrada para o segmento {index}, gerando sem legenda.")
+    input_file = workspace.original_scale(index)
+    start = time.time()
+    if backend == "ffmpeg":
+        result = generate_short_ffmpeg(input_file, index, workspace=workspace, **options)
+    else:
+        result = generate_short(input_file, index, workspace=workspace, **options)
+    print(f"Segmento {index} renderizado com o backend {backend} em {time.time() - start:.1f}s")
+    return result
 
+def _process_index(job):
+    index, options = job
+    result = edit_one(index, **options)
+    # Os contadores da cascata vivem em cada processo; devolve os deste segmento para serem somados
+    return result, detector_cascade.stats.snapshot(reset=True)
+
+def edit(workers=1, num_faces=2, video_codec=None, use_track_cache=True, source_analysis=False, detection_seconds=5, smoothing_seconds=1.0, zoom_out_factor=2.5, backend="opencv", subtitles_dir=None, profile="standard", aspects=(PRIMARY_ASPECT,), workspace=None, keep_models=False):
+    workspace = resolve(workspace)
+    # Verificar se o número de rostos é válido
+    if num_faces not in [1, 2]:
+        print("Por favor, defina num_faces como 1 ou 2.")
+        return []
+
+    # Listar os segmentos disponíveis em ordem
+    indices = []
+    index = 0
+    while os.path.exists(workspace.original_scale(index)):
+        indices.append(index)
         index += 1
 
+    if video_codec is None:
+        video_codec = encoders.select_encoder()
+
+    unknown = [aspect for aspect in aspects if aspect not in ASPECT_TARGETS]
+    if unknown:
+        print(f"Formatos desconhecidos: {', '.join(unknown)}. Use {', '.join(ASPECT_TARGETS)}.")
+        return []
+
+    cascade_stats = detector_cascade.CascadeStats()
+    source_track = None
+    segment_starts = {}
+    if source_analysis:
+        source_track, segment_starts = build_source_track(indices, num_faces, detection_seconds, use_track_cache, workspace)
+        cascade_stats.merge(detector_cascade.stats.snapshot(reset=True))
+
+    options = {
+        "num_faces": num_faces,
+        "video_codec": video_codec,
+        "use_track_cache": use_track_cache,
+        "source_track": source_track,
+        "detection_seconds": detection_seconds,
+        "smoothing_seconds": smoothing_seconds,
+        "zoom_out_factor": zoom_out_factor,
+        "backend": backend,
+        "subtitles_dir": subtitles_dir,
+        "profile": profile,
+        "aspects": tuple(aspects),
+        "workspace": workspace,
+    }
+    jobs = [(index, {**options, "source_start": segment_starts.get(index, 0.0)}) for index in indices]
+
+    if workers > 1 and len(jobs) > 1:
+        # Cada worker carrega os modelos do MediaPipe uma vez e os reaproveita entre os segmentos
+        print(f"Processando {len(jobs)} segmentos com {workers} workers.")
+        with worker_pool(min(workers, len(jobs))) as executor:
+            outputs = list(executor.map(_process_index, jobs))
+    else:
+        outputs = [_process_index(job) for job in jobs]
+        if not keep_models:
+            # keep_models: processos de longa duração (workers do job_runner) mantêm os modelos entre os jobs
+            release_models()
+
+    results = []
+    for result, segment_stats in outputs:
+        results.append(result)
+        cascade_stats.merge(segment_stats)
+    if cascade_stats.stages:
+        print(cascade_stats.report())
+
+    print(f"Processamento completo até {len(indices) - 1} arquivos.")
+    return results
+
 if __name__ == "__main__":
-    edit()
\ No newline at end of file
+    edit()
@@ -0,0 +1,177 @@
+import json
+import os
+import shutil
+import subprocess
+from functools import lru_cache
+
+# Registro central de encoders: descobre uma vez o que o ffmpeg do host suporta e traduz
+# perfis de qualidade/velocidade em flags concretas para cada encoder disponível.
+
+PROFILES = ("draft", "standard", "archive")
+
+ENCODER_PROFILES = {
+    "libx264": {
+        "draft": ["-preset", "ultrafast", "-crf", "23"],
+        "standard": ["-preset", "veryfast", "-crf", "23"],
+        "archive": ["-preset", "slow", "-crf", "18"],
+    },
+    "libx265": {
+        "draft": ["-preset", "ultrafast", "-crf", "28"],
+        "standard": ["-preset", "fast", "-crf", "26"],
+        "archive": ["-preset", "slow", "-crf", "22"],
+    },
+    "h264_nvenc": {
+        "draft": ["-preset", "p1", "-b:v", "5M"],
+        "standard": ["-preset", "p4", "-rc", "vbr", "-cq", "23", "-b:v", "0"],
+        "archive": ["-preset", "p7", "-rc", "vbr", "-cq", "19", "-b:v", "0"],
+    },
+    "hevc_nvenc": {
+        "draft": ["-preset", "p1", "-b:v", "4M"],
+        "standard": ["-preset", "p4", "-rc", "vbr", "-cq", "26", "-b:v", "0"],
+        "archive": ["-preset", "p7", "-rc", "vbr", "-cq", "22", "-b:v", "0"],
+    },
+    "h264_qsv": {
+        "draft": ["-preset", "veryfast", "-global_quality", "28"],
+        "standard": ["-preset", "medium", "-global_quality", "23"],
+        "archive": ["-preset", "veryslow", "-global_quality", "19"],
+    },
+    "hevc_qsv": {
+        "draft": ["-preset", "veryfast", "-global_quality", "30"],
+        "standard": ["-preset", "medium", "-global_quality", "26"],
+        "archive": ["-preset", "veryslow", "-global_quality", "22"],
+    },
+    "h264_vaapi": {
+        "draft": ["-qp", "28"],
+        "standard": ["-qp", "23"],
+        "archive": ["-qp", "19"],
+    },
+    "hevc_vaapi": {
+        "draft": ["-qp", "30"],
+        "standard": ["-qp", "26"],
+        "archive": ["-qp", "22"],
+    },
+}
+
+# Ordem de preferência por codec (hardware primeiro, software como último recurso)
+PREFERENCE = {
+    "h264": ["h264_nvenc", "h264_qsv", "h264_vaapi", "libx264"],
+    "hevc": ["hevc_nvenc", "hevc_qsv", "hevc_vaapi", "libx265"],
+}
+
+SOFTWARE_ENCODERS = {"libx264", "libx265"}
+VAAPI_DEVICE = os.environ.get("VIRALCUTTER_VAAPI_DEVICE", "/dev/dri/renderD128")
+CAPABILITIES_FILE = os.path.join("tmp", "ffmpeg_capabilities.json")
+
+def _run(args):
+    try:
+        return subprocess.run(args, capture_output=True, text=True).stdout
+    except (OSError, subprocess.SubprocessError):
+        return ""
+
+def _ffmpeg_id(ffmpeg):
+    # Identifica o binário (caminho + mtime) para invalidar o cache em disco quando o ffmpeg muda
+    path = shutil.which(ffmpeg) or ffmpeg
+    try:
+        return f"{path}:{os.path.getmtime(path)}"
+    except OSError:
+        return path
+
+def _encoder_works(ffmpeg, encoder):
+    # Um encode de teste de 1 frame: builds estáticos listam NVENC/QSV/VAAPI mesmo sem o hardware
+    command = [ffmpeg, "-hide_banner", "-loglevel", "error"]
+    command.extend(input_args(encoder))
+    command.extend(["-f", "lavfi", "-i", "color=c=black:s=256x256:d=0.1", "-frames:v", "1"])
+    video_filter = filters(encoder)
+    if video_filter:
+        command.extend(["-vf", video_filter])
+    command.extend(["-c:v", encoder, "-f", "null", "-"])
+    try:
+        return subprocess.run(command, capture_output=True, text=True, timeout=30).returncode == 0
+    except (OSError, subprocess.SubprocessError):
+        return False
+
+@lru_cache(maxsize=None)
+def probe(ffmpeg="ffmpeg"):
+    """
+    Encoders, hwaccels e versão do ffmpeg, além dos encoders de hardware que realmente funcionam
+    neste host. Calculado uma vez por processo e guardado em tmp/ para os próximos processos.
+    """
+    ffmpeg_id = _ffmpeg_id(ffmpeg)
+    if os.path.exists(CAPABILITIES_FILE):
+        try:
+            with open(CAPABILITIES_FILE, "r", encoding="utf-8") as f:
+                cached = json.load(f)
+            if cached.get("ffmpeg_id") == ffmpeg_id:
+                return cached
+        except (json.JSONDecodeError, OSError):
+            pass
+
+    version_output = _run([ffmpeg, "-hide_banner", "-version"])
+    encoders_output = _run([ffmpeg, "-hide_banner", "-encoders"])
+    hwaccels_output = _run([ffmpeg, "-hide_banner", "-hwaccels"])
+
+    encoders = sorted(name for name in ENCODER_PROFILES if f" {name} " in encoders_output)
+    hwaccels = [line.strip() for line in hwaccels_output.splitlines()[1:] if line.strip()]
+    usable = [name for name in encoders if name in SOFTWARE_ENCODERS or _encoder_works(ffmpeg, name)]
+
+    capabilities = {
+        "ffmpeg_id": ffmpeg_id,
+        "version": version_output.splitlines()[0] if version_output else None,
+        "encoders": encoders,
+        "hwaccels": hwaccels,
+        "usable": usable,
+    }
+    if capabilities["version"] is None:
+        return capabilities  # ffmpeg não encontrado: não grava em disco para tentar de novo no próximo processo
+    try:
+        os.makedirs(os.path.dirname(CAPABILITIES_FILE), exist_ok=True)
+        with open(CAPABILITIES_FILE, "w", encoding="utf-8") as f:
+            json.dump(capabilities, f, indent=2)
+    except OSError:
+        pass
+    return capabilities
+
+def select_encoder(codec="h264", prefer_hardware=True):
+    usable = probe()["usable"]
+    candidates = PREFERENCE.get(codec, PREFERENCE["h264"])
+    if not prefer_hardware:
+        candidates = [name for name in candidates if name in SOFTWARE_ENCODERS]
+    for name in candidates:
+        if name in usable:
+            return name
+    return candidates[-1]
+
+def input_args(encoder):
+    # Argumentos antes do -i (dispositivo de hardware)
+    if encoder.endswith("_vaapi"):
+        return ["-vaapi_device", VAAPI_DEVICE]
+    return []
+
+def filters(encoder, video_filter=None):
+    # Acrescenta o upload para a GPU quando o encoder precisa (VAAPI) a uma cadeia de filtros existente
+    if encoder.endswith("_vaapi"):
+        return f"{video_filter},format=nv12,hwupload" if video_filter else "format=nv12,hwupload"
+    return video_filter
+
+def video_args(encoder=None, profile="standard"):
+    # -c:v + flags do perfil + formato de pixel adequado ao encoder
+    encoder = encoder or select_encoder()
+    if profile not in PROFILES:
+        raise ValueError(f"Perfil desconhecido: {profile}. Use um de {PROFILES}.")
+    args = ["-c:v", encoder] + ENCODER_PROFILES.get(encoder, {}).get(profile, [])
+    if encoder.endswith("_qsv"):
+        args.extend(["-pix_fmt", "nv12"])
+    elif not encoder.endswith("_vaapi"):
+        args.extend(["-pix_fmt", "yuv420p"])
+    return args
+
+def describe():
+    capabilities = probe()
+    return (f"ffmpeg: {capabilities['version']}\n"
+            f"Encoders conhecidos: {', '.join(capabilities['encoders']) or 'nenhum'}\n"
+            f"Encoders utilizáveis: {', '.join(capabilities['usable']) or 'nenhum'}\n"
+            f"Hwaccels: {', '.join(capabilities['hwaccels']) or 'nenhum'}\n"
+            f"Encoder padrão: {select_encoder()}")
+
+if __name__ == "__main__":
+    print(describe())
@@ -0,0 +1,176 @@
+import hashlib
+import json
+import os
+import zipfile
+import cv2
+import numpy as np
+
+# Pasta padrão das trilhas de detecção (uma .npz por segmento + configuração do detector);
+# com um workspace, as trilhas ficam em workspace.tracks
+TRACKS_DIR = "tmp/tracks"
+# Trilhas mantidas por pasta; as usadas há mais tempo são removidas ao gravar uma nova
+TRACKS_MAX_FILES = int(os.environ.get("VIRALCUTTER_TRACKS_MAX_FILES", "500"))
+
+def file_hash(path, chunk_size=1 << 20):
+    sha1 = hashlib.sha1()
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(chunk_size), b""):
+            sha1.update(chunk)
+    return sha1.hexdigest()
+
+def quick_file_hash(path, sample_size=1 << 20):
+    # Para vídeos fonte grandes: tamanho + início + fim do arquivo, sem ler gigabytes
+    sha1 = hashlib.sha1(str(os.path.getsize(path)).encode("utf-8"))
+    with open(path, "rb") as f:
+        sha1.update(f.read(sample_size))
+        f.seek(max(0, os.path.getsize(path) - sample_size))
+        sha1.update(f.read(sample_size))
+    return sha1.hexdigest()
+
+def track_path(input_file, settings, tracks_dir=TRACKS_DIR, hasher=file_hash):
+    # A chave combina o conteúdo do vídeo com as configurações do detector,
+    # assim qualquer mudança em um dos dois gera uma nova trilha
+    key = hashlib.sha1((hasher(input_file) + json.dumps(settings, sort_keys=True)).encode("utf-8")).hexdigest()[:16]
+    base_name = os.path.splitext(os.path.basename(input_file))[0]
+    return os.path.join(tracks_dir, f"{base_name}-{key}.npz")
+
+class FaceTrack:
+    """
+    Trilha de detecções indexada por tempo (segundos). Cada amostra guarda até max_faces caixas
+    (x, y, w, h); amostras sem detecção ficam com count 0.
+    """
+
+    def __init__(self, max_faces=2):
+        self.max_faces = max_faces
+        self.times = []
+        self.boxes = []
+        self.counts = []
+        self._times_array = None
+
+    def add(self, time, detections):
+        boxes = np.zeros((self.max_faces, 4), dtype=np.int32)
+        count = 0
+        if detections is not None:
+            count = min(len(detections), self.max_faces)
+            if count:
+                boxes[:count] = np.asarray(detections[:count], dtype=np.int32)
+        self.times.append(float(time))
+        self.boxes.append(boxes)
+        self.counts.append(count)
+        self._times_array = None
+
+    def __len__(self):
+        return len(self.times)
+
+    def at(self, time, tolerance):
+        # Retorna as detecções da amostra mais próxima de time, ou None se não houver nenhuma perto
+        if not self.times:
+            return None
+        if self._times_array is None:
+            self._times_array = np.asarray(self.times)
+        times = self._times_array
+        i = int(np.searchsorted(times, time))
+        candidates = [j for j in (i - 1, i) if 0 <= j < len(times)]
+        j = min(candidates, key=lambda k: abs(times[k] - time))
+        if abs(times[j] - time) > tolerance or self.counts[j] == 0:
+            return None
+        return self.boxes[j][:self.counts[j]].copy()
+
+    def save(self, path):
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        # Grava num arquivo temporário e troca no fim: um crash no meio não deixa uma .npz truncada no lugar da trilha
+        tmp_file = f"{path}.{os.getpid()}.tmp"
+        with open(tmp_file, "wb") as f:
+            np.savez_compressed(
+                f,
+                times=np.asarray(self.times, dtype=np.float64),
+                boxes=np.asarray(self.boxes, dtype=np.int32).reshape(-1, self.max_faces, 4),
+                counts=np.asarray(self.counts, dtype=np.int8),
+            )
+        os.replace(tmp_file, path)
+        evict_tracks(os.path.dirname(path) or ".", keep=path)
+        return path
+
+    @classmethod
+    def load(cls, path):
+        with np.load(path) as data:
+            track = cls(max_faces=data["boxes"].shape[1])
+            track.times = data["times"].tolist()
+            track.boxes = list(data["boxes"])
+            track.counts = data["counts"].tolist()
+        return track
+
+def load_track(input_file, settings, tracks_dir=TRACKS_DIR, hasher=file_hash):
+    path = track_path(input_file, settings, tracks_dir, hasher)
+    if os.path.exists(path):
+        try:
+            track = FaceTrack.load(path)
+        except (OSError, ValueError, KeyError, EOFError, zipfile.BadZipFile) as e:
+            # Trilha ilegível (gravada por uma versão antiga sem a troca atômica): descarta e detecta de novo
+            print(f"Trilha de rostos corrompida, ignorando: {path} ({e})")
+            os.remove(path)
+            return None, path
+        os.utime(path)  # Marca como usada recentemente para o despejo
+        return track, path
+    return None, path
+
+def evict_tracks(tracks_dir, max_files=TRACKS_MAX_FILES, keep=None):
+    # Remove as trilhas usadas há mais tempo (mtime) até sobrarem max_files
+    paths = [os.path.join(tracks_dir, name) for name in os.listdir(tracks_dir) if name.endswith(".npz")]
+    excess = len(paths) - max_files
+    if excess <= 0:
+        return
+    for path in sorted(paths, key=os.path.getmtime):
+        if excess <= 0:
+            break
+        if path == keep:
+            continue
+        try:
+            os.remove(path)
+        except FileNotFoundError:
+            pass  # Outro worker já removeu
+        excess -= 1
+
+def merge_ranges(ranges):
+    # Une intervalos (start, end) sobrepostos ou encostados
+    merged = []
+    for start, end in sorted(ranges):
+        if merged and start <= merged[-1][1]:
+            merged[-1][1] = max(merged[-1][1], end)
+        else:
+            merged.append([start, end])
+    return [(start, end) for start, end in merged]
+
+def analyze_source(input_file, ranges, detect_fn, step, max_faces=2):
+    """
+    Passa uma única vez pelo vídeo fonte, apenas na união dos intervalos pedidos, e detecta
+    rostos numa grade global de tempo (múltiplos de step). Cortes que se sobrepõem compartilham
+    as mesmas amostras em vez de analisar os mesmos frames várias vezes.
+    """
+    track = FaceTrack(max_faces=max_faces)
+    cap = cv2.VideoCapture(input_file)
+    if not cap.isOpened():
+        print(f"Erro ao abrir o vídeo: {input_file}")
+        return track
+
+    fps = cap.get(cv2.CAP_PROP_FPS) or 30.0
+    for start, end in merge_ranges(ranges):
+        # Começa na amostra da grade imediatamente antes do intervalo, para cobrir o início do corte
+        next_sample = np.floor(start / step) * step
+        cap.set(cv2.CAP_PROP_POS_MSEC, next_sample * 1000)
+        while next_sample <= end:
+            position = cap.get(cv2.CAP_PROP_POS_MSEC) / 1000
+            if position + 0.5 / fps < next_sample:
+                # Frame intermediário: só avança o decoder, sem converter o frame
+                if not cap.grab():
+                    break
+                continue
+            ret, frame = cap.read()
+            if not ret or frame is None:
+                break
+            track.add(next_sample, detect_fn(frame))
+            next_sample += step
+
+    cap.release()
+    print(f"Análise da fonte concluída: {len(track)} amostras em {len(merge_ranges(ranges))} intervalos.")
+    return track
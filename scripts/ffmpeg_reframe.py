@@ -0,0 +1,166 @@
+import os
+import subprocess
+import cv2
+from scripts.render_plan import RenderPlan
+from scripts.virtual_camera import VirtualCamera
+from scripts.ffmpeg_writer import subtitles_filter
+from scripts import encoders
+
+# Backend de reenquadramento via filtros do ffmpeg: a trilha de rostos vira um script de
+# comandos (sendcmd) que move os filtros crop ao longo do tempo, e o short inteiro é
+# renderizado numa única chamada do ffmpeg, sem decodificar/codificar frames em Python.
+
+def even(value):
+    return max(2, int(value) - int(value) % 2)
+
+def crop_state(plan, faces):
+    # Estado dos filtros para um frame: None = padding, senão os retângulos de corte
+    if faces is None:
+        return None
+    if plan.num_faces == 2:
+        return tuple(plan.two_face_rect(face) for face in faces[:2])
+    return (plan.single_face_rect(faces[0]),)
+
+def state_commands(plan, state, name="a0"):
+    # name: prefixo dos filtros do ramo de um formato (crop@a0c0, streamselect@a0sel...)
+    if state is None:
+        return [f"streamselect@{name}sel map 1"]
+    commands = [f"streamselect@{name}sel map 0"]
+    for k, (x, y, w, h) in enumerate(state):
+        if plan.num_faces == 2:
+            commands.extend([f"crop@{name}c{k} w {even(w)}", f"crop@{name}c{k} h {even(h)}"])
+        commands.extend([f"crop@{name}c{k} x {x}", f"crop@{name}c{k} y {y}"])
+    return commands
+
+def build_commands(plans, lookup, total_frames, fps, detection_interval, smoothing_seconds):
+    """
+    Simula a mesma câmera virtual do backend OpenCV, frame a frame, uma vez para todos os formatos,
+    e gera comandos apenas quando o corte de algum formato muda. Retorna os estados iniciais
+    (um por plano) e as linhas do script do sendcmd.
+    """
+    num_faces = plans[0].num_faces
+    camera = VirtualCamera(num_faces, fps, smoothing_seconds=smoothing_seconds)
+    initial_states = [None] * len(plans)
+    last_states = ["inicio"] * len(plans)
+    lines = []
+
+    for frame_index in range(total_frames):
+        if frame_index % detection_interval == 0:
+            detections = lookup(frame_index / fps)
+            if detections is not None and len(detections) == num_faces:
+                camera.update(detections)
+            else:
+                camera.miss()
+
+        faces = camera.step()
+        commands = []
+        for i, plan in enumerate(plans):
+            state = crop_state(plan, faces)
+            if state == last_states[i]:
+                continue
+            if frame_index == 0:
+                initial_states[i] = state
+            else:
+                commands.extend(state_commands(plan, state, f"a{i}"))
+            last_states[i] = state
+        if commands:
+            lines.append(f"{frame_index / fps:.4f} " + ", ".join(commands) + ";")
+
+    return initial_states, lines
+
+def branch_graph(plan, initial_state, name, tail):
+    # Ramo de um formato: [name] -> crops/padding -> streamselect -> [nameout]
+    out_w, out_h = plan.out_width, plan.out_height
+    if initial_state is None:
+        # Sem rosto no primeiro frame: os crops começam no centro até o primeiro comando
+        if plan.num_faces == 2:
+            initial_state = ((0, 0, even(plan.frame_width), even(plan.frame_height // 2)),) * 2
+        else:
+            initial_state = ((max(0, (plan.frame_width - plan.crop_width) // 2), max(0, (plan.frame_height - plan.crop_height) // 2), plan.crop_width, plan.crop_height),)
+        initial_map = 1
+    else:
+        initial_map = 0
+
+    pad_w, pad_h = even(plan.pad_width), even(plan.pad_height)
+    n = plan.num_faces
+    graph = [f"[{name}]split={n + 1}" + "".join(f"[{name}c{k}]" for k in range(n)) + f"[{name}p]"]
+
+    if n == 2:
+        # Metades com altura par (4x5: 674 + 676): com altura ímpar o vstack em yuv420p corrompe a memória do ffmpeg
+        top = even(out_h // 2)
+        for k, (x, y, w, h) in enumerate(initial_state):
+            graph.append(f"[{name}c{k}]crop@{name}c{k}=w={even(w)}:h={even(h)}:x={x}:y={y},scale={out_w}:{(top, out_h - top)[k]},setsar=1[{name}f{k}]")
+        graph.append(f"[{name}f0][{name}f1]vstack=inputs=2[{name}vc]")
+    else:
+        x, y, w, h = initial_state[0]
+        graph.append(f"[{name}c0]crop@{name}c0=w={w}:h={h}:x={x}:y={y},scale={out_w}:{out_h}:flags=area,setsar=1[{name}vc]")
+
+    graph.append(f"[{name}p]scale={pad_w}:{pad_h}:flags=area,pad={out_w}:{out_h}:(ow-iw)/2:(oh-ih)/2:black,setsar=1[{name}vp]")
+    if tail:
+        graph.append(f"[{name}vc][{name}vp]streamselect@{name}sel=inputs=2:map={initial_map}[{name}vs]")
+        graph.append(f"[{name}vs]{','.join(tail)}[{name}out]")
+    else:
+        graph.append(f"[{name}vc][{name}vp]streamselect@{name}sel=inputs=2:map={initial_map}[{name}out]")
+    return graph
+
+def build_filter_graph(plans, initial_states, commands_file, subtitle_file=None, output_filter=None):
+    # Um único sendcmd e um split por formato: o vídeo é decodificado uma vez para todas as saídas ([a0out], [a1out]...)
+    # Sem comandos (o corte nunca muda) o sendcmd fica de fora: ele recusa um script vazio
+    commands_path = commands_file.replace("\\", "/") if commands_file else None
+    head = f"sendcmd=f='{commands_path}'," if commands_path else ""
+    graph = [f"[0:v]{head}split={len(plans)}" + "".join(f"[a{i}]" for i in range(len(plans)))]
+    # Filtros depois da seleção: legenda queimada e/ou upload para o encoder de hardware
+    tail = [f for f in (subtitles_filter(subtitle_file) if subtitle_file else None, output_filter) if f]
+    for i, (plan, initial_state) in enumerate(zip(plans, initial_states)):
+        graph.extend(branch_graph(plan, initial_state, f"a{i}", tail))
+    return ";\n".join(graph)
+
+def render_short(input_file, outputs, num_faces, lookup, detection_seconds=5, smoothing_seconds=1.0, zoom_out_factor=2.5, video_codec=None, work_dir="tmp", subtitle_file=None, profile="standard"):
+    """
+    Renderiza o short em todos os formatos pedidos numa única chamada do ffmpeg.
+    outputs: lista de (arquivo de saída, (largura, altura)). Retorna a lista de arquivos ou None.
+    """
+    video_codec = video_codec or encoders.select_encoder()
+    cap = cv2.VideoCapture(input_file)
+    if not cap.isOpened():
+        print(f"Erro ao abrir o vídeo: {input_file}")
+        return None
+    fps = cap.get(cv2.CAP_PROP_FPS)
+    frame_width = int(cap.get(cv2.CAP_PROP_FRAME_WIDTH))
+    frame_height = int(cap.get(cv2.CAP_PROP_FRAME_HEIGHT))
+    total_frames = int(cap.get(cv2.CAP_PROP_FRAME_COUNT))
+    cap.release()
+
+    plans = [RenderPlan(frame_width, frame_height, num_faces, out_size=out_size, zoom_out_factor=zoom_out_factor) for _, out_size in outputs]
+    detection_interval = max(1, int(detection_seconds * fps))
+    initial_states, lines = build_commands(plans, lookup, total_frames, fps, detection_interval, smoothing_seconds)
+
+    base_name = os.path.splitext(os.path.basename(input_file))[0]
+    commands_file = os.path.join(work_dir, f"{base_name}_reframe.cmd")
+    graph_file = os.path.join(work_dir, f"{base_name}_reframe.filter")
+    if lines:
+        with open(commands_file, "w", encoding="utf-8") as f:
+            f.write("\n".join(lines) + "\n")
+    else:
+        commands_file = None
+    with open(graph_file, "w", encoding="utf-8") as f:
+        f.write(build_filter_graph(plans, initial_states, commands_file, subtitle_file, encoders.filters(video_codec)))
+
+    command = [
+        "ffmpeg", "-y",
+        *encoders.input_args(video_codec),
+        "-i", input_file,
+        "-filter_complex_script", graph_file,
+    ]
+    for i, (final_output, _) in enumerate(outputs):
+        # Cada saída tem seu próprio -map/encoder; o áudio do segmento vai para todas
+        command.extend(["-map", f"[a{i}out]", "-map", "0:a?"])
+        command.extend(encoders.video_args(video_codec, profile))
+        command.extend(["-c:a", "aac", "-b:a", "192k", "-movflags", "+faststart", final_output])
+
+    print(f"Renderizando com filtros do ffmpeg: {', '.join(output for output, _ in outputs)} ({len(lines)} comandos)")
+    result = subprocess.run(command, capture_output=True, text=True)
+    if result.returncode != 0:
+        print(f"Erro ao renderizar com ffmpeg: {result.stderr}")
+        return None
+    return [output for output, _ in outputs]
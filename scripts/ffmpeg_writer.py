@@ -0,0 +1,83 @@
+import os
+import subprocess
+import tempfile
+from scripts import encoders
+
+def subtitles_filter(subtitle_file):
+    # Caminho da legenda no formato que o filtro subtitles do ffmpeg espera
+    path = subtitle_file.replace('\\', '/')
+    return f"subtitles='{path}'"
+
+class FFmpegWriter:
+    """
+    Substituto do cv2.VideoWriter: envia os frames BGR pelo stdin de um único ffmpeg,
+    que codifica o vídeo uma vez e já faz o mux com o áudio do segmento original.
+    """
+
+    def __init__(self, output_file, fps, frame_size, audio_source=None, video_codec=None, subtitle_file=None, profile="standard"):
+        width, height = frame_size
+        self.output_file = output_file
+        self.video_codec = video_codec or encoders.select_encoder()
+
+        command = [
+            "ffmpeg", "-y",
+            "-loglevel", "error",
+            *encoders.input_args(self.video_codec),
+            "-f", "rawvideo",
+            "-pix_fmt", "bgr24",
+            "-s", f"{width}x{height}",
+            "-r", str(fps),
+            "-i", "-",
+        ]
+        if audio_source:
+            command.extend(["-i", audio_source, "-map", "0:v:0", "-map", "1:a:0?"])
+        # Legenda queimada no mesmo encode que gera o vídeo final
+        video_filter = encoders.filters(self.video_codec, subtitles_filter(subtitle_file) if subtitle_file else None)
+        if video_filter:
+            command.extend(["-vf", video_filter])
+        command.extend(encoders.video_args(self.video_codec, profile))
+        if audio_source:
+            command.extend(["-c:a", "aac", "-b:a", "192k", "-shortest"])
+        command.extend(["-movflags", "+faststart", output_file])
+
+        self.command = command
+        # stderr vai para um arquivo temporário: um pipe que ninguém lê enche com os avisos do ffmpeg
+        # e trava o encode (e o write() dos frames) até o fim do segmento
+        self.stderr_file = tempfile.TemporaryFile()
+        self.process = subprocess.Popen(command, stdin=subprocess.PIPE, stderr=self.stderr_file)
+
+    def write(self, frame):
+        # Evita a cópia de tobytes() quando o frame já é contíguo
+        self.process.stdin.write(frame.data if frame.flags['C_CONTIGUOUS'] else frame.tobytes())
+
+    def release(self):
+        try:
+            if self.process.stdin:
+                self.process.stdin.close()
+        except BrokenPipeError:
+            pass  # O ffmpeg já terminou com erro: o código de saída e o stderr abaixo dizem o motivo
+        returncode = self.process.wait()
+        self.stderr_file.seek(0)
+        stderr = self.stderr_file.read()
+        self.stderr_file.close()
+        if returncode != 0:
+            # Saída incompleta não pode passar por um short pronto
+            if os.path.exists(self.output_file):
+                os.remove(self.output_file)
+            raise RuntimeError(f"ffmpeg falhou ({returncode}) ao gerar {self.output_file}: {stderr.decode(errors='ignore')}")
+        return self.output_file
+
+    def abort(self):
+        # Erro no meio do loop de frames: encerra o ffmpeg (não fica um processo órfão esperando
+        # frames no stdin) e apaga o arquivo incompleto, que não pode passar por um short pronto
+        if self.process.poll() is None:
+            self.process.kill()
+        try:
+            if self.process.stdin:
+                self.process.stdin.close()
+        except BrokenPipeError:
+            pass
+        self.process.wait()
+        self.stderr_file.close()
+        if os.path.exists(self.output_file):
+            os.remove(self.output_file)
@@ -0,0 +1,167 @@
+import json
+import os
+import sqlite3
+import time
+import uuid
+from contextlib import contextmanager
+
+# Fila de jobs em SQLite, compartilhada pelo servidor HTTP, pelo CLI e pelos workers do job_runner.py
+QUEUE_FILE = os.environ.get("VIRALCUTTER_QUEUE", os.path.join("jobs", "queue.db"))
+
+# Estados de um job
+QUEUED = "na_fila"
+RUNNING = "executando"
+WAITING_SEGMENTS = "aguardando_segmentos"
+DONE = "concluido"
+FAILED = "falhou"
+STATUSES = (QUEUED, RUNNING, WAITING_SEGMENTS, DONE, FAILED)
+
+# Parâmetros aceitos em um job (settings sobrescreve as variáveis de configuração do main.py)
+JOB_FIELDS = ("source", "num_segments", "viral_mode", "themes", "segments", "settings")
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS jobs (
+    id TEXT PRIMARY KEY,
+    status TEXT NOT NULL,
+    params TEXT NOT NULL,
+    created REAL NOT NULL,
+    started REAL,
+    finished REAL,
+    worker TEXT,
+    attempts INTEGER NOT NULL DEFAULT 0,
+    error TEXT,
+    result TEXT
+)
+"""
+
+def validate(params):
+    # Normaliza os parâmetros de um job; ValueError com a mensagem para quem enviou
+    if not isinstance(params, dict):
+        raise ValueError("O job deve ser um objeto JSON.")
+    unknown = [key for key in params if key not in JOB_FIELDS]
+    if unknown:
+        raise ValueError(f"Campos desconhecidos: {', '.join(unknown)}. Use {', '.join(JOB_FIELDS)}.")
+    if not params.get("source"):
+        raise ValueError("Informe 'source' (URL ou caminho de um arquivo local).")
+    num_segments = params.get("num_segments", 3)
+    if not isinstance(num_segments, int) or num_segments < 1:
+        raise ValueError("'num_segments' deve ser um inteiro maior que 0.")
+    segments = params.get("segments")
+    if segments is not None and not (isinstance(segments, dict) and isinstance(segments.get("segments"), list)):
+        raise ValueError("'segments' deve estar no formato {\"segments\": [...]}.")
+    if not isinstance(params.get("settings", {}), dict):
+        raise ValueError("'settings' deve ser um objeto JSON.")
+    return {
+        "source": params["source"],
+        "num_segments": num_segments,
+        "viral_mode": bool(params.get("viral_mode", True)),
+        "themes": params.get("themes", ""),
+        "segments": segments,
+        "settings": params.get("settings", {}),
+    }
+
+def load_batch(path):
+    # Arquivo de lote: uma lista JSON de jobs, ou um job JSON por linha (linhas vazias e # são ignoradas)
+    with open(path, "r", encoding="utf-8") as f:
+        content = f.read()
+    if content.lstrip().startswith("["):
+        return json.loads(content)
+    return [json.loads(line) for line in content.splitlines() if line.strip() and not line.lstrip().startswith("#")]
+
+class JobQueue:
+    """
+    Fila persistente de jobs. Cada operação abre sua própria conexão, então a mesma fila pode ser
+    usada por vários processos; claim() pega o próximo job dentro de uma transação exclusiva, e
+    dois workers nunca recebem o mesmo job.
+    """
+
+    def __init__(self, path=QUEUE_FILE):
+        self.path = path
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        with self._connect() as conn:
+            conn.execute(SCHEMA)
+
+    @contextmanager
+    def _connect(self):
+        # Autocommit: cada UPDATE/INSERT já é gravado; claim() abre sua própria transação
+        conn = sqlite3.connect(self.path, timeout=30, isolation_level=None)
+        conn.row_factory = sqlite3.Row
+        try:
+            conn.execute("PRAGMA journal_mode=WAL")
+            yield conn
+        finally:
+            conn.close()
+
+    def _row(self, row):
+        if row is None:
+            return None
+        job = dict(row)
+        job["params"] = json.loads(job["params"])
+        job["result"] = json.loads(job["result"]) if job["result"] else None
+        return job
+
+    def submit(self, params):
+        params = validate(params)
+        job_id = time.strftime("%Y%m%d-%H%M%S-") + uuid.uuid4().hex[:6]
+        with self._connect() as conn:
+            conn.execute("INSERT INTO jobs (id, status, params, created) VALUES (?, ?, ?, ?)",
+                         (job_id, QUEUED, json.dumps(params, ensure_ascii=False), time.time()))
+        return job_id
+
+    def get(self, job_id):
+        with self._connect() as conn:
+            return self._row(conn.execute("SELECT * FROM jobs WHERE id = ?", (job_id,)).fetchone())
+
+    def list(self, status=None, limit=100):
+        with self._connect() as conn:
+            if status:
+                rows = conn.execute("SELECT * FROM jobs WHERE status = ? ORDER BY created DESC LIMIT ?", (status, limit))
+            else:
+                rows = conn.execute("SELECT * FROM jobs ORDER BY created DESC LIMIT ?", (limit,))
+            return [self._row(row) for row in rows.fetchall()]
+
+    def counts(self):
+        with self._connect() as conn:
+            counts = dict(conn.execute("SELECT status, COUNT(*) FROM jobs GROUP BY status").fetchall())
+        return {status: counts.get(status, 0) for status in STATUSES}
+
+    def claim(self, worker):
+        # Próximo job da fila (o mais antigo), já marcado como em execução por este worker
+        with self._connect() as conn:
+            conn.execute("BEGIN IMMEDIATE")
+            try:
+                row = conn.execute("SELECT id FROM jobs WHERE status = ? ORDER BY created LIMIT 1", (QUEUED,)).fetchone()
+                if row is not None:
+                    conn.execute("UPDATE jobs SET status = ?, started = ?, finished = NULL, worker = ?, attempts = attempts + 1, error = NULL WHERE id = ?",
+                                 (RUNNING, time.time(), worker, row["id"]))
+                conn.execute("COMMIT")
+            except BaseException:
+                conn.execute("ROLLBACK")
+                raise
+        return self.get(row["id"]) if row is not None else None
+
+    def finish(self, job_id, status, result=None, error=None):
+        with self._connect() as conn:
+            conn.execute("UPDATE jobs SET status = ?, finished = ?, error = ?, result = ? WHERE id = ?",
+                         (status, time.time(), error, json.dumps(result, ensure_ascii=False) if result is not None else None, job_id))
+
+    def provide_segments(self, job_id, segments):
+        # Segmentos escolhidos para um job que estava aguardando: volta para a fila
+        job = self.get(job_id)
+        if job is None:
+            raise KeyError(job_id)
+        if job["status"] != WAITING_SEGMENTS:
+            raise ValueError(f"O job {job_id} não está aguardando segmentos (estado: {job['status']}).")
+        params = validate({**job["params"], "segments": segments})
+        with self._connect() as conn:
+            conn.execute("UPDATE jobs SET status = ?, params = ? WHERE id = ?", (QUEUED, json.dumps(params, ensure_ascii=False), job_id))
+
+    def retry(self, job_id):
+        with self._connect() as conn:
+            updated = conn.execute("UPDATE jobs SET status = ? WHERE id = ? AND status = ?", (QUEUED, job_id, FAILED)).rowcount
+        return updated > 0
+
+    def requeue_stale(self):
+        # Jobs que ficaram "executando" quando o daemon anterior parou voltam para a fila
+        with self._connect() as conn:
+            return conn.execute("UPDATE jobs SET status = ?, worker = NULL WHERE status = ?", (QUEUED, RUNNING)).rowcount
@@ -0,0 +1,102 @@
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor
+import numpy as np
+import whisperx
+from scripts.asr_service import get_service, get_default_service, write_outputs
+
+SAMPLE_RATE = 16000
+
+def find_split_points(audio, chunk_seconds=120, search_seconds=10, frame_ms=30):
+    """
+    VAD por energia: divide o áudio perto de cada chunk_seconds, no trecho mais silencioso
+    (menor energia RMS) dentro de uma janela de ±search_seconds. Assim nenhum corte cai no
+    meio de uma fala e os chunks podem ser transcritos de forma independente.
+    """
+    frame = int(SAMPLE_RATE * frame_ms / 1000)
+    n_frames = len(audio) // frame
+    if n_frames == 0:
+        return [0, len(audio)]
+    energy = np.sqrt(np.mean(audio[:n_frames * frame].reshape(n_frames, frame) ** 2, axis=1))
+
+    chunk_frames = int(chunk_seconds * 1000 / frame_ms)
+    search_frames = int(search_seconds * 1000 / frame_ms)
+    points = [0]
+    target = chunk_frames
+    while target < n_frames - search_frames:
+        low = max(points[-1] // frame + 1, target - search_frames)
+        high = min(n_frames, target + search_frames)
+        quietest = low + int(np.argmin(energy[low:high]))
+        points.append(quietest * frame)
+        target = quietest + chunk_frames
+    points.append(len(audio))
+    return points
+
+def shift_result(result, offset):
+    # Desloca todos os tempos (segmentos e palavras) de um chunk para a linha do tempo do áudio inteiro
+    for segment in result.get("segments", []):
+        for key in ("start", "end"):
+            if key in segment:
+                segment[key] = round(segment[key] + offset, 3)
+        for word in segment.get("words", []):
+            for key in ("start", "end"):
+                if key in word:
+                    word[key] = round(word[key] + offset, 3)
+    return result
+
+def _init_worker(options):
+    # Cada worker carrega o modelo (int8) uma vez e o reaproveita em todos os chunks que receber
+    get_service(**options)
+
+def _detect_language(options, audio):
+    return get_service(**options).detect_language(audio)
+
+def _transcribe_chunk(job):
+    options, offset, audio, language = job
+    result = get_service(**options).transcribe(audio, language=language)
+    return shift_result(result, offset)
+
+def transcribe_parallel(input_file, output_folder='tmp', model='large-v3', workers=None, chunk_seconds=120,
+                        compute_type="int8", output_formats=("all",), compare=False):
+    """
+    Extrai o áudio a 16 kHz mono uma vez, divide nos silêncios e transcreve os chunks em um pool
+    de processos com pesos quantizados (int8). Os resultados são costurados numa única transcrição
+    com tempos consistentes e gravados nos mesmos formatos do caminho de processo único.
+    """
+    workers = workers or max(1, (os.cpu_count() or 2) // 2)
+    threads = max(1, (os.cpu_count() or workers) // workers)
+    options = {"model": model, "device": "cpu", "compute_type": compute_type, "batch_size": 10, "chunk_size": 10,
+               "vad_onset": 0.4, "vad_offset": 0.3, "threads": threads}
+
+    start_time = time.time()
+    audio = whisperx.load_audio(input_file)
+    duration = len(audio) / SAMPLE_RATE
+    points = find_split_points(audio, chunk_seconds=chunk_seconds)
+    chunks = list(zip(points[:-1], points[1:]))
+    print(f"Transcrevendo {duration / 60:.1f} minutos em {len(chunks)} chunks com {workers} workers ({threads} threads cada, {compute_type}).")
+
+    with ProcessPoolExecutor(max_workers=min(workers, len(chunks)), initializer=_init_worker, initargs=(options,)) as executor:
+        # Idioma detectado uma vez, no primeiro chunk: chunks curtos ou de música não trocam de idioma no meio do vídeo
+        language = executor.submit(_detect_language, options, audio[chunks[0][0]:chunks[0][1]]).result()
+        print(f"Idioma detectado: {language}")
+        jobs = [(options, start / SAMPLE_RATE, audio[start:end], language) for start, end in chunks]
+        results = list(executor.map(_transcribe_chunk, jobs))
+
+    merged = {"segments": [s for r in results for s in r.get("segments", [])], "language": language}
+    merged["word_segments"] = [w for s in merged["segments"] for w in s.get("words", [])]
+    write_outputs(merged, input_file, output_folder, output_formats)
+
+    elapsed = time.time() - start_time
+    report = {"duration": duration, "chunks": len(jobs), "workers": workers, "elapsed": elapsed,
+              "real_time_factor": elapsed / duration if duration else None}
+    print(f"Transcrição paralela concluída em {elapsed:.1f}s (fator de tempo real {report['real_time_factor'] or 0:.2f}).")
+
+    if compare:
+        # Mede o caminho atual (um processo, float32) sobre o mesmo áudio para calcular o ganho
+        single_start = time.time()
+        get_default_service(model).transcribe(audio)
+        report["single_process_elapsed"] = time.time() - single_start
+        report["speedup"] = report["single_process_elapsed"] / elapsed
+        print(f"Processo único: {report['single_process_elapsed']:.1f}s. Ganho do modo paralelo: {report['speedup']:.2f}x.")
+
+    return report
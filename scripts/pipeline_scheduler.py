@@ -0,0 +1,141 @@
+import json
+import os
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from scripts import cut_segments, detector_cascade, edit_video, transcribe_cuts, adjust_subtitles, burn_subtitles, download_video
+from scripts.aspects import PRIMARY_ASPECT
+from scripts.workspace import resolve
+
+# Limites padrão de concorrência por estágio. Corte e burn são processos do ffmpeg (threads bastam),
+# o reenquadramento roda Python por frame e vai para um pool de processos.
+DEFAULT_CONCURRENCY = {"cut": 2, "reframe": max(1, (os.cpu_count() or 2) // 2), "subtitle": 2, "burn": 2}
+
+class PipelineScheduler:
+    """
+    Agendador por segmento: cada corte passa por cut -> reframe -> subtitle -> burn de forma
+    independente, com um pool limitado por estágio. Assim o segmento 0 já pode estar queimando
+    legendas enquanto o segmento 5 ainda está sendo reenquadrado.
+    """
+
+    def __init__(self, segments, edit_options=None, subtitle_style=None, concurrency=None, input_file=None, fused_burn=False, source_url=None, max_height=1080, workspace=None):
+        self.workspace = resolve(workspace)
+        self.segments = segments
+        self.edit_options = {**(edit_options or {}), "workspace": self.workspace}
+        self.subtitle_style = subtitle_style
+        self.concurrency = {**DEFAULT_CONCURRENCY, **(concurrency or {})}
+        self.input_file = input_file or self.workspace.input_video
+        # Modo áudio primeiro: o estágio de corte baixa só o trecho do segmento antes de cortar
+        self.source_url = source_url
+        self.max_height = max_height
+        self.video_codec = cut_segments.detect_video_codec()
+
+        self.transcript = None
+        if subtitle_style is not None and os.path.exists(self.workspace.input_path('json')):
+            with open(self.workspace.input_path('json'), 'r', encoding='utf-8') as f:
+                self.transcript = json.load(f)
+
+        self.stages = [("cut", self.cut), ("reframe", self.reframe)]
+        if subtitle_style is not None and fused_burn and self.transcript is not None:
+            # Legenda pronta antes do reenquadramento e queimada no mesmo encode: sem estágio de burn
+            self.edit_options["subtitles_dir"] = self.workspace.subs_ass
+            self.stages = [("cut", self.cut), ("subtitle", self.subtitle), ("reframe", self.reframe)]
+        elif subtitle_style is not None:
+            self.stages += [("subtitle", self.subtitle), ("burn", self.burn)]
+
+        self.status = {}
+        self._lock = threading.Lock()
+        self._pending = 0
+        self._done = threading.Condition(self._lock)
+
+    # Estágios (cada um recebe o índice do segmento e retorna algo verdadeiro em caso de sucesso)
+
+    def cut(self, index):
+        segment = self.segments[index]
+        if self.source_url is not None:
+            start = cut_segments.time_to_seconds(segment.get("start_time", "00:00:00"))
+            range_file = download_video.download_range(self.source_url, index, start, float(segment.get("duration", 0)), self.max_height, self.workspace)
+            return cut_segments.cut_one(index, {**segment, "start_time": "0"}, self.video_codec, range_file, total=len(self.segments), workspace=self.workspace)
+        return cut_segments.cut_one(index, segment, self.video_codec, self.input_file, total=len(self.segments), workspace=self.workspace)
+
+    def reframe(self, index):
+        # Os contadores da cascata ficam no processo do worker: _process_index devolve os deste segmento
+        result, segment_stats = self.executors["reframe"].submit(edit_video._process_index, (index, self.edit_options)).result()
+        with self._lock:
+            self.cascade_stats.merge(segment_stats)
+        return result
+
+    def subtitle(self, index):
+        name = self.workspace.final_name(index)
+        if self.transcript is not None:
+            transcribe_cuts.slice_clip(index, self.segments[index], self.transcript, self.workspace.subs)
+        else:
+            transcribe_cuts.transcribe(files=[f"{name}.mp4"], workspace=self.workspace)
+        adjust_subtitles.adjust(*self.subtitle_style, files=[f"{name}.json"], workspace=self.workspace)
+        return os.path.exists(os.path.join(self.workspace.subs_ass, f"{name}.ass"))
+
+    def burn(self, index):
+        name = self.workspace.final_name(index)
+        for aspect in self.edit_options.get("aspects", (PRIMARY_ASPECT,)):
+            results = burn_subtitles.burn(files=[f"{name}.mp4"], video_codec=self.video_codec, profile=self.edit_options.get("profile", "standard"), aspect=aspect, workspace=self.workspace)
+            if results and not results[0]["ok"]:
+                raise RuntimeError(results[0]["error"])
+        return os.path.exists(os.path.join(self.workspace.burned_sub, f"{name}_subtitled.mp4"))
+
+    # Encadeamento
+
+    def _submit(self, index, position):
+        name, function = self.stages[position]
+        started = time.time()
+        future = self.stage_executors[name].submit(function, index)
+        future.add_done_callback(lambda f: self._on_done(index, position, started, f))
+
+    def _on_done(self, index, position, started, future):
+        name = self.stages[position][0]
+        try:
+            ok = bool(future.result())
+            error = None if ok else "sem saída"
+        except Exception as e:
+            ok, error = False, str(e)
+
+        with self._lock:
+            self.status[index]["stages"][name] = {"ok": ok, "seconds": round(time.time() - started, 2), "error": error}
+
+        if ok and position + 1 < len(self.stages):
+            self._submit(index, position + 1)
+            return
+
+        with self._lock:
+            self.status[index]["ok"] = ok
+            self._pending -= 1
+            self._done.notify_all()
+
+    def run(self):
+        start = time.time()
+        self.status = {i: {"ok": None, "stages": {}} for i in range(len(self.segments))}
+        self._pending = len(self.segments)
+        self.cascade_stats = detector_cascade.CascadeStats()
+
+        # Workers do reenquadramento carregam os modelos do MediaPipe uma vez cada
+        self.executors = {"reframe": edit_video.worker_pool(self.concurrency["reframe"])}
+        self.stage_executors = {name: ThreadPoolExecutor(max_workers=self.concurrency[name], thread_name_prefix=name) for name, _ in self.stages}
+        try:
+            for index in range(len(self.segments)):
+                self._submit(index, 0)
+            with self._lock:
+                while self._pending > 0:
+                    self._done.wait()
+        finally:
+            for executor in self.stage_executors.values():
+                executor.shutdown(wait=True)
+            for executor in self.executors.values():
+                executor.shutdown(wait=True)
+
+        if self.cascade_stats.stages:
+            print(self.cascade_stats.report())
+        ok = sum(1 for s in self.status.values() if s["ok"])
+        print(f"Pipeline por segmento concluído: {ok}/{len(self.segments)} segmentos em {time.time() - start:.1f}s.")
+        return self.status
+
+def run(segments, edit_options=None, subtitle_style=None, concurrency=None, fused_burn=False, source_url=None, max_height=1080, workspace=None):
+    return PipelineScheduler(segments, edit_options, subtitle_style, concurrency, fused_burn=fused_burn, source_url=source_url, max_height=max_height, workspace=workspace).run()
@@ -0,0 +1,117 @@
+import cv2
+import numpy as np
+
+from scripts.aspects import ASPECT_TARGETS, PRIMARY_ASPECT, aspect_dir
+
+class RenderPlan:
+    """
+    Plano de renderização de um segmento: calcula uma vez os tamanhos de corte e o layout de saída
+    e reaproveita a mesma tela (canvas) em todos os frames. Os cv2.resize escrevem direto nas
+    regiões da tela (dst=...), então o loop de frames não aloca arrays novos.
+    """
+
+    def __init__(self, frame_width, frame_height, num_faces, out_size=(1080, 1920), zoom_out_factor=2.5):
+        self.frame_width = frame_width
+        self.frame_height = frame_height
+        self.num_faces = num_faces
+        self.out_width, self.out_height = out_size
+        self.zoom_out_factor = zoom_out_factor
+
+        self.canvas = np.zeros((self.out_height, self.out_width, 3), dtype=np.uint8)
+        self._mode = None
+
+        # Um rosto: tamanho do corte na proporção de saída, sem barras pretas
+        target_aspect_ratio = self.out_width / self.out_height
+        if frame_width / frame_height > target_aspect_ratio:
+            self.crop_width = int(frame_height * target_aspect_ratio)
+            self.crop_height = frame_height
+        else:
+            self.crop_width = frame_width
+            self.crop_height = int(frame_width / target_aspect_ratio)
+
+        # Dois rostos: metade de cima e metade de baixo da tela
+        half = self.out_height // 2
+        self.halves = (self.canvas[:half], self.canvas[half:])
+        # Proporção de cada metade (9x16: 1080x960, 1x1: 1080x540, 4x5: 1080x675)
+        self.half_aspect = self.out_width / half
+
+        # Padding: frame inteiro redimensionado e centralizado na tela
+        scale = min(self.out_width / frame_width, self.out_height / frame_height)
+        self.pad_width = max(1, int(round(frame_width * scale)))
+        self.pad_height = max(1, int(round(frame_height * scale)))
+        self.pad_left = (self.out_width - self.pad_width) // 2
+        self.pad_top = (self.out_height - self.pad_height) // 2
+        self.pad_view = self.canvas[self.pad_top:self.pad_top + self.pad_height, self.pad_left:self.pad_left + self.pad_width]
+        # Uma faixa de linhas inteiras é contígua e pode ser destino direto do resize;
+        # se não for (faixa vertical), o resize vai para um buffer fixo e é copiado para a tela
+        self._pad_scratch = None if self.pad_view.flags['C_CONTIGUOUS'] else np.empty_like(self.pad_view)
+
+    def _switch_mode(self, mode):
+        # Zera a tela ao trocar de layout para não sobrar conteúdo do layout anterior nas bordas
+        if self._mode != mode:
+            self.canvas.fill(0)
+            self._mode = mode
+
+    def render(self, frame, faces):
+        if faces is None:
+            return self.render_padded(frame)
+        if self.num_faces == 2:
+            return self.render_two_faces(frame, faces)
+        return self.render_single_face(frame, faces[0])
+
+    def single_face_rect(self, face):
+        # Retângulo de corte (x, y, w, h) centrado no rosto e dentro dos limites do frame
+        x, y, w, h = face
+        face_center_x = x + w // 2
+        face_center_y = y + h // 2
+        crop_x = max(0, min(face_center_x - self.crop_width // 2, self.frame_width - self.crop_width))
+        crop_y = max(0, min(face_center_y - self.crop_height // 2, self.frame_height - self.crop_height))
+        return int(crop_x), int(crop_y), self.crop_width, self.crop_height
+
+    def two_face_rect(self, face):
+        # Retângulo de corte (x, y, w, h) de um rosto com o fator de afastamento aplicado,
+        # na proporção da metade da tela (senão o resize estica o rosto nos formatos 1x1 e 4x5)
+        x, y, w, h = face
+        if w <= 0 or h <= 0:
+            return 0, 0, 0, 0
+        center_x = x + w // 2
+        center_y = y + h // 2
+        new_w = w * self.zoom_out_factor
+        new_h = h * self.zoom_out_factor
+        if new_w / new_h < self.half_aspect:
+            new_w = new_h * self.half_aspect
+        else:
+            new_h = new_w / self.half_aspect
+        # Maior que o frame: reduz mantendo a proporção
+        scale = min(1.0, self.frame_width / new_w, self.frame_height / new_h)
+        new_w = max(1, int(new_w * scale))
+        new_h = max(1, int(new_h * scale))
+        x_new = max(0, min(center_x - new_w // 2, self.frame_width - new_w))
+        y_new = max(0, min(center_y - new_h // 2, self.frame_height - new_h))
+        return int(x_new), int(y_new), new_w, new_h
+
+    def render_single_face(self, frame, face):
+        self._switch_mode("single")
+        crop_x, crop_y, crop_w, crop_h = self.single_face_rect(face)
+        crop_img = frame[crop_y:crop_y + crop_h, crop_x:crop_x + crop_w]
+        cv2.resize(crop_img, (self.out_width, self.out_height), dst=self.canvas, interpolation=cv2.INTER_AREA)
+        return self.canvas
+
+    def render_two_faces(self, frame, faces):
+        self._switch_mode("two")
+        for face, view in zip(faces[:2], self.halves):
+            x, y, w, h = self.two_face_rect(face)
+            if w <= 0 or h <= 0:
+                view.fill(0)
+                continue
+            cv2.resize(frame[y:y + h, x:x + w], (view.shape[1], view.shape[0]), dst=view)
+        return self.canvas
+
+    def render_padded(self, frame):
+        self._switch_mode("padded")
+        if self._pad_scratch is None:
+            cv2.resize(frame, (self.pad_width, self.pad_height), dst=self.pad_view, interpolation=cv2.INTER_AREA)
+        else:
+            cv2.resize(frame, (self.pad_width, self.pad_height), dst=self._pad_scratch, interpolation=cv2.INTER_AREA)
+            np.copyto(self.pad_view, self._pad_scratch)
+        return self.canvas
@@ -1,8 +1,9 @@
 import os
 import json
+from scripts.workspace import resolve
 
-def save_viral_segments(segments_data=None):
-    output_txt_file = "tmp/viral_segments.txt"
+def save_viral_segments(segments_data=None, workspace=None):
+    output_txt_file = resolve(workspace).segments_file
 
     # Verifica se o arquivo já existe
     if not os.path.exists(output_txt_file):
@@ -0,0 +1,230 @@
+import cProfile
+import json
+import os
+import platform
+import shutil
+import signal
+import subprocess
+import threading
+import time
+from contextlib import contextmanager
+
+try:
+    import resource  # Só existe em Unix; no Windows o tempo de CPU dos filhos fica de fora
+except ImportError:
+    resource = None
+
+# Telemetria por estágio: tempo de parede/CPU, frames, bytes lidos/escritos e a duração de cada
+# subprocesso (ffmpeg, yt-dlp...) iniciado durante o estágio. Gravada em um JSON por job.
+TRACES_DIR = "tmp/traces"
+
+# Popen original, restaurado quando nenhum trace está ativo
+_original_popen = subprocess.Popen
+_active = []
+_lock = threading.Lock()
+
+def read_io():
+    # Bytes lidos/escritos por este processo (Linux); None onde /proc não existe
+    try:
+        with open("/proc/self/io", "r") as f:
+            values = dict(line.split(": ") for line in f.read().splitlines())
+        return {"read": int(values["rchar"]), "written": int(values["wchar"]),
+                "disk_read": int(values["read_bytes"]), "disk_written": int(values["write_bytes"])}
+    except (OSError, KeyError, ValueError):
+        return None
+
+def children_usage():
+    # CPU e blocos de E/S (512 bytes) dos subprocessos já finalizados
+    if resource is None:
+        return None
+    usage = resource.getrusage(resource.RUSAGE_CHILDREN)
+    return {"cpu": usage.ru_utime + usage.ru_stime, "disk_read": usage.ru_inblock * 512, "disk_written": usage.ru_oublock * 512}
+
+def video_frames(paths):
+    # Soma os frames dos vídeos gerados (lidos do cabeçalho, sem decodificar)
+    import cv2
+    total = 0
+    for path in paths:
+        if path and os.path.exists(path):
+            cap = cv2.VideoCapture(path)
+            total += int(cap.get(cv2.CAP_PROP_FRAME_COUNT))
+            cap.release()
+    return total
+
+class TracedPopen(_original_popen):
+    # Registra comando, duração e código de saída no estágio ativo (subprocess.run também passa por aqui)
+    def __init__(self, args, *popenargs, **kwargs):
+        self._trace_start = time.perf_counter()
+        self._trace_stage = _active[-1] if _active else None
+        self._trace_recorded = False
+        super().__init__(args, *popenargs, **kwargs)
+
+    def _record(self):
+        if self._trace_stage is None or self._trace_recorded or self.returncode is None:
+            return
+        self._trace_recorded = True
+        command = self.args if isinstance(self.args, (list, tuple)) else [self.args]
+        self._trace_stage.add_subprocess(os.path.basename(str(command[0])), time.perf_counter() - self._trace_start, self.returncode)
+
+    def wait(self, timeout=None):
+        returncode = super().wait(timeout)
+        self._record()
+        return returncode
+
+    def poll(self):
+        returncode = super().poll()
+        self._record()
+        return returncode
+
+class StageRecord:
+    def __init__(self, name):
+        self.name = name
+        self.frames = None
+        self.extra = {}
+        self.subprocesses = []
+
+    def add_frames(self, count):
+        self.frames = (self.frames or 0) + count
+
+    def note(self, **values):
+        self.extra.update(values)
+
+    def add_subprocess(self, program, seconds, returncode):
+        with _lock:
+            self.subprocesses.append({"program": program, "seconds": round(seconds, 3), "returncode": returncode})
+
+class Trace:
+    """
+    Trace de um job: cada `with trace.stage("nome"):` vira uma entrada no JSON com as métricas do
+    estágio. profile_stage liga o cProfile (ou o py-spy, se profiler="py-spy") só nesse estágio.
+    Subprocessos iniciados em workers de um ProcessPoolExecutor não entram na lista (só o tempo total).
+    """
+
+    def __init__(self, job_id=None, enabled=True, output_dir=TRACES_DIR, profile_stage=None, profiler="cprofile"):
+        self.job_id = job_id or time.strftime("%Y%m%d-%H%M%S")
+        self.enabled = enabled
+        self.output_dir = output_dir
+        self.profile_stage = profile_stage
+        self.profiler = profiler
+        self.started = time.time()
+        self.stages = []
+
+    @contextmanager
+    def stage(self, name):
+        record = StageRecord(name)
+        if not self.enabled:
+            yield record
+            return
+
+        with _lock:
+            _active.append(record)
+            subprocess.Popen = TracedPopen
+        profile = self._start_profile(name)
+        io_before, children_before = read_io(), children_usage()
+        cpu_before = time.process_time()
+        start = time.perf_counter()
+        error = None
+        try:
+            yield record
+        except BaseException as e:
+            error = f"{type(e).__name__}: {e}"
+            raise
+        finally:
+            wall = time.perf_counter() - start
+            cpu = time.process_time() - cpu_before
+            io_after, children_after = read_io(), children_usage()
+            profile_file = self._stop_profile(name, profile)
+            with _lock:
+                _active.remove(record)
+                if not _active:
+                    subprocess.Popen = _original_popen
+
+            entry = {"stage": name, "wall_seconds": round(wall, 3), "cpu_seconds": round(cpu, 3), "frames": record.frames}
+            if record.frames and wall:
+                entry["fps"] = round(record.frames / wall, 1)
+            if children_before and children_after:
+                entry["children_cpu_seconds"] = round(children_after["cpu"] - children_before["cpu"], 3)
+                entry["children_disk_read"] = children_after["disk_read"] - children_before["disk_read"]
+                entry["children_disk_written"] = children_after["disk_written"] - children_before["disk_written"]
+            if io_before and io_after:
+                entry.update({f"bytes_{key}": io_after[key] - io_before[key] for key in io_before})
+            entry["subprocesses"] = record.subprocesses
+            entry["subprocess_seconds"] = round(sum(p["seconds"] for p in record.subprocesses), 3)
+            if profile_file:
+                entry["profile"] = profile_file
+            if error:
+                entry["error"] = error
+            entry.update(record.extra)
+            self.stages.append(entry)
+            self.save()
+
+    def _start_profile(self, name):
+        if name != self.profile_stage:
+            return None
+        if self.profiler == "py-spy":
+            if shutil.which("py-spy") is None:
+                print("py-spy não encontrado, usando cProfile.")
+            else:
+                os.makedirs(self.output_dir, exist_ok=True)
+                output = os.path.join(self.output_dir, f"{self.job_id}_{name}.svg")
+                process = _original_popen(["py-spy", "record", "--pid", str(os.getpid()), "--subprocesses", "-o", output],
+                                          stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+                try:
+                    # Sem permissão de ptrace (contêineres, ptrace_scope) o py-spy sai logo ao tentar se anexar
+                    returncode = process.wait(timeout=1)
+                except subprocess.TimeoutExpired:
+                    return ("py-spy", process, output)
+                print(f"py-spy falhou ao se anexar ao processo (código {returncode}; requer ptrace, ex: sudo ou --cap-add SYS_PTRACE), usando cProfile.")
+        profile = cProfile.Profile()
+        profile.enable()
+        return ("cprofile", profile, os.path.join(self.output_dir, f"{self.job_id}_{name}.prof"))
+
+    def _stop_profile(self, name, profile):
+        if profile is None:
+            return None
+        kind, handle, output = profile
+        if kind == "py-spy":
+            # SIGINT faz o py-spy parar de amostrar e gravar o flamegraph
+            handle.send_signal(signal.SIGINT)
+            returncode = handle.wait()
+            if not os.path.exists(output):
+                # Sem flamegraph gravado: o trace não aponta para um arquivo que não existe
+                print(f"py-spy terminou com código {returncode} sem gravar o perfil do estágio {name}.")
+                return None
+        else:
+            handle.disable()
+            os.makedirs(self.output_dir, exist_ok=True)
+            handle.dump_stats(output)
+        print(f"Perfil do estágio {name} gravado em: {output}")
+        return output
+
+    def to_dict(self):
+        return {
+            "job_id": self.job_id,
+            "started": time.strftime("%Y-%m-%dT%H:%M:%S", time.localtime(self.started)),
+            "wall_seconds": round(time.time() - self.started, 3),
+            "host": {"platform": platform.platform(), "python": platform.python_version(), "cpu_count": os.cpu_count()},
+            "stages": self.stages,
+        }
+
+    def path(self):
+        return os.path.join(self.output_dir, f"{self.job_id}.json")
+
+    def save(self):
+        if not self.enabled:
+            return None
+        os.makedirs(self.output_dir, exist_ok=True)
+        tmp_file = self.path() + ".tmp"
+        with open(tmp_file, "w", encoding="utf-8") as f:
+            json.dump(self.to_dict(), f, indent=2)
+        os.replace(tmp_file, self.path())
+        return self.path()
+
+    def summary(self):
+        lines = [f"Telemetria do job {self.job_id}:"]
+        for entry in self.stages:
+            frames = f", {entry['frames']} frames ({entry.get('fps', 0)} fps)" if entry.get("frames") else ""
+            lines.append(f"  {entry['stage']}: {entry['wall_seconds']:.1f}s (CPU {entry['cpu_seconds']:.1f}s, "
+                         f"subprocessos {entry['subprocess_seconds']:.1f}s){frames}")
+        lines.append(f"Trace gravado em: {self.path()}")
+        return "\n".join(lines)
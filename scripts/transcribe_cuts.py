@@ -1,10 +1,83 @@
 import os
-import subprocess
+import json
 import sys
 
 sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
 
-def transcribe():
+from scripts.cut_segments import time_to_seconds
+from scripts.asr_service import get_default_service
+from scripts.workspace import resolve
+
+def slice_transcript(transcript, start, end):
+    # Recorta a transcrição completa (com palavras alinhadas) para o intervalo [start, end]
+    # e desloca os tempos para que o corte comece em 0
+    def shift(value, low, high):
+        return round(min(max(value, low), high) - start, 3)
+
+    segments = []
+    for segment in transcript.get("segments", []):
+        if segment.get("end", 0) <= start or segment.get("start", 0) >= end:
+            continue
+
+        words = []
+        for word in segment.get("words", []):
+            if "start" in word and "end" in word:
+                if word["end"] <= start or word["start"] >= end:
+                    continue
+                words.append({**word, "start": shift(word["start"], start, end), "end": shift(word["end"], start, end)})
+            elif words:
+                # Palavras sem tempo (números, símbolos) acompanham a palavra anterior
+                words.append(dict(word))
+
+        if not words:
+            continue
+
+        timed = [w for w in words if "start" in w]
+        segments.append({
+            **segment,
+            "start": timed[0]["start"],
+            "end": timed[-1]["end"],
+            "text": " ".join(w["word"].strip() for w in words),
+            "words": words,
+        })
+
+    return {
+        "segments": segments,
+        "word_segments": [w for s in segments for w in s["words"]],
+        "language": transcript.get("language"),
+    }
+
+def transcribe_from_source(source_json=None, segments_file=None, output_folder=None, workspace=None):
+    # Gera os JSON de legenda de cada corte a partir da transcrição do vídeo inteiro, sem rodar o WhisperX de novo
+    workspace = resolve(workspace)
+    source_json = source_json or workspace.input_path('json')
+    segments_file = segments_file or workspace.segments_file
+    output_folder = output_folder or workspace.subs
+    with open(source_json, 'r', encoding='utf-8') as f:
+        transcript = json.load(f)
+    with open(segments_file, 'r', encoding='utf-8') as f:
+        segments = json.load(f).get("segments", [])
+
+    os.makedirs(output_folder, exist_ok=True)
+    return [slice_clip(i, segment, transcript, output_folder) for i, segment in enumerate(segments)]
+
+def slice_clip(index, segment, transcript, output_folder='subs/'):
+    # JSON de legenda de um único corte (usado também pelo agendador por segmento)
+    start = time_to_seconds(segment.get("start_time", "00:00:00"))
+    end = start + float(segment.get("duration", 0))
+    json_file = os.path.join(output_folder, f"final-output{str(index).zfill(3)}_processed.json")
+    with open(json_file, 'w', encoding='utf-8') as f:
+        json.dump(slice_transcript(transcript, start, end), f, ensure_ascii=False)
+    print(f"Legenda recortada da transcrição original: {json_file}")
+    return json_file
+
+def transcribe(from_source=False, files=None, workspace=None):
+    workspace = resolve(workspace)
+    if from_source:
+        if os.path.exists(workspace.input_path('json')):
+            return transcribe_from_source(workspace=workspace)
+        print(f"Transcrição completa ({workspace.input_path('json')}) não encontrada, transcrevendo cada corte.")
+
     def generate_whisperx(input_file, output_folder, model='large-v3'):
         output_file = os.path.join(output_folder, f"{os.path.splitext(os.path.basename(input_file))[0]}.srt")
         json_file = os.path.join(output_folder, f"{os.path.splitext(os.path.basename(input_file))[0]}.json")  # Define the JSON output file
@@ -14,39 +87,24 @@ def transcribe():
             print(f"Arquivo já existe, pulando: {json_file}")
             return
 
-        command = [
-            "whisperx",
-            input_file,
-            "--model", model,
-            "--task", "transcribe",
-            "--align_model", "WAV2VEC2_ASR_LARGE_LV60K_960H",
-            "--chunk_size", "10",
-            "--vad_onset", "0.4",
-            "--vad_offset", "0.3",
-            "--compute_type", "float32",
-            "--batch_size", "10",
-            "--output_dir", output_folder,
-            "--output_format", "srt",
-            "--output_format", "json",
-        ]
+        # O modelo fica carregado no processo e é reaproveitado entre os cortes (o mesmo da transcrição do vídeo)
+        service = get_default_service(model)
 
         print(f"Transcrevendo: {input_file}...")
-        result = subprocess.run(command, shell=True, text=True, capture_output=True)
-        print(f"Comando executado: {command}")
-        
-        if result.returncode != 0:
-            print("Erro durante a transcrição:")
-            print(result.stderr)
-        else:
+        try:
+            result = service.transcribe(input_file)
+            service.write(result, input_file, output_folder, output_formats=("srt", "json"))
             print(f"Transcrição concluída. Arquivo salvo em: {output_file} e {json_file}")
-            print(result.stdout)  # Verificar a saída correta
+        except Exception as e:
+            print("Erro durante a transcrição:")
+            print(e)
 
     # Define o diretório de entrada e o diretório de saída
-    input_folder = 'final/'
-    output_folder = 'subs/'
+    input_folder = workspace.final
+    output_folder = workspace.subs
 
-    # Itera sobre todos os arquivos na pasta de entrada
-    for filename in os.listdir(input_folder):
+    # Itera sobre todos os arquivos na pasta de entrada (ou apenas os de files)
+    for filename in (files if files is not None else os.listdir(input_folder)):
         if filename.endswith('.mp4'):  # Filtra apenas arquivos .mp4
             input_file = os.path.join(input_folder, filename)
             generate_whisperx(input_file, output_folder)
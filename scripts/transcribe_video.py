@@ -1,4 +1,3 @@
-import subprocess
 import os
 import sys
 import torch
@@ -6,49 +5,66 @@ import time
 
 sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
 
-def transcribe(input_file, model='large-v3'):
+from scripts.asr_service import get_default_service, ALIGN_MODEL, TRANSCRIBE_OPTIONS
+from scripts.artifact_cache import ArtifactCache, make_key, content_hash
+from scripts.parallel_transcribe import transcribe_parallel
+from scripts.workspace import resolve
+
+OUTPUT_EXTENSIONS = ("srt", "tsv", "json", "txt", "vtt")
+
+def warm_up(model='large-v3'):
+    # Carrega o modelo antes do primeiro arquivo (workers de longa duração do job_runner)
+    return get_default_service(model)
+
+def transcribe(input_file, model='large-v3', use_cache=True, parallel_workers=0, workspace=None, compare=False):
+    # compare=True (com parallel_workers): mede também o caminho de processo único e mostra o ganho do modo paralelo
     print(f"Iniciando transcrição de {input_file}...")
     start_time = time.time()  # Tempo de início da transcrição
     
-    output_folder = 'tmp'
+    output_folder = resolve(workspace).tmp
     base_name = os.path.splitext(os.path.basename(input_file))[0]
     srt_file = os.path.join(output_folder, f"{base_name}.srt")
+    tsv_file = os.path.join(output_folder, f"{base_name}.tsv")
+    outputs = {f"transcript.{ext}": os.path.join(output_folder, f"{base_name}.{ext}") for ext in OUTPUT_EXTENSIONS}
+
+    # Verifica se há uma GPU disponível e define o tipo de processamento
+    device = "cuda" if torch.cuda.is_available() else "cpu"
+    # O modo paralelo (int8) só roda em hosts sem GPU; com CUDA o caminho é o do serviço, mesmo com parallel_workers
+    use_parallel = bool(parallel_workers) and device == "cpu"
 
-    # Verifica se o arquivo SRT já existe
-    if os.path.exists(srt_file):
+    if use_cache:
+        # Chave pelo conteúdo do vídeo + modelo + parâmetros do caminho que realmente roda, nunca só pelo nome do arquivo
+        cache = ArtifactCache()
+        mode = {"parallel": True, "compute_type": "int8"} if use_parallel else TRANSCRIBE_OPTIONS
+        key = make_key("transcript", content_hash(input_file), model, mode, ALIGN_MODEL)
+        if cache.get(key, outputs):
+            print("Transcrição encontrada no cache. Pulando a transcrição.")
+            return srt_file, tsv_file
+    elif os.path.exists(srt_file):
+        # Verifica se o arquivo SRT já existe
         print(f"O arquivo {srt_file} já existe. Pulando a transcrição.")
-        return srt_file
+        return srt_file, tsv_file
 
-    # Verifica se há uma GPU disponível e define o tipo de processamento
-    if torch.cuda.is_available():
-        device = "cuda"
+    if device == "cuda":
         print("Placa de vídeo detectada, usando CUDA.")
     else:
-        device = "cpu"
         print("Nenhuma placa de vídeo detectada, usando CPU.")
 
-    command = [
-        "whisperx",
-        input_file,
-        "--model", model,
-        "--task", "transcribe",
-        "--align_model", "WAV2VEC2_ASR_LARGE_LV60K_960H",
-        "--interpolate_method", "linear",
-        "--chunk_size", "10",
-        "--verbose", "True",
-        "--vad_onset", "0.4",
-        "--vad_offset", "0.3",
-        "--no_align",
-        "--segment_resolution", "sentence",
-        "--compute_type", "float32",
-        "--batch_size", "10",
-        "--output_dir", output_folder,
-        "--output_format", "all",
-        "--device", device # Define o dispositivo baseado na verificação da GPU
-    ]
+    # Remove as saídas de uma transcrição anterior (outro vídeo): só o que esta execução gravar pode ir para o cache
+    for path in outputs.values():
+        if os.path.exists(path):
+            os.remove(path)
 
+    transcribed = False
     try:
-        result = subprocess.run(command, check=True, capture_output=True, text=True)
+        if use_parallel:
+            # Hosts só com CPU: chunks cortados nos silêncios, transcritos em paralelo com int8
+            transcribe_parallel(input_file, output_folder, model=model, workers=parallel_workers, compare=compare)
+        else:
+            # Carrega o modelo uma vez por processo; transcrições seguintes reaproveitam os pesos
+            service = get_default_service(model)
+            result = service.transcribe(input_file)
+            service.write(result, input_file, output_folder, output_formats=("all",))
         end_time = time.time()  # Tempo de término da transcrição
         elapsed_time = end_time - start_time  # Tempo total de execução
 
@@ -58,17 +74,16 @@ def transcribe(input_file, model='large-v3'):
 
         print(f"Transcrição concluída. Saída salva em {srt_file}.")
         print(f"Levou {minutes} minutos e {seconds} segundos para transcrever usando {device}.")  # Mostra o tempo e o dispositivo
-        print(result.stdout)
-    except subprocess.CalledProcessError as e:
-        print(f"Erro durante a transcrição: {e}")
-        print(f"Saída de erro: {e.stderr}")
+        transcribed = True
     except Exception as e:
-        print(f"Ocorreu um erro inesperado: {e}")
+        print(f"Erro durante a transcrição: {e}")
 
     # Verifica se o arquivo SRT foi criado
-    if os.path.exists(srt_file):
+    if transcribed and os.path.exists(srt_file):
         print(f"Arquivo SRT {srt_file} criado com sucesso.")
+        if use_cache:
+            cache.put(key, outputs, metadata={'source': input_file, 'model': model})
     else:
         print("Aviso: O arquivo SRT não foi criado como esperado.")
 
-    return srt_file
+    return srt_file, tsv_file
@@ -0,0 +1,52 @@
+import math
+import numpy as np
+
+class VirtualCamera:
+    """
+    Câmera virtual suavizada: as detecções só atualizam o alvo (na cadência da detecção) e,
+    a cada frame, a posição anda uma fração fixa em direção ao alvo (média móvel exponencial).
+    Memória constante e custo O(1) por frame, independente do intervalo de detecção.
+    """
+
+    def __init__(self, num_faces, fps, smoothing_seconds=1.0, max_missed_detections=None):
+        self.num_faces = num_faces
+        # Fração por frame que faz a câmera percorrer ~63% do caminho em smoothing_seconds
+        if smoothing_seconds and smoothing_seconds > 0:
+            self.alpha = 1.0 - math.exp(-1.0 / (max(fps, 1.0) * smoothing_seconds))
+        else:
+            self.alpha = 1.0
+        self.max_missed_detections = max_missed_detections
+        self.missed_detections = 0
+
+        self.position = None
+        self.target = np.zeros((num_faces, 4), dtype=np.float32)
+        self._delta = np.zeros((num_faces, 4), dtype=np.float32)
+        self._rounded = np.zeros((num_faces, 4), dtype=np.float32)
+        self._output = np.zeros((num_faces, 4), dtype=np.int32)
+
+    def update(self, detections):
+        np.copyto(self.target, np.asarray(detections[:self.num_faces], dtype=np.float32))
+        if self.position is None:
+            # Primeira detecção: a câmera começa direto no alvo
+            self.position = self.target.copy()
+        self.missed_detections = 0
+
+    def miss(self):
+        self.missed_detections += 1
+
+    def reset(self):
+        self.position = None
+        self.missed_detections = 0
+
+    def step(self):
+        # Avança um frame e retorna as caixas atuais (array int32 reutilizado) ou None sem alvo
+        if self.position is None:
+            return None
+        if self.max_missed_detections is not None and self.missed_detections > self.max_missed_detections:
+            return None
+        np.subtract(self.target, self.position, out=self._delta)
+        self._delta *= self.alpha
+        self.position += self._delta
+        np.rint(self.position, out=self._rounded)
+        np.copyto(self._output, self._rounded, casting="unsafe")
+        return self._output
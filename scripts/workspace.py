@@ -0,0 +1,72 @@
+import os
+from scripts.aspects import PRIMARY_ASPECT, aspect_dir
+
+class Workspace:
+    """
+    Árvore de pastas de um job (tmp/, final/, subs/, subs_ass/, burned_sub/). Com a raiz padrão "."
+    os caminhos são os mesmos de sempre; com uma raiz por job, vários vídeos rodam lado a lado na
+    mesma máquina sem um job ler os arquivos do outro. As trilhas de rosto ficam em tmp/tracks do
+    job; o cache de artefatos continua compartilhado (é endereçado por conteúdo).
+    """
+
+    def __init__(self, root="."):
+        self.root = root
+        self.tmp = self.path("tmp")
+        self.final = self.path("final")
+        self.subs = self.path("subs")
+        self.subs_ass = self.path("subs_ass")
+        self.burned_sub = self.path("burned_sub")
+        self.ranges = os.path.join(self.tmp, "ranges")
+        self.traces = os.path.join(self.tmp, "traces")
+        self.tracks = os.path.join(self.tmp, "tracks")
+
+    @classmethod
+    def for_job(cls, job_id, base_dir="jobs"):
+        return cls(os.path.join(base_dir, str(job_id)))
+
+    def path(self, *parts):
+        # Sem prefixo quando a raiz é o diretório atual, para manter os caminhos relativos de antes
+        return os.path.join(*parts) if self.root in ("", ".") else os.path.join(self.root, *parts)
+
+    def create(self):
+        for folder in (self.tmp, self.final, self.subs, self.subs_ass, self.burned_sub):
+            os.makedirs(folder, exist_ok=True)
+        return self
+
+    # Arquivos do job
+
+    def input_path(self, ext="mp4"):
+        # Vídeo (ou áudio) de entrada e as saídas da transcrição dele: input_video.mp4, .json, .tsv...
+        return os.path.join(self.tmp, f"input_video.{ext}")
+
+    @property
+    def input_video(self):
+        return self.input_path("mp4")
+
+    @property
+    def segments_file(self):
+        return os.path.join(self.tmp, "viral_segments.txt")
+
+    @property
+    def prompt_file(self):
+        # Prompt para a IA gravado pelos jobs não interativos que ainda esperam os segmentos
+        return os.path.join(self.tmp, "viral_prompt.txt")
+
+    def original_scale(self, index):
+        return os.path.join(self.tmp, f"output{str(index).zfill(3)}_original_scale.mp4")
+
+    def final_name(self, index):
+        return f"final-output{str(index).zfill(3)}_processed"
+
+    def final_dir(self, aspect=PRIMARY_ASPECT):
+        return aspect_dir(self.final, aspect)
+
+    def burned_dir(self, aspect=PRIMARY_ASPECT):
+        return aspect_dir(self.burned_sub, aspect)
+
+    def __repr__(self):
+        return f"Workspace({self.root!r})"
+
+def resolve(workspace=None):
+    # Módulos aceitam workspace=None e usam as pastas padrão
+    return workspace if workspace is not None else Workspace()
@@ -0,0 +1,125 @@
+import os
+import sys
+
+import pytest
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from scripts.artifact_cache import ArtifactCache, make_key
+
+
+def write(path, text):
+    with open(path, "w", encoding="utf-8") as f:
+        f.write(text)
+
+
+def read(path):
+    with open(path, "r", encoding="utf-8") as f:
+        return f.read()
+
+
+def test_restored_file_is_not_shared_with_cache(tmp_path):
+    cache = ArtifactCache(root=str(tmp_path / "cache"))
+    source = tmp_path / "a.srt"
+    write(source, "video A")
+    key = make_key("transcript", "A")
+    cache.put(key, {"transcript.srt": str(source)})
+
+    restored = tmp_path / "tmp" / "input_video.srt"
+    assert cache.get(key, {"transcript.srt": str(restored)})
+    # O próximo vídeo reescreve o mesmo caminho com open(..., "w"), como os writers do whisperx
+    write(restored, "video B")
+
+    again = tmp_path / "again.srt"
+    assert cache.get(key, {"transcript.srt": str(again)})
+    assert read(again) == "video A"
+
+
+def test_get_misses_incomplete_entry(tmp_path):
+    cache = ArtifactCache(root=str(tmp_path / "cache"))
+    source = tmp_path / "video.mp4"
+    write(source, "data")
+    key = make_key("download", "yt", "id")
+    cache.put(key, {"video.mp4": str(source)})
+    os.remove(os.path.join(cache.root, key, "video.mp4"))
+
+    destination = tmp_path / "out.mp4"
+    assert not cache.get(key, {"video.mp4": str(destination)})
+    assert not destination.exists()
+
+
+class FakeService:
+    def __init__(self, fail=False):
+        self.fail = fail
+
+    def transcribe(self, audio):
+        if self.fail:
+            raise RuntimeError("falha simulada")
+        with open(audio, "r", encoding="utf-8") as f:
+            return {"text": f.read()}
+
+    def write(self, result, audio_path, output_dir, output_formats=("all",)):
+        base = os.path.join(output_dir, os.path.splitext(os.path.basename(audio_path))[0])
+        for ext in ("srt", "tsv", "json", "txt", "vtt"):
+            write(f"{base}.{ext}", result["text"])
+
+
+def test_retranscribe_does_not_corrupt_cache(tmp_path, monkeypatch):
+    pytest.importorskip("torch")
+    pytest.importorskip("whisperx")
+    from scripts import transcribe_video
+    from scripts.workspace import Workspace
+
+    monkeypatch.chdir(tmp_path)
+    service = FakeService()
+    monkeypatch.setattr(transcribe_video, "get_default_service", lambda model: service)
+    workspace = Workspace(str(tmp_path / "job")).create()
+
+    # Vídeo A: transcrito e guardado no cache
+    write(workspace.input_video, "video A")
+    srt_file, _ = transcribe_video.transcribe(workspace.input_video, workspace=workspace)
+    assert read(srt_file) == "video A"
+
+    # Vídeo B no mesmo caminho, depois de A ter sido restaurado do cache
+    assert transcribe_video.transcribe(workspace.input_video, workspace=workspace)[0] == srt_file
+    write(workspace.input_video, "video B")
+    transcribe_video.transcribe(workspace.input_video, workspace=workspace)
+    assert read(srt_file) == "video B"
+
+    # A continua intacto no cache
+    write(workspace.input_video, "video A")
+    transcribe_video.transcribe(workspace.input_video, workspace=workspace)
+    assert read(srt_file) == "video A"
+
+    # Uma transcrição que falha não guarda o SRT que sobrou do vídeo anterior
+    service.fail = True
+    write(workspace.input_video, "video C")
+    transcribe_video.transcribe(workspace.input_video, workspace=workspace)
+    assert not os.path.exists(srt_file)
+    service.fail = False
+    transcribe_video.transcribe(workspace.input_video, workspace=workspace)
+    assert read(srt_file) == "video C"
+
+
+def put_many(root, worker, count):
+    cache = ArtifactCache(root=root)
+    source = os.path.join(root, f"source{worker}.txt")
+    write(source, f"worker {worker}")
+    for i in range(count):
+        cache.put(make_key("stress", worker, i), {"data.txt": source})
+
+
+def test_concurrent_puts_keep_every_entry(tmp_path):
+    # Workers do job_runner gravam no mesmo cache: nenhum put pode apagar a entrada de outro do índice
+    import multiprocessing
+    root = str(tmp_path / "cache")
+    ArtifactCache(root=root)
+    processes = [multiprocessing.Process(target=put_many, args=(root, worker, 25)) for worker in range(4)]
+    for process in processes:
+        process.start()
+    for process in processes:
+        process.join()
+
+    cache = ArtifactCache(root=root)
+    assert len(cache._load_index()) == 100
+    assert sorted(name for name in os.listdir(root) if len(name) == 40) == sorted(cache._load_index())
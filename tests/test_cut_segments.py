@@ -0,0 +1,49 @@
+import json
+import os
+import shutil
+import subprocess
+import sys
+
+import pytest
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from scripts.cut_segments import keyframe_seek, nearest_keyframe
+
+
+@pytest.mark.parametrize("keyframe, seek", [
+    (1.668333, "1.669"),  # 50 frames a 30000/1001: "1.668" cairia antes do keyframe
+    (0.033367, "0.034"),
+    (3.003, "3.003"),     # float com ruído (3.0029999...) não sobe um ms
+    (12.0, "12.000"),
+])
+def test_keyframe_seek_never_lands_before_the_keyframe(keyframe, seek):
+    assert keyframe_seek(keyframe) == seek
+    assert float(seek) >= keyframe
+
+
+def test_nearest_keyframe_within_tolerance():
+    keyframes = [0.0, 1.668333, 3.336667, 5.005]
+    assert nearest_keyframe(keyframes, 1.5, 0.5) == 1.668333
+    assert nearest_keyframe(keyframes, 2.5, 0.5) is None
+
+
+@pytest.mark.skipif(shutil.which("ffmpeg") is None or shutil.which("ffprobe") is None, reason="ffmpeg/ffprobe não encontrados")
+def test_stream_copy_records_the_keyframe_start(tmp_path):
+    from scripts.cut_segments import cut
+    from scripts.workspace import Workspace
+
+    workspace = Workspace(str(tmp_path / "job")).create()
+    # Keyframes a cada 4s: o corte pedido em 4.3s é copiado a partir do keyframe em 4s
+    subprocess.run(["ffmpeg", "-y", "-loglevel", "error", "-f", "lavfi", "-i", "testsrc2=size=160x120:rate=25:duration=10",
+                    "-c:v", "libx264", "-g", "100", "-keyint_min", "100", "-sc_threshold", "0", workspace.input_video], check=True)
+    with open(workspace.segments_file, "w", encoding="utf-8") as f:
+        json.dump({"segments": [{"start_time": "00:00:04.3", "duration": 2}]}, f)
+
+    cut(None, stream_copy=True, workspace=workspace)
+
+    with open(workspace.segments_file, "r", encoding="utf-8") as f:
+        segment = json.load(f)["segments"][0]
+    assert segment["start_time"] == "4.000000"
+    assert segment["duration"] == pytest.approx(2.3)
+    assert segment["requested_start_time"] == "00:00:04.3"
@@ -0,0 +1,29 @@
+import os
+import sys
+from types import SimpleNamespace
+
+import pytest
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+np = pytest.importorskip("numpy")
+pytest.importorskip("cv2")
+
+from scripts.detector_cascade import landmarks_to_boxes
+
+
+def landmarks(points):
+    return [SimpleNamespace(x=x, y=y) for x, y in points]
+
+
+def test_landmarks_to_boxes_bounds_every_set():
+    sets = [
+        landmarks([(0.1, 0.2), (0.3, 0.6), (0.2, 0.4)]),
+        landmarks([(0.5, 0.5), (0.9, 0.7), (0.6, 0.9)]),
+    ]
+    boxes = landmarks_to_boxes(sets, 1000, 500)
+    assert boxes.tolist() == [[100, 100, 200, 200], [500, 250, 400, 200]]
+
+
+def test_landmarks_to_boxes_without_sets_is_empty():
+    assert landmarks_to_boxes([], 1000, 500).shape == (0, 4)
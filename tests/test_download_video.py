@@ -0,0 +1,45 @@
+import os
+import shutil
+import subprocess
+import sys
+
+import pytest
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+np = pytest.importorskip("numpy")
+cv2 = pytest.importorskip("cv2")
+pytest.importorskip("yt_dlp")
+
+from scripts import cut_segments, download_video
+from scripts.workspace import Workspace
+
+pytestmark = pytest.mark.skipif(shutil.which("ffmpeg") is None, reason="ffmpeg não encontrado")
+
+
+def read_frames(path, count):
+    cap = cv2.VideoCapture(path)
+    frames = []
+    for _ in range(count):
+        ok, frame = cap.read()
+        assert ok
+        frames.append(frame.astype(np.int16))
+    cap.release()
+    return frames
+
+
+def test_local_range_cut_starts_at_segment_start(tmp_path):
+    # Keyframes a cada 4s: um trecho a partir de 3s é copiado desde o keyframe em 0s (3s de pré-roll)
+    source = str(tmp_path / "source.mp4")
+    subprocess.run(["ffmpeg", "-y", "-loglevel", "error", "-f", "lavfi", "-i", "testsrc2=size=320x240:rate=25:duration=8",
+                    "-f", "lavfi", "-i", "sine=duration=8", "-c:v", "libx264", "-g", "100", "-keyint_min", "100",
+                    "-sc_threshold", "0", "-c:a", "aac", "-shortest", source], check=True)
+    workspace = Workspace(str(tmp_path / "job")).create()
+
+    range_file = download_video.download_range(source, 0, 3.0, 2.0, workspace=workspace)
+    clip = cut_segments.cut_one(0, {"start_time": "0", "duration": 2.0}, "libx264", range_file, workspace=workspace)
+
+    # O primeiro frame do corte é o frame da fonte em 3s (índice 75), não o keyframe do pré-roll
+    first = read_frames(clip, 1)[0]
+    distances = [np.abs(first - frame).mean() for frame in read_frames(source, 100)]
+    assert int(np.argmin(distances)) == 75
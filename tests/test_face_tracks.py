@@ -0,0 +1,59 @@
+import os
+import sys
+
+import pytest
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+np = pytest.importorskip("numpy")
+pytest.importorskip("cv2")
+
+from scripts.face_tracks import FaceTrack, evict_tracks, load_track, track_path
+
+
+def sample_track():
+    track = FaceTrack(max_faces=2)
+    track.add(0.0, [(10, 20, 30, 40)])
+    track.add(5.0, None)
+    return track
+
+
+def test_save_replaces_the_track_without_leftovers(tmp_path):
+    video = tmp_path / "video.mp4"
+    video.write_bytes(b"video")
+    tracks_dir = str(tmp_path / "tracks")
+    path = track_path(str(video), {"num_faces": 2}, tracks_dir)
+
+    sample_track().save(path)
+
+    assert os.listdir(tracks_dir) == [os.path.basename(path)]
+    track, _ = load_track(str(video), {"num_faces": 2}, tracks_dir)
+    assert track.at(0.0, tolerance=1).tolist() == [[10, 20, 30, 40]]
+
+
+def test_truncated_track_is_discarded(tmp_path):
+    video = tmp_path / "video.mp4"
+    video.write_bytes(b"video")
+    tracks_dir = str(tmp_path / "tracks")
+    path = track_path(str(video), {"num_faces": 2}, tracks_dir)
+    os.makedirs(tracks_dir)
+    with open(path, "wb") as f:
+        f.write(b"PK\x03\x04truncado")
+
+    track, _ = load_track(str(video), {"num_faces": 2}, tracks_dir)
+
+    assert track is None
+    assert not os.path.exists(path)
+
+
+def test_eviction_keeps_the_most_recently_used_tracks(tmp_path):
+    tracks_dir = tmp_path / "tracks"
+    tracks_dir.mkdir()
+    for i in range(5):
+        path = tracks_dir / f"seg{i}.npz"
+        path.write_bytes(b"x")
+        os.utime(path, (1000 + i, 1000 + i))
+
+    evict_tracks(str(tracks_dir), max_files=2, keep=str(tracks_dir / "seg0.npz"))
+
+    assert sorted(os.listdir(tracks_dir)) == ["seg0.npz", "seg4.npz"]
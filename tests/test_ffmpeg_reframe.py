@@ -0,0 +1,64 @@
+import os
+import shutil
+import subprocess
+import sys
+
+import pytest
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+cv2 = pytest.importorskip("cv2")
+
+from scripts.aspects import ASPECT_TARGETS
+from scripts.ffmpeg_reframe import build_filter_graph, render_short
+from scripts.render_plan import RenderPlan
+
+ASPECTS = ("9x16", "1x1", "4x5")
+FACES = [(60, 60, 60, 60), (420, 80, 60, 60)]
+
+
+def test_filter_graph_decodes_once_for_all_aspects():
+    plans = [RenderPlan(640, 360, 2, out_size=ASPECT_TARGETS[aspect]) for aspect in ASPECTS]
+    initial_states = [tuple(plan.two_face_rect(face) for face in FACES) for plan in plans]
+    graph = build_filter_graph(plans, initial_states, "tmp/in_reframe.cmd")
+
+    # Um único sendcmd/split sobre o vídeo de entrada e uma saída rotulada por formato
+    assert graph.count("[0:v]") == 1
+    assert graph.count("sendcmd=") == 1
+    assert graph.startswith("[0:v]sendcmd=f='tmp/in_reframe.cmd',split=3[a0][a1][a2]")
+    for i in range(len(ASPECTS)):
+        assert f"streamselect@a{i}sel" in graph
+        assert f"[a{i}out]" in graph
+    # 4x5: metades de 674 + 676 linhas (altura par em cada lado do vstack)
+    assert "scale=1080:674" in graph and "scale=1080:676" in graph
+
+
+def test_filter_graph_without_commands_skips_sendcmd():
+    plans = [RenderPlan(640, 360, 1, out_size=ASPECT_TARGETS["9x16"])]
+    graph = build_filter_graph(plans, [None], None)
+    assert "sendcmd" not in graph
+    assert graph.startswith("[0:v]split=1[a0]")
+
+
+@pytest.mark.skipif(shutil.which("ffmpeg") is None, reason="ffmpeg não encontrado")
+def test_render_short_writes_every_aspect(tmp_path):
+    input_file = str(tmp_path / "in.mp4")
+    subprocess.run(["ffmpeg", "-y", "-loglevel", "error", "-f", "lavfi", "-i", "testsrc2=size=640x360:rate=25:duration=2",
+                    "-c:v", "libx264", "-pix_fmt", "yuv420p", input_file], check=True)
+
+    def lookup(t):
+        # Rostos andando e um trecho sem rosto: gera comandos de corte e de troca para o padding
+        if 0.8 < t < 1.2:
+            return None
+        shift = int(t * 50)
+        return [(x + shift, y, w, h) for x, y, w, h in FACES]
+
+    outputs = [(str(tmp_path / f"out_{aspect}.mp4"), ASPECT_TARGETS[aspect]) for aspect in ASPECTS]
+    results = render_short(input_file, outputs, 2, lookup, detection_seconds=0.2, video_codec="libx264", work_dir=str(tmp_path), profile="draft")
+
+    assert results == [path for path, _ in outputs]
+    for path, (width, height) in outputs:
+        cap = cv2.VideoCapture(path)
+        assert (int(cap.get(cv2.CAP_PROP_FRAME_WIDTH)), int(cap.get(cv2.CAP_PROP_FRAME_HEIGHT))) == (width, height)
+        assert int(cap.get(cv2.CAP_PROP_FRAME_COUNT)) == 50
+        cap.release()
@@ -0,0 +1,62 @@
+import os
+import shutil
+import sys
+
+import pytest
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+np = pytest.importorskip("numpy")
+
+from scripts.ffmpeg_writer import FFmpegWriter
+
+pytestmark = pytest.mark.skipif(shutil.which("ffmpeg") is None, reason="ffmpeg não encontrado")
+
+
+def frames(count, size=(64, 48)):
+    width, height = size
+    for i in range(count):
+        yield np.full((height, width, 3), i % 255, dtype=np.uint8)
+
+
+def test_release_finishes_the_video(tmp_path):
+    output = str(tmp_path / "out.mp4")
+    writer = FFmpegWriter(output, 25, (64, 48), video_codec="libx264", profile="draft")
+    for frame in frames(10):
+        writer.write(frame)
+    assert writer.release() == output
+    assert os.path.getsize(output) > 0
+
+
+def test_abort_kills_ffmpeg_and_removes_partial_output(tmp_path):
+    output = str(tmp_path / "out.mp4")
+    writer = FFmpegWriter(output, 25, (64, 48), video_codec="libx264", profile="draft")
+    for frame in frames(10):
+        writer.write(frame)
+
+    # Como no loop de frames do generate_short: uma exceção no meio e o writer abortado no finally
+    with pytest.raises(RuntimeError):
+        try:
+            raise RuntimeError("falha no meio do loop")
+        finally:
+            writer.abort()
+
+    assert writer.process.poll() is not None
+    assert not os.path.exists(output)
+
+
+def test_failed_release_removes_partial_output(tmp_path):
+    output = str(tmp_path / "out.mp4")
+    writer = FFmpegWriter(output, 25, (64, 48), video_codec="libx264", profile="draft")
+    for frame in frames(10):
+        writer.write(frame)
+    # ffmpeg morto no meio do encode: o que ficou no disco é um mp4 sem o moov
+    writer.process.kill()
+    writer.process.wait()
+    if not os.path.exists(output):
+        open(output, "wb").close()
+
+    with pytest.raises(RuntimeError):
+        writer.release()
+
+    assert not os.path.exists(output)
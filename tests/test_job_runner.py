@@ -0,0 +1,172 @@
+import json
+import os
+import shutil
+import subprocess
+import sys
+import threading
+import types
+
+import pytest
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+import job_runner
+from scripts.job_queue import JobQueue, QUEUED, RUNNING, WAITING_SEGMENTS, DONE, load_batch
+
+
+@pytest.fixture
+def queue(tmp_path):
+    return JobQueue(str(tmp_path / "queue.db"))
+
+
+def test_claim_hands_each_job_to_one_worker(queue):
+    submitted = [queue.submit({"source": f"video{i}.mp4"}) for i in range(20)]
+    claimed = []
+    lock = threading.Lock()
+
+    def worker(name):
+        while True:
+            job = queue.claim(name)
+            if job is None:
+                return
+            with lock:
+                claimed.append(job["id"])
+
+    threads = [threading.Thread(target=worker, args=(f"worker-{i}",)) for i in range(4)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert sorted(claimed) == sorted(submitted)
+    assert all(job["status"] == RUNNING and job["attempts"] == 1 for job in queue.list())
+    assert queue.claim("worker-x") is None
+
+
+def test_claim_takes_oldest_job_first(queue):
+    first = queue.submit({"source": "a.mp4"})
+    queue.submit({"source": "b.mp4"})
+    assert queue.claim("worker-0")["id"] == first
+
+
+def test_provide_segments_requeues_waiting_job(queue):
+    job_id = queue.submit({"source": "a.mp4"})
+    with pytest.raises(ValueError):
+        queue.provide_segments(job_id, {"segments": []})  # Ainda na fila, não aguardando
+
+    queue.claim("worker-0")
+    queue.finish(job_id, WAITING_SEGMENTS, result={"prompt_file": "tmp/viral_prompt.txt"})
+    with pytest.raises(ValueError):
+        queue.provide_segments(job_id, [{"start_time": "00:00:01"}])  # Formato inválido
+    assert queue.get(job_id)["status"] == WAITING_SEGMENTS
+
+    segments = {"segments": [{"start_time": "00:00:01", "end_time": "00:00:20", "duration": 19}]}
+    queue.provide_segments(job_id, segments)
+    job = queue.get(job_id)
+    assert job["status"] == QUEUED
+    assert job["params"]["segments"] == segments
+    assert queue.claim("worker-0")["id"] == job_id
+
+    with pytest.raises(KeyError):
+        queue.provide_segments("nao-existe", segments)
+
+
+def test_requeue_stale_and_retry(queue):
+    running = queue.submit({"source": "a.mp4"})
+    failed = queue.submit({"source": "b.mp4"})
+    queue.claim("worker-0")
+    queue.claim("worker-1")
+    queue.finish(failed, "falhou", error="boom")
+
+    assert queue.requeue_stale() == 1
+    assert queue.get(running)["status"] == QUEUED
+    assert queue.retry(failed)
+    assert not queue.retry(running)
+
+
+def test_submit_validates(queue):
+    for params in ({}, {"source": "a.mp4", "extra": 1}, {"source": "a.mp4", "num_segments": 0}, {"source": "a.mp4", "settings": []}):
+        with pytest.raises(ValueError):
+            queue.submit(params)
+    assert queue.list() == []
+
+
+def test_load_batch_accepts_list_and_json_lines(tmp_path):
+    lines = tmp_path / "jobs.jsonl"
+    lines.write_text('{"source": "a.mp4"}\n\n# comentário\n{"source": "b.mp4", "num_segments": 2}\n', encoding="utf-8")
+    listing = tmp_path / "jobs.json"
+    listing.write_text(json.dumps([{"source": "a.mp4"}]), encoding="utf-8")
+    assert [job["source"] for job in load_batch(str(lines))] == ["a.mp4", "b.mp4"]
+    assert load_batch(str(listing)) == [{"source": "a.mp4"}]
+
+
+def stand_in_pipeline(run_pipeline):
+    # Módulo no lugar do main.py: mesmas variáveis que o run_job lê, com um run_pipeline controlado pelo teste
+    pipeline = types.ModuleType("main")
+    pipeline.num_faces = 2
+    pipeline.telemetry_enabled = False
+    pipeline.profile_stage = None
+    pipeline.profiler = "cprofile"
+    pipeline.output_aspects = ["9x16"]
+    pipeline.run_pipeline = run_pipeline
+    return pipeline
+
+
+def test_run_job_applies_and_restores_settings(tmp_path):
+    seen = {}
+
+    def run_pipeline(url, num_segments, viral_mode, themes, workspace, trace, segments_data=None, interactive=True):
+        seen.update(num_faces=pipeline.num_faces, interactive=interactive, workspace=workspace.root)
+        if segments_data is None:
+            return WAITING_SEGMENTS
+        os.makedirs(workspace.final_dir(), exist_ok=True)
+        open(os.path.join(workspace.final_dir(), "final-output000_processed.mp4"), "w").close()
+        return DONE
+
+    pipeline = stand_in_pipeline(run_pipeline)
+    job = {"id": "job1", "params": {"source": "a.mp4", "num_segments": 1, "viral_mode": True, "themes": "", "segments": None, "settings": {"num_faces": 1}}}
+    status, result = job_runner.run_job(pipeline, job, jobs_dir=str(tmp_path))
+    assert status == WAITING_SEGMENTS
+    assert result["prompt_file"].startswith(os.path.join(str(tmp_path), "job1"))
+    assert seen == {"num_faces": 1, "interactive": False, "workspace": os.path.join(str(tmp_path), "job1")}
+    assert pipeline.num_faces == 2
+
+    job["params"]["segments"] = {"segments": []}
+    status, result = job_runner.run_job(pipeline, job, jobs_dir=str(tmp_path))
+    assert status == DONE
+    assert list(result["outputs"].values()) == [[os.path.join(str(tmp_path), "job1", "final", "final-output000_processed.mp4")]]
+
+    job["params"]["settings"] = {"nao_existe": 1}
+    with pytest.raises(ValueError):
+        job_runner.run_job(pipeline, job, jobs_dir=str(tmp_path))
+
+
+def test_run_job_with_local_file(tmp_path):
+    pytest.importorskip("yt_dlp")
+    if shutil.which("ffmpeg") is None:
+        pytest.skip("ffmpeg não encontrado")
+    from scripts import download_video
+
+    source = tmp_path / "local video.mkv"
+    subprocess.run(["ffmpeg", "-y", "-loglevel", "error", "-f", "lavfi", "-i", "testsrc2=size=320x240:rate=25:duration=1",
+                    "-f", "lavfi", "-i", "sine=duration=1", "-c:v", "libx264", "-c:a", "aac", "-shortest", str(source)], check=True)
+
+    def run_pipeline(url, num_segments, viral_mode, themes, workspace, trace, segments_data=None, interactive=True):
+        # Mesmo primeiro estágio do main.run_pipeline no modo "completo"
+        download_video.download(url, use_cache=True, workspace=workspace, interactive=interactive)
+        return WAITING_SEGMENTS
+
+    job = {"id": "local", "params": {"source": str(source), "num_segments": 1, "viral_mode": True, "themes": "", "segments": None, "settings": {}}}
+    status, result = job_runner.run_job(stand_in_pipeline(run_pipeline), job, jobs_dir=str(tmp_path / "jobs"))
+    assert status == WAITING_SEGMENTS
+    assert os.path.getsize(os.path.join(result["workspace"], "tmp", "input_video.mp4")) > 0
+
+
+def test_download_never_prompts_when_not_interactive(tmp_path, monkeypatch):
+    pytest.importorskip("yt_dlp")
+    from scripts import download_video
+    from scripts.workspace import Workspace
+
+    monkeypatch.setattr("builtins.input", lambda *args: pytest.fail("input() chamado fora do modo interativo"))
+    with pytest.raises(ValueError):
+        download_video.download(str(tmp_path / "nao_existe.mp4"), use_cache=False, workspace=Workspace(str(tmp_path)), interactive=False)
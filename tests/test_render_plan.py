@@ -0,0 +1,40 @@
+import os
+import sys
+
+import pytest
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+np = pytest.importorskip("numpy")
+pytest.importorskip("cv2")
+
+from scripts.aspects import ASPECT_TARGETS
+from scripts.render_plan import RenderPlan
+
+
+@pytest.mark.parametrize("aspect", sorted(ASPECT_TARGETS))
+@pytest.mark.parametrize("face", [(900, 400, 120, 120), (0, 0, 80, 140), (1800, 950, 110, 120), (200, 100, 900, 900)])
+def test_two_face_rect_matches_half_aspect(aspect, face):
+    out_width, out_height = ASPECT_TARGETS[aspect]
+    plan = RenderPlan(1920, 1080, 2, out_size=(out_width, out_height))
+    x, y, w, h = plan.two_face_rect(face)
+
+    # Dentro do frame e na proporção da metade da tela (o resize não distorce o rosto)
+    assert 0 <= x and 0 <= y and x + w <= 1920 and y + h <= 1080
+    assert w / h == pytest.approx(out_width / (out_height // 2), rel=0.02)
+
+
+def test_two_face_rect_keeps_face_centered():
+    plan = RenderPlan(1920, 1080, 2, out_size=ASPECT_TARGETS["1x1"])
+    x, y, w, h = plan.two_face_rect((900, 400, 120, 120))
+    assert x + w / 2 == pytest.approx(960, abs=1)
+    assert y + h / 2 == pytest.approx(460, abs=1)
+    assert h == 300  # zoom_out_factor (2.5) x altura do rosto; a largura cresce até 2:1
+
+
+def test_render_two_faces_fills_both_halves():
+    plan = RenderPlan(1920, 1080, 2, out_size=ASPECT_TARGETS["4x5"])
+    frame = np.full((1080, 1920, 3), 200, dtype=np.uint8)
+    canvas = plan.render(frame, [(300, 300, 120, 120), (1500, 300, 120, 120)])
+    assert canvas.shape == (1350, 1080, 3)
+    assert canvas.min() == 200
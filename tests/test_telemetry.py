@@ -0,0 +1,41 @@
+import os
+import stat
+import sys
+
+import pytest
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from scripts.telemetry import Trace
+
+pytestmark = pytest.mark.skipif(os.name != "posix", reason="py-spy falso é um script de shell")
+
+
+def fake_py_spy(tmp_path, monkeypatch, script):
+    # Um executável "py-spy" no PATH que imita as falhas do real (ex: sem permissão de ptrace)
+    bin_dir = tmp_path / "bin"
+    bin_dir.mkdir()
+    program = bin_dir / "py-spy"
+    program.write_text("#!/bin/sh\n" + script + "\n")
+    program.chmod(program.stat().st_mode | stat.S_IEXEC)
+    monkeypatch.setenv("PATH", f"{bin_dir}{os.pathsep}{os.environ.get('PATH', '')}")
+
+
+def run_stage(tmp_path):
+    trace = Trace(job_id="job", output_dir=str(tmp_path / "traces"), profile_stage="reframe", profiler="py-spy")
+    with trace.stage("reframe"):
+        sum(range(1000))
+    return trace.stages[0]
+
+
+def test_py_spy_that_cannot_attach_falls_back_to_cprofile(tmp_path, monkeypatch):
+    fake_py_spy(tmp_path, monkeypatch, "echo 'Permission Denied' >&2; exit 1")
+    entry = run_stage(tmp_path)
+    assert entry["profile"].endswith("job_reframe.prof")
+    assert os.path.exists(entry["profile"])
+
+
+def test_py_spy_without_output_is_not_recorded(tmp_path, monkeypatch):
+    fake_py_spy(tmp_path, monkeypatch, "trap 'exit 0' INT\nwhile true; do sleep 0.1; done")
+    entry = run_stage(tmp_path)
+    assert "profile" not in entry
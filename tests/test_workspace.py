@@ -0,0 +1,31 @@
+import os
+import subprocess
+import sys
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from scripts.workspace import Workspace, resolve
+
+
+def test_default_root_keeps_relative_paths():
+    workspace = resolve()
+    assert workspace.tmp == "tmp"
+    assert workspace.input_video == os.path.join("tmp", "input_video.mp4")
+    assert workspace.final_dir() == "final"
+    assert workspace.burned_dir("1x1") == "burned_sub_1x1"
+
+
+def test_job_workspace_is_isolated(tmp_path):
+    workspace = Workspace.for_job("abc", base_dir=str(tmp_path)).create()
+    assert workspace.root == os.path.join(str(tmp_path), "abc")
+    assert workspace.segments_file == os.path.join(str(tmp_path), "abc", "tmp", "viral_segments.txt")
+    assert workspace.final_dir("4x5") == os.path.join(str(tmp_path), "abc", "final_4x5")
+    assert all(os.path.isdir(folder) for folder in (workspace.tmp, workspace.final, workspace.subs, workspace.subs_ass, workspace.burned_sub))
+
+
+def test_stage_modules_import_without_media_dependencies():
+    # Os estágios que só lidam com caminhos não podem depender de cv2/numpy para serem importados
+    root = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+    code = "import sys; import scripts.workspace, scripts.save_json, scripts.adjust_subtitles; print(sorted({'cv2', 'numpy'} & set(sys.modules)))"
+    result = subprocess.run([sys.executable, "-c", code], cwd=root, capture_output=True, text=True, check=True)
+    assert result.stdout.strip() == "[]"